@@ -3,7 +3,8 @@ from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.utils import timezone
 from django.contrib import messages
-from .models import CustomUser
+from .models import AuthToken, CustomUser
+from .tokens import revoke_tokens
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -107,3 +108,20 @@ def reject_selected_instructors(modeladmin, request, queryset):
 reject_selected_instructors.short_description = "Reject selected instructor requests"
 
 CustomUserAdmin.actions = [approve_selected_instructors, reject_selected_instructors]
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'key_prefix', 'device_name', 'ip_address', 'created_at', 'last_used_at', 'expires_at')
+    search_fields = ('user__username', 'key_prefix', 'device_name')
+    readonly_fields = ('user', 'key_hash', 'key_prefix', 'device_name', 'ip_address', 'created_at', 'last_used_at', 'expires_at')
+    list_select_related = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def delete_model(self, request, obj):
+        revoke_tokens(AuthToken.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        revoke_tokens(queryset)
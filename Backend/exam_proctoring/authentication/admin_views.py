@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from exam_app.pagination import PaginationError, filter_queryset, paginate, page_response
 from .serializers import UserSerializer
 
 User = get_user_model()
@@ -13,11 +14,28 @@ User = get_user_model()
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def admin_users_list(request):
-    """Get all users for admin management"""
+    """
+    Get users for admin management, newest first
+    Keyset paginated (?cursor=, ?limit=) and filterable by ?is_active=,
+    ?is_staff=, ?is_instructor=, ?is_student=, ?since=/?until= (date joined)
+    and ?search= (username, email or name).
+    """
     if not (request.user.is_staff or getattr(request.user, 'is_instructor', False)):
         return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    users = User.objects.all().order_by('-date_joined')
+    try:
+        users = filter_queryset(
+            User.objects.all(), request.GET,
+            choices={
+                'is_active': 'is_active', 'is_staff': 'is_staff',
+                'is_instructor': 'is_instructor', 'is_student': 'is_student',
+            },
+            date_field='date_joined',
+            search_fields=('username', 'email', 'first_name', 'last_name'),
+        )
+        users, next_cursor = paginate(users, request.GET, ('-date_joined', '-id'))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     users_data = []
     for user in users:
@@ -38,7 +56,7 @@ def admin_users_list(request):
             'last_login': user.last_login.isoformat() if user.last_login else None
         })
     
-    return Response(users_data)
+    return page_response(request, users_data, next_cursor)
 
 @api_view(['PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
@@ -0,0 +1,11 @@
+# backend/authentication/management/commands/purge_expired_tokens.py
+from django.core.management.base import BaseCommand
+from authentication.tokens import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired API tokens"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired token(s)"))
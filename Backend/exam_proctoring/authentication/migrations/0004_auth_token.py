@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:13
+
+import hashlib
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_legacy_tokens(apps, schema_editor):
+    """Keep existing sessions signed in: hash the old single-token keys"""
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('authentication', 'AuthToken')
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    AuthToken.objects.bulk_create([
+        AuthToken(
+            user_id=token.user_id,
+            key_hash=hashlib.sha256(token.key.encode('utf-8')).hexdigest(),
+            key_prefix=token.key[:8],
+            device_name='Migrated token',
+            last_used_at=now,
+            expires_at=expires_at,
+        )
+        for token in Token.objects.iterator(chunk_size=2000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_user_listing_index'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_hash', models.CharField(max_length=64, unique=True)),
+                ('key_prefix', models.CharField(help_text='First characters of the key, to tell tokens apart', max_length=8)),
+                ('device_name', models.CharField(blank=True, max_length=200)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+                'indexes': [models.Index(fields=['user', '-last_used_at'], name='authenticat_user_id_50ca46_idx'), models.Index(fields=['expires_at'], name='authenticat_expires_5ea618_idx')],
+            },
+        ),
+        migrations.RunPython(copy_legacy_tokens, migrations.RunPython.noop),
+    ]
@@ -37,6 +37,12 @@ class CustomUser(AbstractUser):
         related_query_name='customuser',
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination of the admin user list, newest first
+            models.Index(fields=['-date_joined', '-id']),
+        ]
+
     def __str__(self):
         return self.username
     
@@ -60,3 +66,29 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+class AuthToken(models.Model):
+    """
+    API token of one login (device). Only a SHA-256 hash of the key is
+    stored; expiry slides forward while the token is in use.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='auth_tokens')
+    key_hash = models.CharField(max_length=64, unique=True)
+    key_prefix = models.CharField(max_length=8, help_text="First characters of the key, to tell tokens apart")
+    device_name = models.CharField(max_length=200, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-last_used_at']
+        indexes = [
+            models.Index(fields=['user', '-last_used_at']),
+            # Purging expired tokens
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.key_prefix}... ({self.device_name or 'unknown device'})"
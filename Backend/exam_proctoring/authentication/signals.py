@@ -0,0 +1,27 @@
+# backend/authentication/signals.py
+"""
+Keep the token cache in step with users
+Entries are dropped right away and again once the transaction commits, so a
+request that reads the old row in between cannot keep it cached. Revoked
+tokens are dropped by authentication.tokens.revoke_tokens.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+from .models import AuthToken
+from .token_cache import invalidate_token
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def drop_cached_user(sender, instance, created=False, **kwargs):
+    """Password changes, deactivation and any other change to the user"""
+    if created:
+        return
+    key_hashes = list(AuthToken.objects.filter(user_id=instance.pk).values_list('key_hash', flat=True))
+    if key_hashes:
+        invalidate_token(*key_hashes)
+        transaction.on_commit(lambda: invalidate_token(*key_hashes))
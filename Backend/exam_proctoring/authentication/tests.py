@@ -1,3 +1,207 @@
-from django.test import TestCase
+import hashlib
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from proctoring.middleware import get_user_from_token
+from .models import AuthToken
+from .token_cache import clear_token_cache
+from .tokens import issue_token, purge_expired_tokens
 
-# Create your tests here.
+User = get_user_model()
+
+
+def token_client(key):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+    return client
+
+
+class AdminUsersListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True, is_student=False)
+        for index in range(3):
+            User.objects.create_user(f'student{index}', f'student{index}@example.com', 'pw')
+        User.objects.create_user('teacher', 'teacher@example.com', 'pw', is_student=False, is_instructor=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_filters_by_role_on_the_server(self):
+        response = self.client.get('/api/auth/admin/users/', {'is_student': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(user['username'] for user in response.data), ['student0', 'student1', 'student2'])
+
+        response = self.client.get('/api/auth/admin/users/', {'is_instructor': 'true'})
+        self.assertEqual([user['username'] for user in response.data], ['teacher'])
+
+    def test_follows_next_cursor_one_page_at_a_time(self):
+        seen = []
+        params = {'limit': 2}
+        while True:
+            response = self.client.get('/api/auth/admin/users/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), 2)
+            seen.extend(user['username'] for user in response.data)
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            params = {'limit': 2, 'cursor': cursor}
+        self.assertEqual(sorted(seen), sorted(User.objects.values_list('username', flat=True)))
+
+    def test_bad_cursor_is_a_400(self):
+        response = self.client.get('/api/auth/admin/users/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TOKEN_CACHE_TIMEOUT=60, TOKEN_CACHE_SHARED=False)
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        clear_token_cache()
+        self.addCleanup(clear_token_cache)
+        self.user = User.objects.create_user('student', 'student@example.com', 'old-password')
+        _, self.key = issue_token(self.user, device_name='laptop')
+        self.client = token_client(self.key)
+
+    def warm(self):
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+
+    def test_cached_requests_make_no_token_queries(self):
+        self.warm()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries if 'authentication_authtoken' in query['sql']])
+
+    def test_websocket_auth_uses_the_same_cache(self):
+        self.warm()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(async_to_sync(get_user_from_token)(self.key), self.user)
+        self.assertEqual(len(queries.captured_queries), 0)
+        self.assertTrue(async_to_sync(get_user_from_token)('not-a-token').is_anonymous)
+
+    def test_logout_revokes_a_cached_token(self):
+        self.warm()
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 401)
+        self.assertTrue(async_to_sync(get_user_from_token)(self.key).is_anonymous)
+
+    def test_deactivation_rejects_a_cached_token(self):
+        self.warm()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 401)
+        self.assertTrue(async_to_sync(get_user_from_token)(self.key).is_anonymous)
+
+    def test_password_change_signs_out_other_sessions(self):
+        _, other_key = issue_token(self.user, device_name='phone')
+        other = token_client(other_key)
+        self.assertEqual(other.get('/api/auth/user/').status_code, 200)
+        self.warm()
+
+        response = self.client.post(
+            '/api/auth/password/change/', {'old_password': 'old-password', 'new_password': 'n3w-Passw0rd!'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(other.get('/api/auth/user/').status_code, 401)
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+
+    def test_cached_user_is_a_copy(self):
+        self.warm()
+        first = async_to_sync(get_user_from_token)(self.key)
+        first.first_name = 'Changed'
+        self.assertEqual(async_to_sync(get_user_from_token)(self.key).first_name, '')
+
+
+@override_settings(TOKEN_CACHE_TIMEOUT=60, TOKEN_CACHE_SHARED=False, AUTH_TOKEN_TTL=3600, AUTH_TOKEN_REFRESH_INTERVAL=600)
+class AuthTokenTests(TestCase):
+    def setUp(self):
+        clear_token_cache()
+        self.addCleanup(clear_token_cache)
+        self.user = User.objects.create_user('student', 'student@example.com', 'password')
+
+    def login(self, device):
+        response = APIClient().post(
+            '/api/auth/login/', {'username': 'student', 'password': 'password', 'device_name': device}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def test_each_login_gets_its_own_hashed_token(self):
+        laptop, phone = self.login('laptop'), self.login('phone')
+        self.assertNotEqual(laptop, phone)
+        stored = AuthToken.objects.filter(user=self.user)
+        self.assertEqual(
+            set(stored.values_list('key_hash', flat=True)),
+            {hashlib.sha256(key.encode()).hexdigest() for key in (laptop, phone)},
+        )
+        # Only the hash is kept
+        for token in stored:
+            self.assertNotIn(token.key_hash, (laptop, phone))
+
+        # Logging out on one device leaves the other signed in
+        self.assertEqual(token_client(laptop).post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(token_client(laptop).get('/api/auth/user/').status_code, 401)
+        self.assertEqual(token_client(phone).get('/api/auth/user/').status_code, 200)
+
+    def test_logout_all_ends_every_session(self):
+        laptop, phone = self.login('laptop'), self.login('phone')
+        self.assertEqual(token_client(laptop).post('/api/auth/logout/', {'all': True}, format='json').status_code, 200)
+        self.assertEqual(token_client(phone).get('/api/auth/user/').status_code, 401)
+        self.assertFalse(AuthToken.objects.filter(user=self.user).exists())
+
+    def test_expired_token_is_rejected_despite_the_cache(self):
+        key = self.login('laptop')
+        client = token_client(key)
+        self.assertEqual(client.get('/api/auth/user/').status_code, 200)
+
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(client.get('/api/auth/user/').status_code, 401)
+
+    def test_expiry_slides_at_most_once_per_refresh_interval(self):
+        key = self.login('laptop')
+        client = token_client(key)
+        token = AuthToken.objects.get(user=self.user)
+
+        soon = timezone.now() + timedelta(minutes=5)
+        with mock.patch('django.utils.timezone.now', return_value=soon), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get('/api/auth/user/').status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+        self.assertEqual(AuthToken.objects.get(pk=token.pk).expires_at, token.expires_at)
+
+        # Past the refresh interval: one UPDATE moves the expiry on, and the
+        # token now outlives its original expiry
+        later = timezone.now() + timedelta(minutes=50)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(client.get('/api/auth/user/').status_code, 200)
+        self.assertEqual(AuthToken.objects.get(pk=token.pk).expires_at, later + timedelta(hours=1))
+        with mock.patch('django.utils.timezone.now', return_value=later + timedelta(minutes=30)):
+            self.assertEqual(client.get('/api/auth/user/').status_code, 200)
+
+    def test_rotation_replaces_the_key(self):
+        old_key = self.login('laptop')
+        response = token_client(old_key).post('/api/auth/token/rotate/')
+        self.assertEqual(response.status_code, 200)
+        new_key = response.data['token']
+        self.assertEqual(token_client(old_key).get('/api/auth/user/').status_code, 401)
+        self.assertEqual(token_client(new_key).get('/api/auth/user/').status_code, 200)
+        self.assertEqual(AuthToken.objects.get(user=self.user).device_name, 'laptop')
+
+    def test_purge_deletes_only_expired_tokens(self):
+        self.login('laptop')
+        expired, _ = issue_token(self.user, device_name='old')
+        AuthToken.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired_tokens(), 1)
+        self.assertEqual(list(AuthToken.objects.values_list('device_name', flat=True)), ['laptop'])
+
+    def test_cache_miss_is_one_indexed_lookup(self):
+        key = self.login('laptop')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(token_client(key).get('/api/auth/user/').status_code, 200)
+        lookups = [query['sql'] for query in queries.captured_queries if 'FROM "authentication_authtoken"' in query['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertIn('"key_hash" =', lookups[0])
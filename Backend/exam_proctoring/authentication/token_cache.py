@@ -0,0 +1,183 @@
+# backend/authentication/token_cache.py
+"""
+Token validation and the token cache shared by REST and WebSocket auth
+Tokens are looked up by the SHA-256 hash of their key: one indexed query on
+a cache miss, none on a hit. Valid tokens are kept in a process-local LRU
+for TOKEN_CACHE_TIMEOUT seconds and, with TOKEN_CACHE_SHARED, also in
+Django's cache so all workers share them. Entries are stored pickled and
+every lookup gets its own user instance, so views that modify request.user
+never touch the cached copy.
+
+Expiry slides: a token used more than AUTH_TOKEN_REFRESH_INTERVAL seconds
+after its last recorded use gets a fresh AUTH_TOKEN_TTL, so busy tokens cost
+at most one UPDATE per interval.
+
+Entries are dropped when tokens are revoked (authentication/tokens.py) and
+whenever the user is saved or deleted (authentication/signals.py). With a
+shared cache, other processes may serve their local copy for up to
+SHARED_LOCAL_TIMEOUT seconds after an invalidation.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from .models import AuthToken
+
+# Local lifetime of entries when TOKEN_CACHE_SHARED is on
+SHARED_LOCAL_TIMEOUT = 5
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+# Bumped by every invalidation, so a lookup that raced with one does not
+# cache the token it read before the change
+_generation = 0
+
+
+def hash_token_key(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _cache_key(key_hash):
+    return f'auth_token_{key_hash}'
+
+
+def _local_timeout():
+    timeout = settings.TOKEN_CACHE_TIMEOUT
+    return min(timeout, SHARED_LOCAL_TIMEOUT) if settings.TOKEN_CACHE_SHARED else timeout
+
+
+def _local_get(key_hash):
+    with _lock:
+        entry = _local.get(key_hash)
+        if entry is None:
+            return None
+        expires, data = entry
+        if expires < time.monotonic():
+            del _local[key_hash]
+            return None
+        _local.move_to_end(key_hash)
+        return data
+
+
+def _local_set(key_hash, data, generation=None):
+    with _lock:
+        if generation is not None and generation != _generation:
+            return
+        _local[key_hash] = (time.monotonic() + _local_timeout(), data)
+        _local.move_to_end(key_hash)
+        while len(_local) > settings.TOKEN_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def _store(key_hash, data, generation=None):
+    if settings.TOKEN_CACHE_TIMEOUT <= 0:
+        return
+    _local_set(key_hash, data, generation)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.set(_cache_key(key_hash), data, settings.TOKEN_CACHE_TIMEOUT)
+
+
+def _cached(key_hash):
+    if settings.TOKEN_CACHE_TIMEOUT <= 0:
+        return None
+    data = _local_get(key_hash)
+    if data is None and settings.TOKEN_CACHE_SHARED:
+        data = cache.get(_cache_key(key_hash))
+        if data is not None:
+            _local_set(key_hash, data)
+    return data
+
+
+def _load(key_hash):
+    """The one indexed lookup of a cache miss"""
+    token = AuthToken.objects.select_related('user').filter(
+        key_hash=key_hash, expires_at__gt=timezone.now()
+    ).first()
+    if token is None:
+        return None
+    return pickle.dumps((token.user, token.id, token.expires_at, token.last_used_at), pickle.HIGHEST_PROTOCOL)
+
+
+def get_token(key):
+    """
+    (user, token) for a valid, unexpired key, or None
+
+    The token is an unsaved AuthToken stand-in carrying the id, hash and
+    expiry; enough for request.auth and for revoking it.
+    """
+    key_hash = hash_token_key(key)
+    data = _cached(key_hash)
+    if data is None:
+        generation = _generation
+        data = _load(key_hash)
+        if data is None:
+            return None
+        _store(key_hash, data, generation)
+    user, token_id, expires_at, last_used_at = pickle.loads(data)
+
+    now = timezone.now()
+    if expires_at <= now:
+        invalidate_token(key_hash)
+        return None
+    if (now - last_used_at).total_seconds() >= settings.AUTH_TOKEN_REFRESH_INTERVAL:
+        # Slide the expiry; a token revoked meanwhile no longer matches
+        last_used_at, expires_at = now, now + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+        if not AuthToken.objects.filter(id=token_id, expires_at__gt=now).update(
+            last_used_at=last_used_at, expires_at=expires_at
+        ):
+            invalidate_token(key_hash)
+            return None
+        _store(key_hash, pickle.dumps((user, token_id, expires_at, last_used_at), pickle.HIGHEST_PROTOCOL))
+
+    token = AuthToken(
+        id=token_id, user=user, key_hash=key_hash, key_prefix=key[:8],
+        last_used_at=last_used_at, expires_at=expires_at
+    )
+    return user, token
+
+
+def get_token_user(key):
+    """The user of a valid key, or None"""
+    result = get_token(key)
+    return result[0] if result else None
+
+
+def invalidate_token(*key_hashes):
+    global _generation
+    with _lock:
+        _generation += 1
+        for key_hash in key_hashes:
+            _local.pop(key_hash, None)
+    if settings.TOKEN_CACHE_SHARED and key_hashes:
+        cache.delete_many([_cache_key(key_hash) for key_hash in key_hashes])
+
+
+def invalidate_user_tokens(*user_ids):
+    """Drop the cached entries of all tokens of the given users"""
+    invalidate_token(*AuthToken.objects.filter(user_id__in=user_ids).values_list('key_hash', flat=True))
+
+
+def clear_token_cache():
+    with _lock:
+        _local.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """DRF authentication for 'Authorization: Token <key>' with AuthToken keys"""
+
+    def authenticate_credentials(self, key):
+        result = get_token(key)
+        if result is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+        user, token = result
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, token)
@@ -0,0 +1,89 @@
+# backend/authentication/tokens.py
+"""
+Issuing, rotating and revoking per-device API tokens
+Every login gets its own AuthToken, so logging out on one device leaves the
+others signed in. Keys are returned to the client once and only their hash
+is stored. Tokens expire AUTH_TOKEN_TTL seconds after their last use
+(see token_cache.get_token); expired rows are purged in bulk.
+"""
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import AuthToken
+from .token_cache import hash_token_key, invalidate_token
+
+KEY_BYTES = 20
+
+
+def _client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip() or None
+    return request.META.get('REMOTE_ADDR') or None
+
+
+def _device_name(request):
+    name = ''
+    if hasattr(request, 'data'):
+        name = str(request.data.get('device_name') or '')
+    return (name or request.META.get('HTTP_USER_AGENT', ''))[:200]
+
+
+def issue_token(user, request=None, device_name=None):
+    """Create a token for a new login; returns (token, key)"""
+    key = secrets.token_hex(KEY_BYTES)
+    now = timezone.now()
+    token = AuthToken.objects.create(
+        user=user,
+        key_hash=hash_token_key(key),
+        key_prefix=key[:8],
+        device_name=(device_name if device_name is not None else _device_name(request) if request else '')[:200],
+        ip_address=_client_ip(request) if request else None,
+        last_used_at=now,
+        expires_at=now + timedelta(seconds=settings.AUTH_TOKEN_TTL),
+    )
+    # Tidy up this user's expired tokens while we are here (indexed)
+    user.auth_tokens.filter(expires_at__lte=now).delete()
+    return token, key
+
+
+def revoke_tokens(tokens):
+    """Delete the tokens of a queryset and drop them from the cache; returns the count"""
+    key_hashes = list(tokens.values_list('key_hash', flat=True))
+    if not key_hashes:
+        return 0
+    deleted, _ = AuthToken.objects.filter(key_hash__in=key_hashes).delete()
+    invalidate_token(*key_hashes)
+    transaction.on_commit(lambda: invalidate_token(*key_hashes))
+    return deleted
+
+
+def rotate_token(token, request=None):
+    """Replace a token with a new key for the same device; returns (token, key)"""
+    with transaction.atomic():
+        # request.auth is the cache's stand-in, without the device details
+        stored = AuthToken.objects.select_for_update().select_related('user').get(pk=token.pk)
+        new_token, key = issue_token(stored.user, request, device_name=stored.device_name)
+        revoke_tokens(AuthToken.objects.filter(pk=stored.pk))
+    return new_token, key
+
+
+def purge_expired_tokens():
+    """Delete all expired tokens in one statement; returns the count"""
+    deleted, _ = AuthToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def token_data(token, current_id=None):
+    return {
+        'id': token.id,
+        'key_prefix': token.key_prefix,
+        'device_name': token.device_name,
+        'ip_address': token.ip_address,
+        'created_at': token.created_at.isoformat() if token.created_at else None,
+        'last_used_at': token.last_used_at.isoformat(),
+        'expires_at': token.expires_at.isoformat(),
+        'current': token.id == current_id,
+    }
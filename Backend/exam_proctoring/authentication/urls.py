@@ -2,7 +2,8 @@
 from django.urls import path
 from .views import (
     RegisterView, LoginView, logout_view, UserDetailView, 
-    UpdateProfileView, ChangePasswordView, user_stats
+    UpdateProfileView, ChangePasswordView, user_stats,
+    session_list, revoke_session, rotate_session_token
 )
 from . import admin_views
 
@@ -14,6 +15,9 @@ urlpatterns = [
     path('profile/update/', UpdateProfileView.as_view(), name='update-profile'),
     path('password/change/', ChangePasswordView.as_view(), name='change-password'),
     path('stats/', user_stats, name='user-stats'),
+    path('sessions/', session_list, name='session-list'),
+    path('sessions/<int:token_id>/', revoke_session, name='revoke-session'),
+    path('token/rotate/', rotate_session_token, name='rotate-token'),
     
     # Admin URLs
     path('admin/users/', admin_views.admin_users_list, name='admin-users-list'),
@@ -3,13 +3,14 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from django.contrib.auth import authenticate, get_user_model
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.utils import timezone
+from .models import AuthToken
 from .serializers import UserSerializer, RegisterSerializer
+from .tokens import issue_token, revoke_tokens, rotate_token, token_data
 
 CustomUser = get_user_model()
 
@@ -57,9 +58,10 @@ class RegisterView(generics.CreateAPIView):
                     }, status=status.HTTP_201_CREATED)
                 else:
                     # Regular student registration
-                    token, created = Token.objects.get_or_create(user=user)
+                    token, key = issue_token(user, request)
                     return Response({
-                        'token': token.key,
+                        'token': key,
+                        'expires_at': token.expires_at.isoformat(),
                         'user': UserSerializer(user).data
                     }, status=status.HTTP_201_CREATED)
                     
@@ -87,9 +89,10 @@ class LoginView(generics.GenericAPIView):
             user = authenticate(username=username, password=password)
             if user:
                 if user.is_active:
-                    token, created = Token.objects.get_or_create(user=user)
+                    token, key = issue_token(user, request)
                     return Response({
-                        'token': token.key,
+                        'token': key,
+                        'expires_at': token.expires_at.isoformat(),
                         'user': UserSerializer(user).data
                     })
                 else:
@@ -108,8 +111,12 @@ class LoginView(generics.GenericAPIView):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
+    """Revoke the token of this session, or of every session with 'all'"""
     try:
-        request.user.auth_token.delete()
+        if str(request.data.get('all', '')).lower() in ('1', 'true'):
+            revoke_tokens(request.user.auth_tokens.all())
+        elif isinstance(request.auth, AuthToken):
+            revoke_tokens(AuthToken.objects.filter(pk=request.auth.pk))
         return Response({
             'message': 'Logout successful'
         }, status=status.HTTP_200_OK)
@@ -156,10 +163,58 @@ class ChangePasswordView(APIView):
         user.set_password(new_password)
         user.save()
         
+        # Sign out every other session
+        other_tokens = user.auth_tokens.all()
+        if isinstance(request.auth, AuthToken):
+            other_tokens = other_tokens.exclude(pk=request.auth.pk)
+        revoke_tokens(other_tokens)
+        
         return Response({
             'message': 'Password changed successfully'
         }, status=status.HTTP_200_OK)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def session_list(request):
+    """The current user's signed-in sessions (tokens)"""
+    current_id = request.auth.pk if isinstance(request.auth, AuthToken) else None
+    tokens = request.user.auth_tokens.filter(expires_at__gt=timezone.now())
+    return Response({
+        'sessions': [token_data(token, current_id) for token in tokens]
+    })
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def revoke_session(request, token_id):
+    """Sign out one of the current user's sessions"""
+    if not revoke_tokens(request.user.auth_tokens.filter(pk=token_id)):
+        return Response({
+            'error': 'Session not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'message': 'Session revoked'
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def rotate_session_token(request):
+    """Replace the token of this session with a new key"""
+    if not isinstance(request.auth, AuthToken):
+        return Response({
+            'error': 'Token authentication required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        token, key = rotate_token(request.auth, request)
+        return Response({
+            'token': key,
+            'expires_at': token.expires_at.isoformat()
+        })
+    except Exception as e:
+        print(f"Error rotating token: {e}")
+        return Response({
+            'error': 'Failed to rotate token'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_stats(request):
@@ -168,18 +223,17 @@ def user_stats(request):
         user = request.user
         
         # Import here to avoid circular imports
-        from exam_app.models import ExamAttempt
+        from exam_app.analytics import student_performance_summary
         
-        attempts = ExamAttempt.objects.filter(user=user)
-        completed_exams = attempts.filter(status='COMPLETED').count()
+        summary = student_performance_summary(user.id)
+        completed_exams = summary['completed_exams']
         
         # Calculate total and average score
-        completed_attempts = attempts.filter(status='COMPLETED', score__isnull=False)
-        total_score = sum([attempt.score for attempt in completed_attempts])
+        total_score = summary['total_score']
         avg_score = total_score / completed_exams if completed_exams > 0 else 0
         
         stats = {
-            'total_attempts': attempts.count(),
+            'total_attempts': summary['total_attempts'],
             'completed_exams': completed_exams,
             'average_score': round(avg_score, 2),
             'total_score': total_score
@@ -1,8 +1,8 @@
 # backend/exam_app/admin.py
 from django.contrib import admin
-from django.utils import timezone
 from django.contrib import messages
-from .models import Subject, Exam, Question, Option, ExamAttempt, Answer, AnswerImage, ExamActivityLog
+from .models import Subject, Exam, Question, Option, ExamAttempt, Answer, AnswerImage
+from .results_release import release_attempts, unrelease_attempts
 
 class OptionInline(admin.TabularInline):
     model = Option
@@ -110,41 +110,24 @@ class ExamAttemptAdmin(admin.ModelAdmin):
     
     def release_results_action(self, request, queryset):
         """Admin action to release results for selected attempts"""
-        count = 0
-        for attempt in queryset:
-            if attempt.status == 'COMPLETED' and not attempt.results_ready:
-                attempt.results_ready = True
-                attempt.save()
-                
-                # Log activity
-                ExamActivityLog.objects.create(
-                    attempt=attempt,
-                    activity_type='RESULTS_RELEASED',
-                    description=f'Admin released results via Django admin',
-                    metadata={
-                        'released_by': request.user.username,
-                        'released_at': timezone.now().isoformat()
-                    }
-                )
-                count += 1
+        released, skipped = release_attempts(
+            queryset, request.user, description='Admin released results via Django admin', skip_unmarked=True
+        )
         
-        if count > 0:
-            self.message_user(request, f'Successfully released results for {count} attempt(s).', messages.SUCCESS)
+        if released:
+            self.message_user(request, f'Successfully released results for {len(released)} attempt(s).', messages.SUCCESS)
         else:
             self.message_user(request, 'No eligible attempts selected. Only completed attempts with unreleased results can be released.', messages.WARNING)
+        if skipped:
+            self.message_user(request, f'Skipped {skipped} attempt(s) with answers still awaiting manual marking.', messages.WARNING)
     release_results_action.short_description = 'Release Results for Selected Attempts'
     
     def unrelease_results_action(self, request, queryset):
         """Admin action to unrelease results for selected attempts"""
-        count = 0
-        for attempt in queryset:
-            if attempt.results_ready:
-                attempt.results_ready = False
-                attempt.save()
-                count += 1
+        unreleased = unrelease_attempts(queryset, request.user, description='Admin withdrew results via Django admin')
         
-        if count > 0:
-            self.message_user(request, f'Successfully unreleased results for {count} attempt(s).', messages.SUCCESS)
+        if unreleased:
+            self.message_user(request, f'Successfully unreleased results for {len(unreleased)} attempt(s).', messages.SUCCESS)
         else:
             self.message_user(request, 'No attempts with released results selected.', messages.WARNING)
     unrelease_results_action.short_description = 'Unrelease Results for Selected Attempts'
@@ -7,11 +7,27 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Sum, Avg, Q, Exists, OuterRef
+from django.core.files.base import ContentFile
+from django.db.models import Sum, Avg, Q, Exists, OuterRef, Count, Subquery
+import json
 import traceback
-from .models import Subject, Exam, Question, Option, ExamAttempt, ExamActivityLog, AnswerImage, Answer, AnswerAttachment, SolutionAttachment
+from .models import Subject, Exam, Question, Option, ExamAttempt, ExamActivityLog, AnswerImage, Answer, AnswerAttachment, SolutionAttachment, QuestionImportJob, ExamEnrollment
 from .serializers import ExamSerializer, QuestionSerializer, ExamAttemptSerializer, SubjectSerializer  # Import from serializers
-from .question_import import import_questions_from_json, import_questions_from_csv, import_questions_from_docx, QuestionImportError
+from .question_import import dry_run_import_json, dry_run_import_upload
+from .import_jobs import import_job_data, start_import_job
+from .background import fail_stale_jobs
+from .enrollment import enroll_users, enrollment_data, resolve_user_ids, unenroll_users
+from .analytics import attempt_summary, question_statistics
+from .exam_stats import invalidate_exam_stats, refresh_attempt_stats
+from .text_similarity import answer_clusters
+from .pagination import PaginationError, filter_queryset, paginate, page_response
+from .results_release import release_attempts, unrelease_attempts, ReleaseError
+from .result_pdfs import released_attempts
+from .mailer import queue_result_emails
+from .marking import (
+    MarkingError, apply_attempt_totals, attempt_totals, mark_answer_group, marking_queue,
+    recalculate_attempt_scores
+)
 
 User = get_user_model()
 
@@ -24,6 +40,59 @@ def is_admin_user(user):
         getattr(user, 'instructor_approved', False)
     )
 
+
+def is_dry_run(request):
+    """True when the request asks to validate an import without saving"""
+    value = request.data.get('dry_run', request.query_params.get('dry_run', False))
+    return str(value).lower() in ('true', '1', 'yes')
+
+
+def dry_run_import(request):
+    """Validate the uploaded file or json_data and return the report"""
+    if 'file' in request.FILES:
+        uploaded_file = request.FILES['file']
+        report = dry_run_import_upload(uploaded_file, uploaded_file.name)
+    else:
+        report = dry_run_import_json(request.data.get('json_data'))
+    report['dry_run'] = True
+    return Response(report, status=status.HTTP_200_OK)
+
+
+def _start_question_import(request, exam):
+    """Validate an import upload and queue it as a job (dry runs answer inline)"""
+    if 'file' not in request.FILES and 'json_data' not in request.data:
+        return Response({
+            'error': 'Either file upload or json_data is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Dry runs are fast enough to answer inline, no job is created
+    if is_dry_run(request):
+        return dry_run_import(request)
+    
+    overwrite = str(request.data.get('overwrite', False)).lower() in ('true', '1', 'yes')
+    
+    if 'file' in request.FILES:
+        uploaded_file = request.FILES['file']
+        file_name = uploaded_file.name
+    else:
+        json_data = request.data.get('json_data')
+        if not isinstance(json_data, str):
+            json_data = json.dumps(json_data)
+        uploaded_file = ContentFile(json_data.encode('utf-8'))
+        file_name = 'questions.json'
+    
+    job = QuestionImportJob(
+        exam=exam,
+        created_by=request.user,
+        file_name=file_name,
+        overwrite=overwrite
+    )
+    job.file.save(file_name, uploaded_file, save=False)
+    job.save()
+    start_import_job(job)
+    
+    return Response(import_job_data(job), status=status.HTTP_202_ACCEPTED)
+
 class SubjectListCreateView(generics.ListCreateAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
@@ -788,34 +857,49 @@ def live_attempts(request, exam_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def exam_all_attempts(request, exam_id):
-    """Get all attempts (completed + live) for a specific exam"""
+    """
+    Get attempts (completed + live) for a specific exam, newest first
+    Keyset paginated (?cursor=, ?limit=) and filterable by ?status=,
+    ?since=/?until= (start time) and ?search= (username or email).
+    """
     try:
         if not is_admin_user(request.user):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         exam = get_object_or_404(Exam, id=exam_id)
-        attempts = ExamAttempt.objects.filter(exam=exam).select_related('user').order_by('-start_time')
+        attempts = ExamAttempt.objects.filter(exam=exam).select_related('user', 'exam').annotate(
+            answered_count=Count('answers')
+        )
+        attempts = filter_queryset(
+            attempts, request.GET,
+            choices={'status': 'status'},
+            date_field='start_time',
+            search_fields=('user__username', 'user__email'),
+        )
+        attempts, next_cursor = paginate(attempts, request.GET, ('-start_time', '-id'))
+        
+        # Proctoring data for the whole page in one query
+        sessions = {}
+        try:
+            from proctoring.models import ProctoringSession, FaceDetectionLog
+            latest_faces = FaceDetectionLog.objects.filter(session=OuterRef('pk')).order_by('-timestamp')
+            sessions = {
+                session.attempt_id: session
+                for session in ProctoringSession.objects.filter(attempt__in=attempts).annotate(
+                    violations_count=Count('violations'),
+                    latest_faces_detected=Subquery(latest_faces.values('faces_detected')[:1]),
+                )
+            }
+        except Exception:
+            pass
         
         attempts_data = []
         for attempt in attempts:
-            # Get proctoring data
-            violations_count = 0
-            camera_status = False
-            face_detected = False
-            audio_status = False
-            
-            try:
-                from proctoring.models import ProctoringSession, ViolationLog, FaceDetectionLog
-                session = ProctoringSession.objects.filter(attempt=attempt).first()
-                if session:
-                    camera_status = session.camera_enabled
-                    audio_status = session.microphone_enabled
-                    violations_count = ViolationLog.objects.filter(session=session).count()
-                    latest_face = FaceDetectionLog.objects.filter(session=session).order_by('-timestamp').first()
-                    if latest_face:
-                        face_detected = latest_face.faces_detected > 0
-            except Exception:
-                pass
+            session = sessions.get(attempt.id)
+            violations_count = session.violations_count if session else 0
+            camera_status = session.camera_enabled if session else False
+            audio_status = session.microphone_enabled if session else False
+            face_detected = bool(session and session.latest_faces_detected and session.latest_faces_detected > 0)
             
             attempts_data.append({
                 'id': attempt.id,
@@ -829,7 +913,7 @@ def exam_all_attempts(request, exam_id):
                 'start_time': attempt.start_time.isoformat() if attempt.start_time else None,
                 'end_time': attempt.end_time.isoformat() if attempt.end_time else None,
                 'evaluated_at': attempt.evaluated_at.isoformat() if attempt.evaluated_at else None,
-                'answered_questions': attempt.answers.count(),
+                'answered_questions': attempt.answered_count,
                 'total_questions': attempt.total_questions,
                 'violations_count': violations_count,
                 'camera_status': camera_status,
@@ -837,7 +921,9 @@ def exam_all_attempts(request, exam_id):
                 'audio_status': audio_status,
             })
         
-        return Response(attempts_data)
+        return page_response(request, attempts_data, next_cursor)
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Error in exam_all_attempts: {e}")
         traceback.print_exc()
@@ -847,94 +933,62 @@ def exam_all_attempts(request, exam_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def import_questions(request, exam_id):
-    """Import questions from JSON or CSV file"""
+    """
+    Import questions from a JSON, CSV or DOCX file
+    Kept for existing clients: the import runs as a background job, exactly
+    as a POST to question_import_jobs, and the 202 response carries the job
+    to poll at question_import_job_status.
+    """
     try:
         if not is_admin_user(request.user):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         exam = get_object_or_404(Exam, id=exam_id)
+        return _start_question_import(request, exam)
         
-        # Check if file is uploaded
-        if 'file' not in request.FILES and 'json_data' not in request.data:
-            return Response({
-                'error': 'Either file upload or json_data is required'
-            }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error in import_questions: {e}")
+        traceback.print_exc()
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def question_import_jobs(request, exam_id):
+    """List import jobs for an exam or start a background import"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        overwrite = request.data.get('overwrite', False)
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        if request.method == 'GET':
+            fail_stale_jobs(QuestionImportJob.objects.filter(exam=exam))
+            jobs = QuestionImportJob.objects.filter(exam=exam)[:20]
+            return Response([import_job_data(job) for job in jobs])
+        
+        return _start_question_import(request, exam)
         
-        try:
-            if 'file' in request.FILES:
-                # Handle file upload
-                uploaded_file = request.FILES['file']
-                file_name = uploaded_file.name.lower()
-                file_content = uploaded_file.read()
-                
-                # Check file extension
-                if file_name.endswith('.csv'):
-                    # CSV file
-                    result = import_questions_from_csv(exam_id, file_content, overwrite)
-                elif file_name.endswith('.json'):
-                    # JSON file
-                    import json
-                    json_data = json.loads(file_content.decode('utf-8'))
-                    result = import_questions_from_json(exam_id, json_data, overwrite)
-                elif file_name.endswith(('.docx', '.doc')):
-                    # DOCX file
-                    try:
-                        result = import_questions_from_docx(exam_id, file_content, overwrite)
-                    except QuestionImportError as docx_error:
-                        print(f"DOCX import error: {docx_error}")
-                        return Response({
-                            'error': str(docx_error)
-                        }, status=status.HTTP_400_BAD_REQUEST)
-                else:
-                    # Try to detect format by content
-                    try:
-                        # Try JSON first
-                        import json
-                        json_data = json.loads(file_content.decode('utf-8'))
-                        result = import_questions_from_json(exam_id, json_data, overwrite)
-                    except:
-                        try:
-                            # Try CSV
-                            result = import_questions_from_csv(exam_id, file_content, overwrite)
-                        except:
-                            # Try DOCX
-                            try:
-                                result = import_questions_from_docx(exam_id, file_content, overwrite)
-                            except QuestionImportError as docx_error:
-                                print(f"DOCX import error: {docx_error}")
-                                return Response({
-                                    'error': str(docx_error)
-                                }, status=status.HTTP_400_BAD_REQUEST)
-            else:
-                # Handle JSON data directly
-                json_data = request.data.get('json_data')
-                if isinstance(json_data, str):
-                    import json
-                    json_data = json.loads(json_data)
-                result = import_questions_from_json(exam_id, json_data, overwrite)
-            
-            return Response({
-                'message': f'Successfully imported {result["imported"]} out of {result["total"]} questions',
-                'imported': result['imported'],
-                'total': result['total'],
-                'errors': result['errors']
-            }, status=status.HTTP_200_OK)
-            
-        except QuestionImportError as e:
-            return Response({
-                'error': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            print(f"Error importing questions: {e}")
-            traceback.print_exc()
-            return Response({
-                'error': f'Error importing questions: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
     except Exception as e:
-        print(f"Error in import_questions: {e}")
+        print(f"Error in question_import_jobs: {e}")
+        traceback.print_exc()
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def question_import_job_status(request, job_id):
+    """Get progress of a background question import"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        fail_stale_jobs(QuestionImportJob.objects.filter(id=job_id))
+        job = get_object_or_404(QuestionImportJob, id=job_id)
+        return Response(import_job_data(job))
+        
+    except Exception as e:
+        print(f"Error in question_import_job_status: {e}")
         traceback.print_exc()
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -942,14 +996,28 @@ def import_questions(request, exam_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def attempt_activities(request, attempt_id):
-    """Get all activities for a specific attempt"""
+    """
+    Get activities for a specific attempt, newest first
+    Keyset paginated (?cursor=, ?limit=) and filterable by ?activity_type=,
+    ?since=/?until= and ?search= (description). The matching total is only
+    counted with ?include_total=1, since it scans the whole filtered log.
+    """
     try:
         if not is_admin_user(request.user):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         attempt = get_object_or_404(ExamAttempt, id=attempt_id)
         
-        activities = ExamActivityLog.objects.filter(attempt=attempt).order_by('-timestamp')
+        activities = filter_queryset(
+            ExamActivityLog.objects.filter(attempt=attempt), request.GET,
+            choices={'activity_type': 'activity_type'},
+            date_field='timestamp',
+            search_fields=('description',),
+        )
+        total_activities = None
+        if request.GET.get('include_total') in ('1', 'true'):
+            total_activities = activities.count()
+        activities, next_cursor = paginate(activities, request.GET, ('-timestamp', '-id'))
         
         activities_data = [{
             'id': log.id,
@@ -964,9 +1032,12 @@ def attempt_activities(request, attempt_id):
             'attempt_id': attempt_id,
             'user_name': attempt.user.username,
             'exam_title': attempt.exam.title,
-            'total_activities': len(activities_data),
-            'activities': activities_data
+            'total_activities': total_activities,
+            'activities': activities_data,
+            'next_cursor': next_cursor
         })
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Error in attempt_activities: {e}")
         traceback.print_exc()
@@ -1337,38 +1408,21 @@ def mark_answer(request, answer_id):
             # Note: Answer model doesn't have metadata field, so we skip storing comment there
             # Save with update_fields to ensure marks_awarded is preserved
             # Include solution_text if present
-            update_fields = ['marks_awarded', 'is_correct', 'updated_at']
+            answer.is_manually_marked = True
+            update_fields = ['marks_awarded', 'is_correct', 'is_manually_marked', 'updated_at']
             if solution_text is not None:
                 update_fields.append('solution_text')
             answer.save(update_fields=update_fields)
             
-            # Recalculate attempt score
+            # Recalculate attempt score, correct/wrong counts and pass status
             attempt = answer.attempt
-            total_marks = Answer.objects.filter(attempt=attempt).aggregate(
-                total=Sum('marks_awarded')
-            )['total'] or 0.0
-            
-            attempt.score = float(total_marks)
-            
-            # Recalculate percentage score
-            if attempt.exam.total_marks > 0:
-                attempt.percentage_score = (attempt.score / attempt.exam.total_marks) * 100
-            else:
-                attempt.percentage_score = 0.0
-            
-            # Recalculate correct/wrong answers count
-            correct_count = Answer.objects.filter(attempt=attempt, is_correct=True).count()
-            wrong_count = Answer.objects.filter(attempt=attempt, is_correct=False).exclude(marks_awarded__isnull=True).count()
-            attempt.correct_answers = correct_count
-            attempt.wrong_answers = wrong_count
-            
-            # Check if passed
-            attempt.is_passed = attempt.percentage_score >= attempt.exam.passing_marks if attempt.exam.total_marks > 0 else False
+            apply_attempt_totals(attempt, attempt_totals([attempt.id]).get(attempt.id))
             
             # Don't auto-set results_ready here
             # Admin will manually release results using release_results endpoint
             # Just save the attempt with updated marks
             attempt.save()
+            refresh_attempt_stats(attempt)
             
             # Log activity
             ExamActivityLog.objects.create(
@@ -1426,6 +1480,17 @@ def bulk_mark_answers(request):
         failed_updates = []
         
         with transaction.atomic():
+            # One query for all answers instead of one (or two) per item
+            answer_ids = []
+            for answer_data in answers_data:
+                try:
+                    answer_ids.append(int(answer_data.get('answer_id')))
+                except (TypeError, ValueError):
+                    pass
+            answers = Answer.objects.select_related('question', 'selected_option').in_bulk(answer_ids)
+            to_update = []
+            now = timezone.now()
+            
             for answer_data in answers_data:
                 answer_id = answer_data.get('answer_id')
                 marks_awarded = answer_data.get('marks_awarded')
@@ -1435,7 +1500,14 @@ def bulk_mark_answers(request):
                     continue
                 
                 try:
-                    answer = Answer.objects.get(id=answer_id)
+                    answer = answers.get(int(answer_id))
+                except (TypeError, ValueError):
+                    answer = None
+                if answer is None:
+                    failed_updates.append({'answer_id': answer_id, 'error': 'Answer not found'})
+                    continue
+                
+                try:
                     max_marks = float(answer.question.marks)
                     marks_awarded = float(marks_awarded)
                     
@@ -1449,9 +1521,12 @@ def bulk_mark_answers(request):
                     answer.marks_awarded = marks_awarded
                     if answer.question.question_type in ['SA', 'TEXT', 'IMAGE_UPLOAD']:
                         answer.is_correct = marks_awarded > 0
-                        answer._is_correct_manually_set = True  # Flag to prevent auto-override
-                    # Save with update_fields to ensure marks_awarded is preserved
-                    answer.save(update_fields=['marks_awarded', 'is_correct', 'updated_at'])
+                    elif answer.selected_option:
+                        # Same as Answer.save(): choice answers follow the option
+                        answer.is_correct = answer.selected_option.is_correct
+                    answer.is_manually_marked = True
+                    answer.updated_at = now
+                    to_update.append(answer)
                     
                     updated_answers.append({
                         'answer_id': answer.id,
@@ -1459,53 +1534,17 @@ def bulk_mark_answers(request):
                         'is_correct': answer.is_correct
                     })
                     
-                except Answer.DoesNotExist:
-                    failed_updates.append({'answer_id': answer_id, 'error': 'Answer not found'})
                 except Exception as e:
                     failed_updates.append({'answer_id': answer_id, 'error': str(e)})
             
-            # Recalculate scores for all affected attempts
-            attempt_ids = set()
-            for answer_data in answers_data:
-                try:
-                    answer = Answer.objects.get(id=answer_data.get('answer_id'))
-                    attempt_ids.add(answer.attempt.id)
-                except:
-                    pass
+            Answer.objects.bulk_update(
+                to_update, ['marks_awarded', 'is_correct', 'is_manually_marked', 'updated_at'], batch_size=500
+            )
             
-            for attempt_id in attempt_ids:
-                attempt = ExamAttempt.objects.get(id=attempt_id)
-                total_marks = Answer.objects.filter(attempt=attempt).aggregate(
-                    total=Sum('marks_awarded')
-                )['total'] or 0.0
-                attempt.score = float(total_marks)
-                
-                # Recalculate percentage score
-                if attempt.exam.total_marks > 0:
-                    attempt.percentage_score = (attempt.score / attempt.exam.total_marks) * 100
-                else:
-                    attempt.percentage_score = 0.0
-                
-                # Recalculate correct/wrong answers count
-                correct_count = Answer.objects.filter(attempt=attempt, is_correct=True).count()
-                wrong_count = Answer.objects.filter(attempt=attempt, is_correct=False).exclude(marks_awarded__isnull=True).count()
-                attempt.correct_answers = correct_count
-                attempt.wrong_answers = wrong_count
-                
-                # Check if passed
-                attempt.is_passed = attempt.percentage_score >= attempt.exam.passing_marks if attempt.exam.total_marks > 0 else False
-                
-                # Check if all manual marking questions are marked
-                manual_marking_questions = Answer.objects.filter(
-                    attempt=attempt,
-                    question__question_type__in=['SA', 'TEXT', 'IMAGE_UPLOAD']
-                )
-                all_manual_marked = all(
-                    ans.marks_awarded is not None 
-                    for ans in manual_marking_questions
-                )
-                attempt.results_ready = all_manual_marked
-                attempt.save()
+            # Recalculate scores for all affected attempts
+            recalculate_attempt_scores(
+                [answer.attempt_id for answer in to_update], update_results_ready=True
+            )
         
         return Response({
             'message': f'Bulk update completed: {len(updated_answers)} updated, {len(failed_updates)} failed',
@@ -1520,6 +1559,129 @@ def bulk_mark_answers(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def question_marking_queue(request, question_id):
+    """
+    Unmarked answers of a question grouped by normalized answer text
+    Largest groups come first; pass next_cursor back as ?cursor= for the
+    next page.
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        question = get_object_or_404(Question, id=question_id)
+        try:
+            limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+        except ValueError:
+            limit = 50
+        
+        return Response(marking_queue(question, cursor=request.GET.get('cursor'), limit=limit))
+    except MarkingError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error loading marking queue: {e}")
+        traceback.print_exc()
+        return Response(
+            {'error': f'Internal server error: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_answer_cluster(request, question_id):
+    """
+    Apply the same marks to a group from the marking queue
+    Body: marks_awarded plus either key (queue group) or answer_ids;
+    is_correct is optional and defaults to marks_awarded > 0.
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        question = get_object_or_404(Question, id=question_id)
+        marks_awarded = request.data.get('marks_awarded')
+        if marks_awarded is None:
+            return Response({'error': 'marks_awarded is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        answer_ids = request.data.get('answer_ids')
+        if answer_ids is not None and not isinstance(answer_ids, list):
+            return Response({'error': 'answer_ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        marked, attempts = mark_answer_group(
+            question,
+            marks_awarded,
+            key=request.data.get('key'),
+            answer_ids=answer_ids,
+            is_correct=request.data.get('is_correct'),
+        )
+        
+        return Response({
+            'message': f'Marked {marked} answers across {len(attempts)} attempts',
+            'marked': marked,
+            'attempts': [
+                {
+                    'attempt_id': attempt.id,
+                    'score': attempt.score,
+                    'percentage_score': attempt.percentage_score,
+                    'results_ready': attempt.results_ready,
+                }
+                for attempt in attempts.values()
+            ],
+        })
+    except MarkingError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error marking answer cluster: {e}")
+        traceback.print_exc()
+        return Response(
+            {'error': f'Internal server error: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def exam_answer_clusters(request, exam_id):
+    """
+    Near-duplicate clusters of SA/TEXT answers for marking
+    Each cluster's answer_ids can be marked together via bulk-mark; long
+    clusters are flagged as possible copy-paste.
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        try:
+            question_id = request.GET.get('question_id')
+            question_id = int(question_id) if question_id else None
+            min_size = max(int(request.GET.get('min_size', 2)), 2)
+        except ValueError:
+            return Response({'error': 'question_id and min_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        questions = answer_clusters(exam, question_id=question_id, min_size=min_size)
+        return Response({
+            'exam_id': exam.id,
+            'exam_title': exam.title,
+            'questions': questions,
+            'total_clusters': sum(len(question['clusters']) for question in questions),
+            'suspected_copies': sum(
+                1 for question in questions for cluster in question['clusters'] if cluster['suspected_copy']
+            ),
+        })
+    except Exception as e:
+        print(f"Error clustering answers: {e}")
+        traceback.print_exc()
+        return Response(
+            {'error': f'Internal server error: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
@@ -1634,74 +1796,27 @@ def exam_analytics(request, exam_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         exam = get_object_or_404(Exam, id=exam_id)
-        attempts = ExamAttempt.objects.filter(exam=exam, status='COMPLETED')
-        
-        # Basic stats
-        total_attempts = attempts.count()
-        total_students = attempts.values('user').distinct().count()
-        
-        # Score statistics
-        scores = [a.score for a in attempts if a.score is not None]
-        avg_score = sum(scores) / len(scores) if scores else 0
-        max_score = max(scores) if scores else 0
-        min_score = min(scores) if scores else 0
-        
-        # Question-wise statistics
-        question_stats = []
-        for question in exam.questions.all():
-            question_answers = Answer.objects.filter(question=question, attempt__exam=exam)
-            total_answered = question_answers.count()
-            correct_count = question_answers.filter(is_correct=True).count()
-            avg_marks = question_answers.aggregate(
-                avg=Avg('marks_awarded')
-            )['avg'] or 0
-            
-            question_stats.append({
-                'question_id': question.id,
-                'question_text': question.question_text[:50],
-                'question_type': question.question_type,
-                'total_answered': total_answered,
-                'correct_count': correct_count,
-                'accuracy': (correct_count / total_answered * 100) if total_answered > 0 else 0,
-                'average_marks': float(avg_marks),
-                'max_marks': float(question.marks)
-            })
         
-        # Time statistics
-        durations = []
-        for attempt in attempts:
-            if attempt.start_time and attempt.end_time:
-                duration = (attempt.end_time - attempt.start_time).total_seconds() / 60
-                durations.append(duration)
-        
-        avg_duration = sum(durations) / len(durations) if durations else 0
-        
-        # Grade distribution
-        grade_distribution = {
-            'A': len([s for s in scores if s >= exam.total_marks * 0.9]),
-            'B': len([s for s in scores if exam.total_marks * 0.8 <= s < exam.total_marks * 0.9]),
-            'C': len([s for s in scores if exam.total_marks * 0.7 <= s < exam.total_marks * 0.8]),
-            'D': len([s for s in scores if exam.total_marks * 0.6 <= s < exam.total_marks * 0.7]),
-            'F': len([s for s in scores if s < exam.total_marks * 0.6])
-        }
+        summary = attempt_summary(exam)
+        question_stats = question_statistics(exam)
         
         return Response({
             'exam_id': exam.id,
             'exam_title': exam.title,
-            'total_attempts': total_attempts,
-            'total_students': total_students,
+            'total_attempts': summary['total_attempts'],
+            'total_students': summary['total_students'],
             'score_statistics': {
-                'average': float(avg_score),
-                'maximum': float(max_score),
-                'minimum': float(min_score),
+                'average': float(summary['average_score']),
+                'maximum': float(summary['maximum_score']),
+                'minimum': float(summary['minimum_score']),
                 'total_marks': float(exam.total_marks)
             },
             'question_statistics': question_stats,
             'time_statistics': {
-                'average_duration_minutes': float(avg_duration),
+                'average_duration_minutes': float(summary['average_duration_minutes']),
                 'exam_duration_minutes': exam.duration_minutes
             },
-            'grade_distribution': grade_distribution
+            'grade_distribution': summary['grade_distribution']
         })
         
     except Exception as e:
@@ -1785,6 +1900,8 @@ def recalculate_exam_scores(request, exam_id):
                 
                 if old_score != attempt.score:
                     updated_count += 1
+            
+            invalidate_exam_stats(exam.id)
         
         return Response({
             'message': f'Recalculated scores for {updated_count} attempts',
@@ -1841,6 +1958,174 @@ def release_results(request, attempt_id):
         )
 
 
+def _flag(request, name):
+    return str(request.data.get(name, False)).lower() in ('true', '1', 'yes')
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def release_exam_results(request, exam_id):
+    """Release the results of all completed attempts of an exam at once.
+    Fails with 409 while manual marking is incomplete, unless `skip_unmarked`
+    is true (attempts still being marked then stay unreleased). With
+    `send_emails` true, results emails are queued for every released attempt
+    not emailed yet.
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        try:
+            released, skipped = release_attempts(
+                ExamAttempt.objects.filter(exam=exam),
+                request.user,
+                description='Admin released results for the whole exam',
+                skip_unmarked=_flag(request, 'skip_unmarked'),
+            )
+        except ReleaseError as e:
+            return Response({
+                'error': str(e),
+                'unmarked_attempts': e.unmarked_attempts,
+                'unmarked_answers': e.unmarked_answers,
+            }, status=status.HTTP_409_CONFLICT)
+        
+        response = {
+            'message': f'Results released for {len(released)} attempt(s)',
+            'released': len(released),
+            'skipped_unmarked': skipped,
+        }
+        if _flag(request, 'send_emails'):
+            with transaction.atomic():
+                response['emails'] = queue_result_emails(
+                    released_attempts(exam).select_related('user', 'exam').order_by('id'),
+                    created_by=request.user
+                )
+        return Response(response, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Error releasing exam results: {e}")
+        traceback.print_exc()
+        return Response(
+            {'error': f'Internal server error: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def unrelease_exam_results(request, exam_id):
+    """Withdraw the released results of all attempts of an exam at once"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        unreleased = unrelease_attempts(
+            ExamAttempt.objects.filter(exam=exam),
+            request.user,
+            description='Admin withdrew results for the whole exam',
+        )
+        
+        return Response({
+            'message': f'Results withdrawn for {len(unreleased)} attempt(s)',
+            'unreleased': len(unreleased),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Error unreleasing exam results: {e}")
+        traceback.print_exc()
+        return Response(
+            {'error': f'Internal server error: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _id_list(value):
+    """A list from a JSON array or a comma separated string"""
+    if value in (None, ''):
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+
+@api_view(['GET', 'POST', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def exam_enrollments(request, exam_id):
+    """
+    List (GET), add (POST) or remove (DELETE) the students enrolled in an exam
+    GET is keyset paginated (?cursor=, ?limit=) and searchable (?search=
+    username, email or name). POST and DELETE take `user_ids` and/or
+    `usernames`; POST also accepts `require_enrollment` to restrict the exam
+    to enrolled students. PATCH sets `enrollment_required` to true or false
+    without changing the enrolled students.
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        if request.method == 'GET':
+            try:
+                enrollments = filter_queryset(
+                    ExamEnrollment.objects.filter(exam=exam).select_related('user', 'enrolled_by'),
+                    request.GET,
+                    search_fields=('user__username', 'user__email', 'user__first_name', 'user__last_name'),
+                )
+                enrollments, next_cursor = paginate(enrollments, request.GET, ('-id',))
+            except PaginationError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return page_response(request, [enrollment_data(enrollment) for enrollment in enrollments], next_cursor)
+        
+        if request.method == 'PATCH':
+            if 'enrollment_required' not in request.data:
+                return Response({'error': 'enrollment_required is required'}, status=status.HTTP_400_BAD_REQUEST)
+            exam.enrollment_required = _flag(request, 'enrollment_required')
+            Exam.objects.filter(pk=exam.pk).update(enrollment_required=exam.enrollment_required)
+            return Response({
+                'message': 'Exam restricted to enrolled students' if exam.enrollment_required else 'Exam open to all students',
+                'enrollment_required': exam.enrollment_required,
+                'total_enrolled': ExamEnrollment.objects.filter(exam=exam).count(),
+            })
+        
+        try:
+            user_ids, unknown = resolve_user_ids(_id_list(request.data.get('user_ids')), _id_list(request.data.get('usernames')))
+        except (TypeError, ValueError):
+            return Response({'error': 'user_ids must be user ids'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.method == 'DELETE':
+            removed = unenroll_users(exam, user_ids)
+            return Response({
+                'message': f'Removed {removed} enrolment(s)',
+                'removed': removed,
+                'unknown': unknown,
+            })
+        
+        with transaction.atomic():
+            added = enroll_users(exam, user_ids, enrolled_by=request.user)
+            if _flag(request, 'require_enrollment') and not exam.enrollment_required:
+                exam.enrollment_required = True
+                Exam.objects.filter(pk=exam.pk).update(enrollment_required=True)
+        return Response({
+            'message': f'Enrolled {added} student(s)',
+            'enrolled': added,
+            'already_enrolled': len(user_ids) - added,
+            'unknown': unknown,
+            'enrollment_required': exam.enrollment_required,
+            'total_enrolled': ExamEnrollment.objects.filter(exam=exam).count(),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Error in exam_enrollments: {e}")
+        traceback.print_exc()
+        return Response(
+            {'error': f'Internal server error: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def restart_exam_attempt(request, attempt_id):
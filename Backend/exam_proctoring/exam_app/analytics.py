@@ -0,0 +1,160 @@
+# backend/exam_app/analytics.py
+"""
+Shared analytics queries for exams
+Statistics are read from the materialized ExamScoreStats/ExamQuestionStats
+tables (see exam_stats.py), so an analytics request costs O(questions) rows
+however many attempts the exam has. Only completed attempts are counted.
+Per-student summaries are cached and dropped whenever one of the student's
+attempts is saved or deleted (see signals.py).
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+from .exam_stats import GRADES, PERCENTAGE_BUCKETS, ensure_exam_stats
+from .models import ExamAttempt
+
+# Safety net for changes that bypass the attempt signals (e.g. exam renames)
+STUDENT_PERFORMANCE_CACHE_TIMEOUT = 10 * 60
+
+
+def question_statistics(exam):
+    """
+    Answer counts, correct counts and average marks for every question
+    of the exam
+    """
+    ensure_exam_stats(exam)
+    questions = exam.questions.select_related('stats').order_by('order', 'id')
+
+    stats = []
+    for question in questions:
+        question_stats = getattr(question, 'stats', None)
+        total_answered = question_stats.answered_count if question_stats else 0
+        correct_count = question_stats.correct_count if question_stats else 0
+        average_marks = (
+            question_stats.marks_sum / question_stats.marked_count
+            if question_stats and question_stats.marked_count else 0
+        )
+        stats.append({
+            'question_id': question.id,
+            'question_text': question.question_text[:50],
+            'question_type': question.question_type,
+            'total_answered': total_answered,
+            'correct_count': correct_count,
+            'accuracy': (correct_count / total_answered * 100) if total_answered > 0 else 0,
+            'average_marks': float(average_marks),
+            'max_marks': float(question.marks),
+        })
+    return stats
+
+
+def attempt_summary(exam):
+    """
+    Summary of the exam's completed attempts
+
+    Returns counts, score statistics, pass count, average duration in
+    minutes, the grade distribution (by fraction of total marks) and the
+    percentage score distribution used by reports.
+    """
+    score_stats = ensure_exam_stats(exam)
+    attempt_count = score_stats.attempt_count
+
+    return {
+        'total_attempts': attempt_count,
+        # Attempts are unique per user and exam
+        'total_students': attempt_count,
+        'passed': score_stats.passed_count,
+        'pass_rate': (score_stats.passed_count / attempt_count * 100) if attempt_count else 0,
+        'average_score': (score_stats.score_sum / score_stats.scored_count) if score_stats.scored_count else 0,
+        'maximum_score': score_stats.score_max or 0,
+        'minimum_score': score_stats.score_min or 0,
+        'average_duration_minutes': (
+            score_stats.duration_sum_seconds / score_stats.duration_count / 60
+            if score_stats.duration_count else 0
+        ),
+        'grade_distribution': {
+            grade: score_stats.grade_distribution.get(grade, 0) for grade in GRADES
+        },
+        'score_distribution': {
+            label: score_stats.score_distribution.get(label, 0) for label, _, _ in PERCENTAGE_BUCKETS
+        },
+    }
+
+
+def _performance_cache_key(user_id):
+    return f'student_performance_{user_id}'
+
+
+def _attempt_brief(attempt):
+    return {
+        'exam_title': attempt.exam.title,
+        'score': attempt.score,
+        'percentage': attempt.percentage_score,
+    }
+
+
+def student_performance_summary(user_id):
+    """
+    Performance summary for one student, cached until one of their
+    attempts changes
+
+    Built from one aggregate over the user's attempts and one windowed query
+    that picks the last 10 completed attempts plus the best and worst.
+    """
+    cache_key = _performance_cache_key(user_id)
+    summary = cache.get(cache_key)
+    if summary is not None:
+        return summary
+
+    completed = Q(status='COMPLETED')
+    totals = ExamAttempt.objects.filter(user_id=user_id).aggregate(
+        total_attempts=Count('id'),
+        completed_exams=Count('id', filter=completed),
+        average_score=Avg('score', filter=completed),
+        average_percentage=Avg('percentage_score', filter=completed),
+        total_score=Sum('score', filter=completed),
+        total_passed=Count('id', filter=completed & Q(is_passed=True)),
+        total_failed=Count('id', filter=completed & Q(is_passed=False)),
+    )
+
+    ranked = ExamAttempt.objects.filter(user_id=user_id, status='COMPLETED').annotate(
+        recent_rank=Window(RowNumber(), order_by=[F('start_time').desc(), F('id').desc()]),
+        best_rank=Window(RowNumber(), order_by=[F('percentage_score').desc(nulls_last=True), F('id').asc()]),
+        worst_rank=Window(RowNumber(), order_by=[F('percentage_score').asc(nulls_last=True), F('id').asc()]),
+    ).filter(
+        Q(recent_rank__lte=10) | Q(best_rank=1) | Q(worst_rank=1)
+    ).select_related('exam').only(
+        'id', 'score', 'percentage_score', 'start_time', 'exam__title'
+    )
+
+    recent = []
+    best = worst = None
+    for attempt in ranked:
+        if attempt.recent_rank <= 10:
+            recent.append(attempt)
+        if attempt.best_rank == 1:
+            best = attempt
+        if attempt.worst_rank == 1:
+            worst = attempt
+    recent.sort(key=lambda attempt: attempt.recent_rank, reverse=True)
+
+    summary = {
+        'total_attempts': totals['total_attempts'],
+        'completed_exams': totals['completed_exams'],
+        'average_score': totals['average_score'] or 0,
+        'average_percentage': totals['average_percentage'] or 0,
+        'total_score': totals['total_score'] or 0,
+        'total_passed': totals['total_passed'],
+        'total_failed': totals['total_failed'],
+        'performance_trend': [
+            dict(_attempt_brief(attempt), date=attempt.start_time.isoformat() if attempt.start_time else None)
+            for attempt in recent
+        ],
+        'best_performance': _attempt_brief(best) if best else None,
+        'worst_performance': _attempt_brief(worst) if worst else None,
+    }
+    cache.set(cache_key, summary, STUDENT_PERFORMANCE_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_student_performance(*user_ids):
+    cache.delete_many([_performance_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,128 @@
+# backend/exam_app/background.py
+"""
+Shared in-process worker pool for background jobs
+Jobs (question imports, collusion scans, ...) are queued when the current
+transaction commits and run on a small thread pool with their own database
+connection. Setting BACKGROUND_JOB_WORKERS to 0 runs them inline instead,
+which is handy for development and tests.
+
+Jobs die with the process that runs them. Job rows therefore carry a
+heartbeat, refreshed while a worker runs the job; fail_stale_jobs() marks
+PENDING or RUNNING rows whose heartbeat (or, never started, creation) is
+older than BACKGROUND_JOB_STALE_TIMEOUT as FAILED, so a lost job does not
+block its exam forever.
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Seconds between heartbeats of a running job
+HEARTBEAT_INTERVAL = 60
+
+STALE_JOB_MESSAGE = 'The job stopped when its worker process did; please start it again'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_JOB_WORKERS,
+                thread_name_prefix='background-job'
+            )
+        return _executor
+
+
+def _run(func, args):
+    """Thread pool entry point, manages the worker's DB connection"""
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception as e:
+        print(f"Error in background job {func.__name__}: {e}")
+        traceback.print_exc()
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args):
+    """Run func(*args) on the worker pool once the current transaction commits"""
+    if settings.BACKGROUND_JOB_WORKERS <= 0:
+        transaction.on_commit(lambda: func(*args))
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args))
+
+
+def claim_job(job):
+    """
+    Move a PENDING job to RUNNING; returns False when it is no longer
+    pending (run elsewhere, or failed as stale while it waited)
+    """
+    now = timezone.now()
+    claimed = type(job).objects.filter(pk=job.pk, status='PENDING').update(
+        status='RUNNING', started_at=now, heartbeat_at=now
+    )
+    if claimed:
+        job.status, job.started_at, job.heartbeat_at = 'RUNNING', now, now
+    return bool(claimed)
+
+
+@contextmanager
+def heartbeat(job):
+    """Refresh job.heartbeat_at every HEARTBEAT_INTERVAL seconds while the block runs"""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                # A failed beat (e.g. SQLite locked by the job's own write) is
+                # retried on the next tick rather than ending the heartbeat
+                try:
+                    type(job).objects.filter(pk=job.pk).update(heartbeat_at=timezone.now())
+                except Exception as e:
+                    print(f"Error in heartbeat of {type(job).__name__} {job.pk}: {e}")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name='background-job-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def fail_stale_jobs(jobs):
+    """
+    Mark the jobs of a queryset whose worker is gone as FAILED, deleting
+    their file if they have one; returns the failed jobs
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.BACKGROUND_JOB_STALE_TIMEOUT)
+    stale = jobs.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff),
+        status__in=['PENDING', 'RUNNING'],
+    )
+    failed = []
+    for job in stale:
+        # Conditional: a job that beat or finished meanwhile is left alone
+        updated = type(job).objects.filter(pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at).update(
+            status='FAILED', message=STALE_JOB_MESSAGE, finished_at=timezone.now()
+        )
+        if not updated:
+            continue
+        job_file = getattr(job, 'file', None)
+        if job_file:
+            job_file.delete(save=False)
+            type(job).objects.filter(pk=job.pk).update(file='')
+        failed.append(job)
+    return failed
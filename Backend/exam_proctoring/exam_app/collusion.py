@@ -0,0 +1,272 @@
+# backend/exam_app/collusion.py
+"""
+Answer-pattern collusion detection
+The selected options of every completed attempt are loaded with one query,
+read from the cursor in chunks, into an attempt x option indicator matrix of
+wrong choices. Identical wrong answers for all pairs of attempts are a
+matrix product, computed one block of rows at a time against the upper
+triangle so memory stays at O(block x candidates). Each block's pairs over
+the threshold are compared in bulk for differing answers and scored by the
+Harpp-Hogan error-similarity index (identical wrong answers / differences);
+only the best `limit` flagged pairs so far are carried to the next block, so
+memory does not grow with the number of suspicious pairs.
+"""
+import traceback
+from itertools import chain
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import timezone
+from .background import claim_job, heartbeat, run_in_background
+from .models import Answer, CollusionPair, CollusionScan
+
+# Optional imports for collusion detection
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+CHOICE_TYPES = ('MCQ', 'TF')
+
+# Rows of the wrong-answer matrix multiplied at a time
+BLOCK_SIZE = 1024
+
+# Candidate pairs compared per vectorized step
+PAIR_CHUNK_SIZE = 50000
+
+# Answer rows read from the cursor at a time
+FETCH_SIZE = 10000
+
+# Pairs are flagged once they share this many wrong answers and reach the
+# index below (Harpp-Hogan flag pairs with a ratio of 1 or more)
+DEFAULT_MIN_SHARED_WRONG = 5
+MIN_SIMILARITY_INDEX = 1.0
+
+# Flagged pairs stored per scan, best ranked first
+MAX_STORED_PAIRS = 1000
+
+
+def _choice_rows(exam):
+    """
+    Fetch (attempt_id, question_id, option_id, option_is_correct) for every
+    choice answer of a completed attempt as one flat integer array
+    """
+    queryset = Answer.objects.filter(
+        attempt__exam=exam,
+        attempt__status='COMPLETED',
+        question__question_type__in=CHOICE_TYPES,
+        selected_option__isnull=False,
+    ).values_list(
+        'attempt_id',
+        'question_id',
+        'selected_option_id',
+        Case(When(selected_option__is_correct=True, then=Value(1)), default=Value(0), output_field=IntegerField()),
+    )
+    sql, params = queryset.query.sql_with_params()
+    chunks = []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 4)
+            chunks.append(flat.reshape(len(rows), 4))
+    if not chunks:
+        return np.empty((0, 4), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def _compare_pairs(selected, wrong, first, second):
+    """Both-wrong and difference counts for candidate pairs, in chunks"""
+    both_wrong = np.empty(len(first), dtype=np.int64)
+    differences = np.empty(len(first), dtype=np.int64)
+    for start in range(0, len(first), PAIR_CHUNK_SIZE):
+        stop = start + PAIR_CHUNK_SIZE
+        a, b = selected[first[start:stop]], selected[second[start:stop]]
+        both_wrong[start:stop] = (wrong[first[start:stop]] & wrong[second[start:stop]]).sum(axis=1)
+        differences[start:stop] = ((a > 0) & (b > 0) & (a != b)).sum(axis=1)
+    return both_wrong, differences
+
+
+def find_suspicious_pairs(exam, min_shared_wrong=DEFAULT_MIN_SHARED_WRONG, limit=MAX_STORED_PAIRS):
+    """
+    Compare the answer patterns of all completed attempts of an exam
+
+    Returns the candidate and question counts, the number of flagged pairs
+    and the top `limit` flagged pairs ranked by similarity index. Raises
+    RuntimeError if NumPy is not installed.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("Collusion detection requires numpy. Install it with: pip install numpy")
+
+    result = {'candidates': 0, 'questions': 0, 'flagged_count': 0, 'pairs': []}
+    rows = _choice_rows(exam)
+    if len(rows) == 0:
+        return result
+
+    attempt_ids, row_idx = np.unique(rows[:, 0], return_inverse=True)
+    question_ids, col_idx = np.unique(rows[:, 1], return_inverse=True)
+    n, k = len(attempt_ids), len(question_ids)
+    result['candidates'], result['questions'] = n, k
+
+    # Attempt x question: selected option id (0 = unanswered) and wrong flag
+    selected = np.zeros((n, k), dtype=np.int64)
+    selected[row_idx, col_idx] = rows[:, 2]
+    wrong = np.zeros((n, k), dtype=bool)
+    wrong[row_idx, col_idx] = rows[:, 3] == 0
+
+    # Attempt x wrong option indicator; float32 products are exact here
+    is_wrong = rows[:, 3] == 0
+    _, wrong_option_idx = np.unique(rows[is_wrong, 2], return_inverse=True)
+    wrong_options = np.zeros((n, wrong_option_idx.max() + 1 if len(wrong_option_idx) else 1), dtype=np.float32)
+    wrong_options[row_idx[is_wrong], wrong_option_idx] = 1
+
+    # Best flagged pairs so far: first, second, shared, both_wrong, differences, index
+    top = [np.empty(0, dtype=np.int64)] * 5 + [np.empty(0, dtype=np.float64)]
+    for start in range(0, n, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, n)
+        # Only columns from `start` on: the lower triangle repeats pairs
+        block = wrong_options[start:stop] @ wrong_options[start:].T
+        block_rows, block_cols = np.nonzero(block >= min_shared_wrong)
+        upper = block_cols > block_rows
+        block_rows, block_cols = block_rows[upper], block_cols[upper]
+        first, second = block_rows + start, block_cols + start
+        shared = block[block_rows, block_cols].astype(np.int64)
+        del block
+
+        both_wrong, differences = _compare_pairs(selected, wrong, first, second)
+        index = shared / np.maximum(differences, 1)
+        flagged = index >= MIN_SIMILARITY_INDEX
+        result['flagged_count'] += int(flagged.sum())
+
+        # Earlier blocks first, so ties keep the order of a single global sort
+        top = [
+            np.concatenate((kept, new[flagged]))
+            for kept, new in zip(top, (first, second, shared, both_wrong, differences, index))
+        ]
+        order = np.lexsort((top[4], -top[2], -top[5]))[:limit]
+        top = [values[order] for values in top]
+
+    first, second, shared, both_wrong, differences, index = top
+    result['pairs'] = [
+        {
+            'attempt_a_id': int(attempt_ids[first[i]]),
+            'attempt_b_id': int(attempt_ids[second[i]]),
+            'shared_wrong': int(shared[i]),
+            'both_wrong': int(both_wrong[i]),
+            'differences': int(differences[i]),
+            'similarity_index': round(float(index[i]), 4),
+        }
+        for i in range(len(first))
+    ]
+    return result
+
+
+def collusion_pair_data(pair):
+    return {
+        'rank': pair.rank,
+        'attempt_a': {
+            'attempt_id': pair.attempt_a_id,
+            'student_name': pair.attempt_a.user.username,
+            'score': pair.attempt_a.score,
+        },
+        'attempt_b': {
+            'attempt_id': pair.attempt_b_id,
+            'student_name': pair.attempt_b.user.username,
+            'score': pair.attempt_b.score,
+        },
+        'shared_wrong': pair.shared_wrong,
+        'both_wrong': pair.both_wrong,
+        'differences': pair.differences,
+        'similarity_index': pair.similarity_index,
+    }
+
+
+def collusion_scan_data(scan, pair_limit=None):
+    """Serialize a scan, with its top pairs when `pair_limit` is given"""
+    data = {
+        'id': scan.id,
+        'exam_id': scan.exam_id,
+        'status': scan.status,
+        'min_shared_wrong': scan.min_shared_wrong,
+        'candidates': scan.candidates,
+        'questions': scan.questions,
+        'flagged_count': scan.flagged_count,
+        'message': scan.message,
+        'created_at': scan.created_at.isoformat() if scan.created_at else None,
+        'started_at': scan.started_at.isoformat() if scan.started_at else None,
+        'finished_at': scan.finished_at.isoformat() if scan.finished_at else None,
+    }
+    if pair_limit is not None:
+        pairs = scan.pairs.select_related('attempt_a__user', 'attempt_b__user')[:pair_limit]
+        data['pairs'] = [collusion_pair_data(pair) for pair in pairs]
+    return data
+
+
+def attempt_collusion_flags(attempt):
+    """Pairs involving an attempt from the latest completed scan of its exam"""
+    scan = CollusionScan.objects.filter(exam_id=attempt.exam_id, status='COMPLETED').first()
+    if scan is None:
+        return None
+    pairs = scan.pairs.filter(
+        Q(attempt_a=attempt) | Q(attempt_b=attempt)
+    ).select_related('attempt_a__user', 'attempt_b__user')
+    flags = []
+    for pair in pairs:
+        other = pair.attempt_b if pair.attempt_a_id == attempt.id else pair.attempt_a
+        flags.append({
+            'rank': pair.rank,
+            'other_attempt_id': other.id,
+            'other_student_name': other.user.username,
+            'shared_wrong': pair.shared_wrong,
+            'both_wrong': pair.both_wrong,
+            'differences': pair.differences,
+            'similarity_index': pair.similarity_index,
+        })
+    return {
+        'scan_id': scan.id,
+        'scanned_at': scan.finished_at.isoformat() if scan.finished_at else None,
+        'pairs': flags,
+    }
+
+
+def _save(scan, **fields):
+    for field, value in fields.items():
+        setattr(scan, field, value)
+    CollusionScan.objects.filter(pk=scan.pk).update(**fields)
+
+
+def execute_collusion_scan(scan_id):
+    """Run a collusion scan in the current thread"""
+    scan = CollusionScan.objects.select_related('exam').get(pk=scan_id)
+    if not claim_job(scan):
+        return
+
+    try:
+        with heartbeat(scan):
+            result = find_suspicious_pairs(scan.exam, scan.min_shared_wrong)
+        with transaction.atomic():
+            CollusionPair.objects.bulk_create([
+                CollusionPair(scan=scan, rank=rank, **pair)
+                for rank, pair in enumerate(result['pairs'], start=1)
+            ], batch_size=500)
+            _save(
+                scan,
+                status='COMPLETED',
+                candidates=result['candidates'],
+                questions=result['questions'],
+                flagged_count=result['flagged_count'],
+                message=f'{result["flagged_count"]} suspicious pairs among {result["candidates"]} attempts',
+                finished_at=timezone.now(),
+            )
+    except Exception as e:
+        print(f"Error in collusion scan {scan.id}: {e}")
+        traceback.print_exc()
+        _save(scan, status='FAILED', message=f'Error scanning attempts: {str(e)}', finished_at=timezone.now())
+
+
+def start_collusion_scan(scan):
+    """Queue a saved scan once the current transaction commits"""
+    run_in_background(execute_collusion_scan, scan.id)
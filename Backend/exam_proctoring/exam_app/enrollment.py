@@ -0,0 +1,77 @@
+# backend/exam_app/enrollment.py
+"""
+Exam enrolment
+Exams with enrollment_required are only visible to, and can only be
+started by, students with an ExamEnrollment row; other exams stay open to
+everyone. A student's exam list is one query: the open exams (served by the
+is_active/enrollment_required/end_time index) plus the exams in their
+enrolments (served by the user/exam index), however many exams and
+students the institution has.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from .models import ExamEnrollment
+
+User = get_user_model()
+
+
+def exams_for_student(exams, user):
+    """Narrow an Exam queryset to the exams `user` may see"""
+    return exams.filter(
+        Q(enrollment_required=False)
+        | Q(id__in=ExamEnrollment.objects.filter(user=user).values('exam_id'))
+    )
+
+
+def can_take_exam(exam, user):
+    return not exam.enrollment_required or ExamEnrollment.objects.filter(exam=exam, user=user).exists()
+
+
+def resolve_user_ids(user_ids=(), usernames=()):
+    """
+    Ids of the users given by id and/or username (one IN query each);
+    returns (ids, unknown) where unknown lists the ones that do not exist
+    """
+    ids = set()
+    unknown = []
+    if user_ids:
+        wanted = {int(user_id) for user_id in user_ids}
+        found = set(User.objects.filter(id__in=wanted).values_list('id', flat=True))
+        ids |= found
+        unknown += sorted(wanted - found)
+    if usernames:
+        wanted = {str(username) for username in usernames}
+        found = dict(User.objects.filter(username__in=wanted).values_list('username', 'id'))
+        ids |= set(found.values())
+        unknown += sorted(wanted - set(found))
+    return ids, unknown
+
+
+def enroll_users(exam, user_ids, enrolled_by=None):
+    """Enrol users in an exam, skipping existing enrolments; returns how many were added"""
+    existing = set(ExamEnrollment.objects.filter(exam=exam, user_id__in=user_ids).values_list('user_id', flat=True))
+    new_ids = [user_id for user_id in user_ids if user_id not in existing]
+    ExamEnrollment.objects.bulk_create([
+        ExamEnrollment(exam=exam, user_id=user_id, enrolled_by=enrolled_by)
+        for user_id in new_ids
+    ], batch_size=1000, ignore_conflicts=True)
+    return len(new_ids)
+
+
+def unenroll_users(exam, user_ids):
+    """Remove enrolments; returns how many were removed"""
+    deleted, _ = ExamEnrollment.objects.filter(exam=exam, user_id__in=user_ids).delete()
+    return deleted
+
+
+def enrollment_data(enrollment):
+    user = enrollment.user
+    return {
+        'id': enrollment.id,
+        'user_id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'full_name': f'{user.first_name} {user.last_name}'.strip(),
+        'enrolled_by': enrollment.enrolled_by.username if enrollment.enrolled_by else None,
+        'created_at': enrollment.created_at.isoformat() if enrollment.created_at else None,
+    }
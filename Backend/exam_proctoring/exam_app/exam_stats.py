@@ -0,0 +1,247 @@
+# backend/exam_app/exam_stats.py
+"""
+Materialized exam analytics
+ExamScoreStats and ExamQuestionStats keep running totals over the completed
+attempts of each exam. Every attempt stores what it last contributed in an
+AttemptStatsSnapshot, so after a submission or re-mark only the difference
+is applied. Changes that touch many attempts mark the exam stale instead and
+the stats are rebuilt from scratch on the next read.
+"""
+from django.db import transaction
+from django.db.models import Max, Min
+from .models import Answer, AttemptStatsSnapshot, ExamAttempt, ExamQuestionStats, ExamScoreStats
+
+# Grade letter -> minimum fraction of the exam's total marks
+GRADE_THRESHOLDS = [('A', 0.9), ('B', 0.8), ('C', 0.7), ('D', 0.6)]
+GRADES = [grade for grade, _ in GRADE_THRESHOLDS] + ['F']
+
+# Report bucket -> (min percentage, max percentage)
+PERCENTAGE_BUCKETS = [
+    ('90-100', 90, None),
+    ('80-89', 80, 90),
+    ('70-79', 70, 80),
+    ('60-69', 60, 70),
+    ('below_60', None, 60),
+]
+
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def grade_for_score(score, total_marks):
+    if score is None:
+        return None
+    for grade, fraction in GRADE_THRESHOLDS:
+        if score >= total_marks * fraction:
+            return grade
+    return 'F'
+
+
+def percentage_bucket(percentage):
+    if percentage is None:
+        return None
+    for label, low, high in PERCENTAGE_BUCKETS:
+        if (low is None or percentage >= low) and (high is None or percentage < high):
+            return label
+    return None
+
+
+def _contribution(attempt, answers, total_marks):
+    """Stats contribution of one attempt; empty unless it is completed"""
+    if attempt.status != 'COMPLETED':
+        return {}
+    duration = None
+    if attempt.start_time and attempt.end_time:
+        duration = (attempt.end_time - attempt.start_time).total_seconds()
+    return {
+        'score': attempt.score,
+        'passed': attempt.is_passed is True,
+        'duration': duration,
+        'grade': grade_for_score(attempt.score, total_marks),
+        'bucket': percentage_bucket(attempt.percentage_score),
+        # question id -> [is_correct, marks_awarded]
+        'answers': {
+            str(question_id): [1 if is_correct else 0, marks_awarded]
+            for question_id, is_correct, marks_awarded in answers
+        },
+    }
+
+
+def _apply_score(score_stats, contribution, sign):
+    """Add (sign=1) or remove (sign=-1) an attempt's score contribution"""
+    if not contribution:
+        return False
+    score_stats.attempt_count += sign
+    if contribution['passed']:
+        score_stats.passed_count += sign
+    if contribution['duration'] is not None:
+        score_stats.duration_count += sign
+        score_stats.duration_sum_seconds += sign * contribution['duration']
+    for field, key in (('grade_distribution', 'grade'), ('score_distribution', 'bucket')):
+        label = contribution[key]
+        if label is not None:
+            counts = getattr(score_stats, field)
+            counts[label] = counts.get(label, 0) + sign
+            if not counts[label]:
+                # Same shape as a rebuild, which never stores empty buckets
+                del counts[label]
+
+    score = contribution['score']
+    if score is None:
+        return False
+    score_stats.scored_count += sign
+    score_stats.score_sum += sign * score
+    if sign > 0:
+        if score_stats.score_min is None or score < score_stats.score_min:
+            score_stats.score_min = score
+        if score_stats.score_max is None or score > score_stats.score_max:
+            score_stats.score_max = score
+        return False
+    # Removing the current minimum or maximum needs a fresh lookup
+    return score == score_stats.score_min or score == score_stats.score_max
+
+
+def _apply_answer(question_stats, entry, sign):
+    is_correct, marks_awarded = entry
+    question_stats.answered_count += sign
+    question_stats.correct_count += sign * is_correct
+    if marks_awarded is not None:
+        question_stats.marked_count += sign
+        question_stats.marks_sum += sign * marks_awarded
+
+
+def _reset(score_stats, total_marks):
+    score_stats.total_marks = total_marks
+    score_stats.attempt_count = 0
+    score_stats.passed_count = 0
+    score_stats.scored_count = 0
+    score_stats.score_sum = 0
+    score_stats.score_min = None
+    score_stats.score_max = None
+    score_stats.duration_count = 0
+    score_stats.duration_sum_seconds = 0
+    score_stats.grade_distribution = {}
+    score_stats.score_distribution = {}
+    score_stats.is_stale = False
+
+
+def rebuild_exam_stats(exam):
+    """Recompute an exam's materialized stats from its attempts and answers"""
+    with transaction.atomic():
+        score_stats, _ = ExamScoreStats.objects.select_for_update().get_or_create(exam=exam)
+        AttemptStatsSnapshot.objects.filter(attempt__exam=exam).delete()
+        ExamQuestionStats.objects.filter(exam=exam).delete()
+        _reset(score_stats, exam.total_marks)
+
+        answers_by_attempt = {}
+        answer_rows = Answer.objects.filter(
+            attempt__exam=exam, attempt__status='COMPLETED'
+        ).values_list('attempt_id', 'question_id', 'is_correct', 'marks_awarded')
+        for attempt_id, question_id, is_correct, marks_awarded in answer_rows.iterator(chunk_size=2000):
+            answers_by_attempt.setdefault(attempt_id, []).append((question_id, is_correct, marks_awarded))
+
+        question_stats = {}
+        snapshots = []
+        attempts = ExamAttempt.objects.filter(exam=exam, status='COMPLETED').only(
+            'id', 'status', 'score', 'percentage_score', 'is_passed', 'start_time', 'end_time'
+        )
+        for attempt in attempts.iterator(chunk_size=2000):
+            contribution = _contribution(attempt, answers_by_attempt.pop(attempt.id, ()), score_stats.total_marks)
+            _apply_score(score_stats, contribution, 1)
+            for question_id, entry in contribution['answers'].items():
+                stats = question_stats.get(question_id)
+                if stats is None:
+                    stats = question_stats[question_id] = ExamQuestionStats(exam=exam, question_id=int(question_id))
+                _apply_answer(stats, entry, 1)
+            snapshots.append(AttemptStatsSnapshot(attempt=attempt, data=contribution))
+            if len(snapshots) >= SNAPSHOT_BATCH_SIZE:
+                AttemptStatsSnapshot.objects.bulk_create(snapshots)
+                snapshots = []
+
+        AttemptStatsSnapshot.objects.bulk_create(snapshots)
+        ExamQuestionStats.objects.bulk_create(question_stats.values(), batch_size=SNAPSHOT_BATCH_SIZE)
+        score_stats.save()
+    return score_stats
+
+
+def ensure_exam_stats(exam):
+    """Return the exam's ExamScoreStats, rebuilding them if missing or stale"""
+    score_stats = ExamScoreStats.objects.filter(exam=exam).first()
+    if score_stats is None or score_stats.is_stale or score_stats.total_marks != exam.total_marks:
+        score_stats = rebuild_exam_stats(exam)
+    return score_stats
+
+
+def invalidate_exam_stats(exam_id):
+    """Have the exam's stats rebuilt on the next read"""
+    ExamScoreStats.objects.filter(exam_id=exam_id).update(is_stale=True)
+
+
+def refresh_attempt_stats(attempt):
+    """
+    Apply the change in one attempt's contribution to its exam's stats
+
+    Call after an attempt is submitted or any of its answers is re-marked.
+    Only questions whose answers changed since the last refresh are touched.
+    """
+    with transaction.atomic():
+        # The score stats row doubles as the per-exam lock
+        score_stats = ExamScoreStats.objects.select_for_update().filter(exam_id=attempt.exam_id).first()
+        if score_stats is None:
+            # First write for this exam: build everything on the next read
+            ExamScoreStats.objects.get_or_create(exam_id=attempt.exam_id, defaults={'is_stale': True})
+            return
+        if score_stats.is_stale:
+            return
+
+        snapshot = AttemptStatsSnapshot.objects.filter(attempt=attempt).first()
+        old = snapshot.data if snapshot else {}
+        answers = Answer.objects.filter(attempt=attempt).values_list('question_id', 'is_correct', 'marks_awarded')
+        new = _contribution(attempt, answers, score_stats.total_marks)
+        if old == new:
+            return
+
+        # Score totals: swap the old contribution for the new one
+        old_scores = {key: value for key, value in old.items() if key != 'answers'}
+        new_scores = {key: value for key, value in new.items() if key != 'answers'}
+        if old_scores != new_scores:
+            recompute_extremes = _apply_score(score_stats, old, -1)
+            _apply_score(score_stats, new, 1)
+            if recompute_extremes:
+                extremes = ExamAttempt.objects.filter(
+                    exam_id=attempt.exam_id, status='COMPLETED'
+                ).exclude(id=attempt.id).aggregate(low=Min('score'), high=Max('score'))
+                candidates = [value for value in (extremes['low'], extremes['high'], new_scores.get('score')) if value is not None]
+                score_stats.score_min = min(candidates) if candidates else None
+                score_stats.score_max = max(candidates) if candidates else None
+            score_stats.save()
+
+        # Question totals: only answers that changed
+        old_answers = old.get('answers', {})
+        new_answers = new.get('answers', {})
+        changed = [
+            question_id for question_id in set(old_answers) | set(new_answers)
+            if old_answers.get(question_id) != new_answers.get(question_id)
+        ]
+        if changed:
+            existing = {
+                str(stats.question_id): stats
+                for stats in ExamQuestionStats.objects.filter(question_id__in=[int(q) for q in changed])
+            }
+            created = []
+            for question_id in changed:
+                stats = existing.get(question_id)
+                if stats is None:
+                    stats = ExamQuestionStats(exam_id=attempt.exam_id, question_id=int(question_id))
+                    created.append(stats)
+                if question_id in old_answers:
+                    _apply_answer(stats, old_answers[question_id], -1)
+                if question_id in new_answers:
+                    _apply_answer(stats, new_answers[question_id], 1)
+            if existing:
+                ExamQuestionStats.objects.bulk_update(
+                    existing.values(), ['answered_count', 'correct_count', 'marked_count', 'marks_sum']
+                )
+            if created:
+                ExamQuestionStats.objects.bulk_create(created)
+
+        AttemptStatsSnapshot.objects.update_or_create(attempt=attempt, defaults={'data': new})
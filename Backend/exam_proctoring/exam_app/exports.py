@@ -0,0 +1,188 @@
+# backend/exam_app/exports.py
+"""
+Streaming exports of exam results
+One row per attempt with its score and a marks column per question. The
+attempts and their answers are read with two server-side cursors ordered by
+attempt id and merged as they stream, so memory stays constant however many
+candidates sat the exam.
+
+CSV is streamed as it is produced. XLSX is built with openpyxl's write-only
+workbook (rows are spooled to disk, not kept in memory) and streamed once
+the workbook is saved.
+"""
+import csv
+import io
+import re
+import tempfile
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .models import Answer, ExamAttempt
+
+# Optional imports for XLSX export
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    Workbook = None
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+CHUNK_SIZE = 2000
+
+# Bytes collected before a chunk is handed to the server
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# Chunks pulled per thread hop when streaming under ASGI
+ASYNC_BATCH_SIZE = 16
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+class ExportError(Exception):
+    """Export cannot be produced"""
+    pass
+
+
+def _isoformat(value):
+    return value.isoformat() if value else ''
+
+
+def _text(value):
+    """User-supplied text, defused so spreadsheets don't run it as a formula"""
+    value = value or ''
+    return "'" + value if value[:1] in ('=', '+', '-', '@') else value
+
+
+def result_header(questions):
+    header = [
+        'attempt_id', 'username', 'email', 'full_name', 'status',
+        'start_time', 'end_time', 'score', 'total_marks', 'percentage', 'passed',
+    ]
+    for question_id, order, question_text, marks in questions:
+        header.append(_text(f'Q{order} ({marks:g}) {question_text[:40]}'.strip()))
+    return header
+
+
+def iter_result_rows(exam, questions, status=None):
+    """
+    Yield one list per attempt: attempt details, then marks per question
+    ('' for unanswered or unmarked questions)
+    """
+    columns = {question[0]: idx for idx, question in enumerate(questions)}
+    attempts = ExamAttempt.objects.filter(exam=exam)
+    answers = Answer.objects.filter(attempt__exam=exam)
+    if status:
+        attempts = attempts.filter(status__in=status)
+        answers = answers.filter(attempt__status__in=status)
+    attempts = attempts.order_by('id').values_list(
+        'id', 'user__username', 'user__email', 'user__first_name', 'user__last_name',
+        'status', 'start_time', 'end_time', 'score', 'percentage_score', 'is_passed'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    answers = answers.order_by('attempt_id').values_list(
+        'attempt_id', 'question_id', 'marks_awarded'
+    ).iterator(chunk_size=CHUNK_SIZE * 10)
+
+    # Merge join: both cursors are ordered by attempt id
+    pending = next(answers, None)
+    for (attempt_id, username, email, first_name, last_name, attempt_status,
+         start_time, end_time, score, percentage, is_passed) in attempts:
+        marks = [''] * len(questions)
+        while pending is not None and pending[0] <= attempt_id:
+            if pending[0] == attempt_id and pending[1] in columns and pending[2] is not None:
+                marks[columns[pending[1]]] = pending[2]
+            pending = next(answers, None)
+        yield [
+            attempt_id, _text(username), _text(email), _text(f'{first_name} {last_name}'.strip()), attempt_status,
+            _isoformat(start_time), _isoformat(end_time),
+            '' if score is None else score, exam.total_marks,
+            '' if percentage is None else round(percentage, 2),
+            '' if is_passed is None else ('yes' if is_passed else 'no'),
+        ] + marks
+
+
+def _csv_chunks(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= STREAM_BUFFER_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _xlsx_chunks(title, header, rows):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=_INVALID_SHEET_CHARS.sub(' ', title)[:31].strip() or 'Results')
+    sheet.append(header)
+    for row in rows:
+        sheet.append([None if value == '' else value for value in row])
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(STREAM_BUFFER_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _next_batch(iterator):
+    batch = []
+    for chunk in iterator:
+        batch.append(chunk)
+        if len(batch) >= ASYNC_BATCH_SIZE:
+            break
+    return batch
+
+
+async def _async_chunks(chunks):
+    """
+    Serve a synchronous generator to an ASGI server batch by batch; Django
+    would otherwise read the whole thing into a list first
+    """
+    iterator = iter(chunks)
+    next_batch = sync_to_async(_next_batch, thread_sensitive=True)
+    while True:
+        batch = await next_batch(iterator)
+        if not batch:
+            break
+        for chunk in batch:
+            yield chunk
+
+
+def streaming_download(request, chunks, content_type, filename):
+    """StreamingHttpResponse that streams under both WSGI and ASGI"""
+    django_request = getattr(request, '_request', request)
+    if isinstance(django_request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_exam_results(request, exam, file_format, status=None):
+    """
+    Streaming download of an exam's results as CSV or XLSX
+
+    Raises ExportError for unknown formats or when openpyxl is missing.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ExportError('Format must be csv or xlsx')
+    if file_format == 'xlsx' and not OPENPYXL_AVAILABLE:
+        raise ExportError('XLSX export requires openpyxl. Install it with: pip install openpyxl')
+
+    questions = list(exam.questions.order_by('order', 'id').values_list('id', 'order', 'question_text', 'marks'))
+    header = result_header(questions)
+    rows = iter_result_rows(exam, questions, status)
+    filename = f'exam_{exam.id}_results.{file_format}'
+
+    if file_format == 'csv':
+        return streaming_download(request, _csv_chunks(header, rows), 'text/csv; charset=utf-8', filename)
+    return streaming_download(request, _xlsx_chunks(exam.title, header, rows), XLSX_CONTENT_TYPE, filename)
@@ -5,59 +5,112 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.http import FileResponse, HttpResponse
 from django.db.models import Q, Avg, Count, Sum
 from django.utils import timezone
 from django.db import transaction
 import json
 from datetime import datetime, timedelta
 
-from .models import Exam, ExamAttempt, Answer, Question, Option, Subject
+from .models import Exam, ExamAttempt, Answer, Question, Option, Subject, CollusionScan, ResultPdfBundle, OutboxEmail, StudentImportJob
 from .admin_views import is_admin_user
+from .analytics import attempt_summary, question_statistics, student_performance_summary
+from .collusion import (
+    attempt_collusion_flags, collusion_scan_data, start_collusion_scan,
+    DEFAULT_MIN_SHARED_WRONG, NUMPY_AVAILABLE as COLLUSION_AVAILABLE
+)
+from .mailer import exam_email_summary, outbox_email_data, queue_result_emails
+from .item_analysis import analyze_exam_items, NUMPY_AVAILABLE
+from .exports import export_exam_results, ExportError, EXPORT_FORMATS, OPENPYXL_AVAILABLE
+from .result_pdfs import (
+    bundle_data, released_attempts, result_sheet_filename, result_sheet_pdf, start_result_bundle
+)
+from .student_import import roster_format, start_student_import, student_import_job_data
+from .background import fail_stale_jobs
 from .serializers import ExamSerializer, ExamAttemptSerializer
 
 # Feature 1: Export Results to PDF
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_results_pdf(request, attempt_id):
-    """Export exam results to PDF format"""
+    """Download an attempt's result sheet as a PDF (students once results are released)"""
     try:
-        attempt = get_object_or_404(ExamAttempt, id=attempt_id)
+        attempt = get_object_or_404(ExamAttempt.objects.select_related('exam', 'user'), id=attempt_id)
         
         # Check permissions
         if not (attempt.user == request.user or is_admin_user(request.user)):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        if not is_admin_user(request.user) and not attempt.results_ready:
+            return Response({'error': 'Results have not been released yet'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Prepare data for PDF export
-        answers = Answer.objects.filter(attempt=attempt).select_related('question', 'selected_option')
+        response = HttpResponse(result_sheet_pdf(attempt), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{result_sheet_filename(attempt)}"'
+        return response
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def exam_result_pdfs(request, exam_id):
+    """List result PDF bundles of an exam (GET) or start rendering a ZIP of all released sheets (POST)"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        export_data = {
-            'exam_title': attempt.exam.title,
-            'student_name': attempt.user.username,
-            'score': attempt.score,
-            'total_marks': attempt.exam.total_marks,
-            'percentage': attempt.percentage_score,
-            'status': attempt.status,
-            'start_time': attempt.start_time.isoformat() if attempt.start_time else None,
-            'end_time': attempt.end_time.isoformat() if attempt.end_time else None,
-            'answers': []
-        }
+        exam = get_object_or_404(Exam, id=exam_id)
         
-        for answer in answers:
-            export_data['answers'].append({
-                'question_text': answer.question.question_text,
-                'question_type': answer.question.question_type,
-                'marks': answer.question.marks,
-                'marks_awarded': answer.marks_awarded,
-                'answer_text': answer.answer_text,
-                'is_correct': answer.is_correct
-            })
+        # Bundles lost with their worker would otherwise block new ones
+        fail_stale_jobs(ResultPdfBundle.objects.filter(exam=exam))
         
-        return Response({
-            'message': 'PDF export data ready',
-            'data': export_data,
-            'format': 'pdf',
-            'download_url': f'/api/exam/attempts/{attempt_id}/export-pdf/'  # Frontend will handle PDF generation
-        })
+        if request.method == 'GET':
+            bundles = ResultPdfBundle.objects.filter(exam=exam)[:20]
+            return Response([bundle_data(bundle) for bundle in bundles])
+        
+        if not released_attempts(exam).exists():
+            return Response({'error': 'No attempts of this exam have released results'}, status=status.HTTP_400_BAD_REQUEST)
+        if ResultPdfBundle.objects.filter(exam=exam, status__in=['PENDING', 'RUNNING']).exists():
+            return Response({'error': 'Result PDFs are already being rendered for this exam'}, status=status.HTTP_409_CONFLICT)
+        
+        with transaction.atomic():
+            bundle = ResultPdfBundle.objects.create(exam=exam, created_by=request.user)
+            start_result_bundle(bundle)
+        
+        return Response(bundle_data(bundle), status=status.HTTP_202_ACCEPTED)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def result_pdf_bundle_detail(request, bundle_id):
+    """Get progress of a result PDF bundle"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        fail_stale_jobs(ResultPdfBundle.objects.filter(id=bundle_id))
+        bundle = get_object_or_404(ResultPdfBundle, id=bundle_id)
+        return Response(bundle_data(bundle))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_result_pdf_bundle(request, bundle_id):
+    """Download a finished result PDF bundle as a ZIP"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        bundle = get_object_or_404(ResultPdfBundle, id=bundle_id)
+        if bundle.status != 'COMPLETED' or not bundle.file:
+            return Response({'error': 'Bundle is not ready'}, status=status.HTTP_409_CONFLICT)
+        
+        return FileResponse(
+            bundle.file.open('rb'),
+            as_attachment=True,
+            filename=f'exam_{bundle.exam_id}_result_sheets.zip',
+            content_type='application/zip'
+        )
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -65,20 +118,54 @@ def export_results_pdf(request, attempt_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def send_results_email(request, attempt_id):
-    """Send exam results via email"""
+    """Queue a results email for an attempt (sent in the background)"""
     try:
         if not is_admin_user(request.user):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        attempt = get_object_or_404(ExamAttempt, id=attempt_id)
+        attempt = get_object_or_404(ExamAttempt.objects.select_related('user', 'exam'), id=attempt_id)
+        if not attempt.results_ready:
+            return Response({'error': 'Results have not been released yet'}, status=status.HTTP_400_BAD_REQUEST)
+        if not attempt.user.email:
+            return Response({'error': 'Student has no email address'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Email sending logic (requires email backend configuration)
-        # For now, return success message
+        with transaction.atomic():
+            queue_result_emails([attempt], created_by=request.user, resend=True)
+        
+        email = OutboxEmail.objects.filter(attempt=attempt, kind='RESULTS').first()
         return Response({
-            'message': f'Results email sent to {attempt.user.email}',
-            'sent': True,
-            'recipient': attempt.user.email
-        })
+            'message': f'Results email queued for {attempt.user.email}',
+            'email': outbox_email_data(email),
+        }, status=status.HTTP_202_ACCEPTED)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def exam_result_emails(request, exam_id):
+    """
+    Delivery status of an exam's results emails (GET), or queue them for all
+    released attempts (POST; attempts already emailed are skipped unless
+    `resend` is true)
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        if request.method == 'GET':
+            return Response(exam_email_summary(exam))
+        
+        resend = str(request.data.get('resend', False)).lower() in ('true', '1', 'yes')
+        attempts = released_attempts(exam).select_related('user', 'exam').order_by('id')
+        with transaction.atomic():
+            result = queue_result_emails(attempts, created_by=request.user, resend=resend)
+        
+        return Response({
+            'message': f'{result["queued"]} results emails queued',
+            **result,
+        }, status=status.HTTP_202_ACCEPTED)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -233,48 +320,20 @@ def student_performance_analytics(request, user_id=None):
         if target_user_id != request.user.id and not is_admin_user(request.user):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        attempts = ExamAttempt.objects.filter(user_id=target_user_id, status='COMPLETED')
+        summary = student_performance_summary(target_user_id)
         
         analytics = {
-            'total_exams': attempts.count(),
-            'average_score': attempts.aggregate(avg=Avg('score'))['avg'] or 0,
-            'average_percentage': attempts.aggregate(avg=Avg('percentage_score'))['avg'] or 0,
-            'total_passed': attempts.filter(is_passed=True).count(),
-            'total_failed': attempts.filter(is_passed=False).count(),
+            'total_exams': summary['completed_exams'],
+            'average_score': summary['average_score'],
+            'average_percentage': summary['average_percentage'],
+            'total_passed': summary['total_passed'],
+            'total_failed': summary['total_failed'],
             'exams_by_subject': {},
-            'performance_trend': [],
-            'best_performance': None,
-            'worst_performance': None
+            'performance_trend': summary['performance_trend'],
+            'best_performance': summary['best_performance'],
+            'worst_performance': summary['worst_performance']
         }
         
-        # Performance trend (last 10 exams)
-        recent_attempts = attempts.order_by('-start_time')[:10]
-        for attempt in reversed(recent_attempts):
-            analytics['performance_trend'].append({
-                'exam_title': attempt.exam.title,
-                'score': attempt.score,
-                'percentage': attempt.percentage_score,
-                'date': attempt.start_time.isoformat() if attempt.start_time else None
-            })
-        
-        # Best and worst performance
-        best = attempts.order_by('-percentage_score').first()
-        worst = attempts.order_by('percentage_score').first()
-        
-        if best:
-            analytics['best_performance'] = {
-                'exam_title': best.exam.title,
-                'score': best.score,
-                'percentage': best.percentage_score
-            }
-        
-        if worst:
-            analytics['worst_performance'] = {
-                'exam_title': worst.exam.title,
-                'score': worst.score,
-                'percentage': worst.percentage_score
-            }
-        
         return Response(analytics)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -289,17 +348,11 @@ def question_difficulty_analysis(request, exam_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         exam = get_object_or_404(Exam, id=exam_id)
-        questions = exam.questions.all()
         
         difficulty_data = []
-        for question in questions:
-            answers = Answer.objects.filter(question=question, attempt__exam=exam)
-            total_answered = answers.count()
-            
-            if total_answered > 0:
-                correct_count = answers.filter(is_correct=True).count()
-                accuracy = (correct_count / total_answered) * 100
-                avg_marks = answers.aggregate(avg=Avg('marks_awarded'))['avg'] or 0
+        for stats in question_statistics(exam):
+            if stats['total_answered'] > 0:
+                accuracy = stats['accuracy']
                 
                 # Determine difficulty
                 if accuracy >= 80:
@@ -310,13 +363,13 @@ def question_difficulty_analysis(request, exam_id):
                     difficulty = 'Hard'
                 
                 difficulty_data.append({
-                    'question_id': question.id,
-                    'question_text': question.question_text[:50],
-                    'question_type': question.question_type,
-                    'total_answered': total_answered,
-                    'correct_count': correct_count,
+                    'question_id': stats['question_id'],
+                    'question_text': stats['question_text'],
+                    'question_type': stats['question_type'],
+                    'total_answered': stats['total_answered'],
+                    'correct_count': stats['correct_count'],
                     'accuracy': round(accuracy, 2),
-                    'average_marks': round(avg_marks, 2),
+                    'average_marks': round(stats['average_marks'], 2),
                     'difficulty': difficulty
                 })
         
@@ -324,6 +377,87 @@ def question_difficulty_analysis(request, exam_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def exam_item_analysis(request, exam_id):
+    """Item analysis: difficulty, discrimination, point-biserial, distractors and reliability"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        if not NUMPY_AVAILABLE:
+            return Response({
+                'error': 'Item analysis requires numpy. Install it with: pip install numpy'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        return Response(analyze_exam_items(exam))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def exam_collusion_scans(request, exam_id):
+    """List collusion scans of an exam (GET) or start a new one (POST)"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        # Scans lost with their worker would otherwise block new ones
+        fail_stale_jobs(CollusionScan.objects.filter(exam=exam))
+        
+        if request.method == 'GET':
+            scans = CollusionScan.objects.filter(exam=exam)[:20]
+            return Response([collusion_scan_data(scan) for scan in scans])
+        
+        if not COLLUSION_AVAILABLE:
+            return Response({
+                'error': 'Collusion detection requires numpy. Install it with: pip install numpy'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        try:
+            min_shared_wrong = int(request.data.get('min_shared_wrong', DEFAULT_MIN_SHARED_WRONG))
+        except (TypeError, ValueError):
+            return Response({'error': 'min_shared_wrong must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if min_shared_wrong < 1:
+            return Response({'error': 'min_shared_wrong must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if CollusionScan.objects.filter(exam=exam, status__in=['PENDING', 'RUNNING']).exists():
+            return Response({'error': 'A collusion scan is already running for this exam'}, status=status.HTTP_409_CONFLICT)
+        
+        with transaction.atomic():
+            scan = CollusionScan.objects.create(
+                exam=exam,
+                created_by=request.user,
+                min_shared_wrong=min_shared_wrong
+            )
+            start_collusion_scan(scan)
+        
+        return Response(collusion_scan_data(scan), status=status.HTTP_202_ACCEPTED)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def collusion_scan_detail(request, scan_id):
+    """Get a collusion scan with its ranked suspicious pairs"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        scan = get_object_or_404(CollusionScan, id=scan_id)
+        try:
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
+        except ValueError:
+            limit = 100
+        
+        return Response(collusion_scan_data(scan, pair_limit=limit))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # Feature 8: Time Tracking Per Question
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -411,7 +545,11 @@ def exam_review_mode(request, attempt_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def bulk_import_students(request):
-    """Import multiple students at once"""
+    """
+    Import multiple students at once
+    The rows are imported by a background job; poll the returned job (or
+    watch the admin monitoring WebSocket) for progress and per-row errors.
+    """
     try:
         if not is_admin_user(request.user):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
@@ -420,51 +558,141 @@ def bulk_import_students(request):
         
         if not students_data:
             return Response({'error': 'No students data provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(students_data, list):
+            return Response({'error': 'students must be a list'}, status=status.HTTP_400_BAD_REQUEST)
         
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
+        # The rows (passwords included) go to the job in memory, never to the database
+        job = StudentImportJob.objects.create(created_by=request.user, total=len(students_data))
+        start_student_import(job, students_data)
         
-        imported = []
-        failed = []
+        return Response({
+            'message': f'Importing {len(students_data)} students',
+            'job': student_import_job_data(job)
+        }, status=status.HTTP_202_ACCEPTED)
         
-        for student_data in students_data:
-            try:
-                username = student_data.get('username')
-                email = student_data.get('email')
-                password = student_data.get('password', 'defaultpassword123')
-                
-                if not username or not email:
-                    failed.append({'data': student_data, 'error': 'Missing username or email'})
-                    continue
-                
-                if User.objects.filter(username=username).exists():
-                    failed.append({'data': student_data, 'error': 'Username already exists'})
-                    continue
-                
-                user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password=password
-                )
-                
-                imported.append({
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email
-                })
-            except Exception as e:
-                failed.append({'data': student_data, 'error': str(e)})
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def student_import_job_status(request, job_id):
+    """Get progress and errors of a bulk student import"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        return Response({
-            'message': f'Imported {len(imported)} students',
-            'imported': imported,
-            'failed': failed,
-            'total': len(students_data)
-        }, status=status.HTTP_201_CREATED)
+        fail_stale_jobs(StudentImportJob.objects.filter(id=job_id))
+        job = get_object_or_404(StudentImportJob, id=job_id)
+        return Response(student_import_job_data(job))
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def student_import_jobs(request):
+    """
+    List recent student imports (GET) or import a CSV/XLSX roster (POST)
+    Multipart fields: file, update_existing (update students whose username
+    exists instead of reporting them; staff and instructor accounts are never
+    updated) and exam_ids (exams to enrol the
+    imported students in, repeated or comma separated).
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if request.method == 'GET':
+            fail_stale_jobs(StudentImportJob.objects.all())
+            jobs = StudentImportJob.objects.prefetch_related('exams')[:20]
+            return Response([student_import_job_data(job) for job in jobs])
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'A CSV or XLSX roster file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = roster_format(upload.name)
+        if file_format is None:
+            return Response({'error': 'Roster must be a .csv or .xlsx file'}, status=status.HTTP_400_BAD_REQUEST)
+        if file_format == 'xlsx' and not OPENPYXL_AVAILABLE:
+            return Response({
+                'error': 'XLSX rosters require openpyxl. Install it with: pip install openpyxl'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        raw_exam_ids = request.data.getlist('exam_ids') if hasattr(request.data, 'getlist') else request.data.get('exam_ids', [])
+        if isinstance(raw_exam_ids, (str, int)):
+            raw_exam_ids = [raw_exam_ids]
+        try:
+            exam_ids = {int(value) for item in raw_exam_ids for value in str(item).split(',') if value.strip()}
+        except ValueError:
+            return Response({'error': 'exam_ids must be exam ids'}, status=status.HTTP_400_BAD_REQUEST)
+        exams = list(Exam.objects.filter(id__in=exam_ids))
+        if len(exams) != len(exam_ids):
+            return Response({'error': 'Some exams do not exist'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            job = StudentImportJob(
+                created_by=request.user,
+                file_name=upload.name,
+                update_existing=str(request.data.get('update_existing', False)).lower() in ('true', '1', 'yes')
+            )
+            job.file.save(upload.name, upload, save=False)
+            job.save()
+            job.exams.set(exams)
+            start_student_import(job)
+        
+        return Response(student_import_job_data(job), status=status.HTTP_202_ACCEPTED)
+        
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_student_import_results(request, job_id):
+    """Download the per-row results of a student import as CSV"""
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        job = get_object_or_404(StudentImportJob, id=job_id)
+        if not job.results_file:
+            return Response({'error': 'Import results are not ready'}, status=status.HTTP_409_CONFLICT)
+        
+        return FileResponse(
+            job.results_file.open('rb'),
+            as_attachment=True,
+            filename=f'student_import_{job.id}_results.csv',
+            content_type='text/csv'
+        )
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_exam_results_file(request, exam_id, file_format):
+    """
+    Stream exam results as CSV or XLSX: one row per attempt with a marks
+    column per question. ?status=COMPLETED,TERMINATED limits the attempts.
+    """
+    try:
+        if not is_admin_user(request.user):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        exam = get_object_or_404(Exam, id=exam_id)
+        
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': 'Format must be csv or xlsx'}, status=status.HTTP_400_BAD_REQUEST)
+        if file_format == 'xlsx' and not OPENPYXL_AVAILABLE:
+            return Response({
+                'error': 'XLSX export requires openpyxl. Install it with: pip install openpyxl'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        status_filter = [value for value in request.GET.get('status', '').split(',') if value]
+        return export_exam_results(request, exam, file_format, status_filter or None)
+    except ExportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # Feature 11: Exam Reports Generation
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -475,39 +703,31 @@ def generate_exam_report(request, exam_id):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         exam = get_object_or_404(Exam, id=exam_id)
-        attempts = ExamAttempt.objects.filter(exam=exam, status='COMPLETED')
+        summary = attempt_summary(exam)
         
         report = {
             'exam_id': exam.id,
             'exam_title': exam.title,
             'generated_at': timezone.now().isoformat(),
             'summary': {
-                'total_attempts': attempts.count(),
-                'total_students': attempts.values('user').distinct().count(),
-                'average_score': attempts.aggregate(avg=Avg('score'))['avg'] or 0,
-                'pass_rate': (attempts.filter(is_passed=True).count() / attempts.count() * 100) if attempts.count() > 0 else 0
-            },
-            'score_distribution': {
-                '90-100': attempts.filter(percentage_score__gte=90).count(),
-                '80-89': attempts.filter(percentage_score__gte=80, percentage_score__lt=90).count(),
-                '70-79': attempts.filter(percentage_score__gte=70, percentage_score__lt=80).count(),
-                '60-69': attempts.filter(percentage_score__gte=60, percentage_score__lt=70).count(),
-                'below_60': attempts.filter(percentage_score__lt=60).count()
+                'total_attempts': summary['total_attempts'],
+                'total_students': summary['total_students'],
+                'average_score': summary['average_score'],
+                'pass_rate': summary['pass_rate']
             },
-            'question_statistics': []
+            'score_distribution': summary['score_distribution'],
+            'question_statistics': [
+                {
+                    'question_id': stats['question_id'],
+                    'question_text': stats['question_text'],
+                    'total_answered': stats['total_answered'],
+                    'correct_count': stats['correct_count'],
+                    'average_marks': stats['average_marks']
+                }
+                for stats in question_statistics(exam)
+            ]
         }
         
-        # Question-wise statistics
-        for question in exam.questions.all():
-            question_answers = Answer.objects.filter(question=question, attempt__exam=exam)
-            report['question_statistics'].append({
-                'question_id': question.id,
-                'question_text': question.question_text[:50],
-                'total_answered': question_answers.count(),
-                'correct_count': question_answers.filter(is_correct=True).count(),
-                'average_marks': question_answers.aggregate(avg=Avg('marks_awarded'))['avg'] or 0
-            })
-        
         return Response(report)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -594,9 +814,13 @@ def violation_detailed_report(request, attempt_id):
     try:
         attempt = get_object_or_404(ExamAttempt, id=attempt_id)
         
-        if attempt.user != request.user and not is_admin_user(request.user):
+        is_admin = is_admin_user(request.user)
+        if attempt.user != request.user and not is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
+        # Answer-pattern similarity from the latest collusion scan (admins only)
+        collusion = {'collusion_flags': attempt_collusion_flags(attempt)} if is_admin else {}
+        
         try:
             from proctoring.models import ProctoringSession, ViolationLog
             
@@ -607,7 +831,8 @@ def violation_detailed_report(request, attempt_id):
                     'attempt_id': attempt_id,
                     'violations': [],
                     'total_violations': 0,
-                    'message': 'No proctoring session found'
+                    'message': 'No proctoring session found',
+                    **collusion
                 })
             
             violations = ViolationLog.objects.filter(session=session).order_by('-timestamp')
@@ -618,7 +843,8 @@ def violation_detailed_report(request, attempt_id):
                 'exam_title': attempt.exam.title,
                 'total_violations': violations.count(),
                 'violations_by_type': {},
-                'violations': []
+                'violations': [],
+                **collusion
             }
             
             for violation in violations:
@@ -641,7 +867,8 @@ def violation_detailed_report(request, attempt_id):
                 'attempt_id': attempt_id,
                 'violations': [],
                 'total_violations': 0,
-                'message': 'Proctoring module not available'
+                'message': 'Proctoring module not available',
+                **collusion
             })
             
     except Exception as e:
@@ -0,0 +1,140 @@
+# backend/exam_app/import_jobs.py
+"""
+Background runner for question import jobs
+Imports run on the shared background worker pool so the upload request
+returns straight away. Progress is pushed to the admin monitoring
+WebSocket and saved on the job row after every committed CSV chunk, so a
+status poll answered by any worker process sees it. JSON and DOCX imports
+commit once at the end; their running totals can only go to the cache. The uploaded file (questions the students have not seen yet)
+lives in the private import storage and is deleted however the job ends.
+"""
+import traceback
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from .models import QuestionImportJob
+from .question_import import import_questions_from_upload, QuestionImportError
+from .background import claim_job, heartbeat, run_in_background
+
+PROGRESS_CACHE_TIMEOUT = 60 * 60
+
+
+def _progress_key(job_id):
+    return f'question_import_job_progress_{job_id}'
+
+
+def import_job_data(job):
+    """Serialize a job, including live progress while it is running"""
+    data = {
+        'id': job.id,
+        'exam_id': job.exam_id,
+        'file_name': job.file_name,
+        'overwrite': job.overwrite,
+        'status': job.status,
+        'processed': job.processed,
+        'imported': job.imported,
+        'total': job.total,
+        'error_count': job.error_count,
+        'errors': job.errors,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == 'RUNNING':
+        progress = cache.get(_progress_key(job.id))
+        if progress:
+            data.update(progress)
+    return data
+
+
+def _notify(job, data=None):
+    """Push job state to admins watching the exam"""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f'admin_exam_{job.exam_id}',
+            {
+                'type': 'import_progress',
+                'data': data or import_job_data(job)
+            }
+        )
+    except Exception as e:
+        print(f"Error sending import progress: {e}")
+
+
+def _save(job, **fields):
+    for field, value in fields.items():
+        setattr(job, field, value)
+    QuestionImportJob.objects.filter(pk=job.pk).update(**fields)
+    _notify(job)
+
+
+def _delete_upload(job):
+    if job.file:
+        job.file.delete(save=False)
+        QuestionImportJob.objects.filter(pk=job.pk).update(file='')
+
+
+def execute_import_job(job_id):
+    """Run an import job in the current thread"""
+    job = QuestionImportJob.objects.get(pk=job_id)
+    if not claim_job(job):
+        return
+    _notify(job)
+
+    def progress(processed, imported, error_count):
+        if not transaction.get_connection().in_atomic_block:
+            # Called between committed chunks: the row is the shared record
+            _save(job, processed=processed, imported=imported, error_count=error_count)
+            return
+        # Inside the import's transaction (JSON/DOCX) an update of the job
+        # row would stay invisible until the end, so keep the totals in the cache
+        progress_data = {
+            'processed': processed,
+            'imported': imported,
+            'error_count': error_count,
+        }
+        cache.set(_progress_key(job.id), progress_data, PROGRESS_CACHE_TIMEOUT)
+        data = import_job_data(job)
+        data.update(progress_data)
+        _notify(job, data)
+
+    try:
+        with heartbeat(job), job.file.open('rb') as upload:
+            result = import_questions_from_upload(
+                job.exam_id, upload, job.file_name, job.overwrite,
+                progress_callback=progress
+            )
+    except QuestionImportError as e:
+        _save(job, status='FAILED', message=str(e), finished_at=timezone.now())
+        return
+    except Exception as e:
+        print(f"Error in import job {job.id}: {e}")
+        traceback.print_exc()
+        _save(job, status='FAILED', message=f'Error importing questions: {str(e)}', finished_at=timezone.now())
+        return
+    finally:
+        cache.delete(_progress_key(job.id))
+        _delete_upload(job)
+
+    _save(
+        job,
+        status='COMPLETED',
+        processed=result['total'],
+        imported=result['imported'],
+        total=result['total'],
+        error_count=result.get('error_count', len(result['errors'])),
+        errors=result['errors'],
+        message=f'Successfully imported {result["imported"]} out of {result["total"]} questions',
+        finished_at=timezone.now(),
+    )
+
+
+def start_import_job(job):
+    """Queue a saved job once the current transaction commits"""
+    run_in_background(execute_import_job, job.id)
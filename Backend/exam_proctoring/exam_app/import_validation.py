@@ -0,0 +1,209 @@
+# backend/exam_app/import_validation.py
+"""
+Schema validation for question imports
+The question schema is compiled once into a table of checks per question
+type, so validating a row is a dict lookup plus a few small function calls.
+The importers use it for their all-or-nothing checks and the dry-run mode
+uses ImportValidator to report diagnostics and statistics without touching
+the database.
+"""
+from functools import partial
+
+QUESTION_TYPES = ('MCQ', 'TF', 'SA', 'TEXT', 'IMAGE_UPLOAD')
+
+# Diagnostics kept in a dry-run report; counts keep going past this
+MAX_DIAGNOSTICS = 1000
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+def _check_question_text(question_data, emit):
+    text = question_data.get('question_text')
+    if not text or (isinstance(text, str) and not text.strip()):
+        emit('question_text', 'missing_question_text', "Missing or empty 'question_text'")
+
+
+def _check_marks(question_data, emit):
+    marks = question_data.get('marks', 1)
+    if not isinstance(marks, (int, float)) or marks <= 0:
+        emit('marks', 'invalid_marks', "'marks' must be a positive number")
+
+
+def _check_options(question_data, emit, single_correct=False):
+    options = question_data.get('options')
+    if not isinstance(options, list):
+        emit('options', 'invalid_options', "Missing or invalid 'options' array")
+        return
+    if len(options) < 2:
+        emit('options', 'too_few_options', "Must have at least 2 options")
+        return
+
+    correct_count = 0
+    for idx, option in enumerate(options):
+        if not isinstance(option, dict):
+            emit(f'options[{idx}]', 'invalid_option', "Option must be an object")
+            continue
+        if option.get('is_correct', False):
+            correct_count += 1
+        if not option.get('option_text') and not option.get('option_image'):
+            emit(f'options[{idx}]', 'empty_option', "Option has no text or image", WARNING)
+
+    if correct_count == 0:
+        emit('options', 'missing_correct_option', "At least one option must be marked as correct")
+    elif correct_count > 1 and single_correct:
+        emit('options', 'multiple_correct_options', "True/False questions must have exactly one correct option")
+
+
+# Checks per question type; 'common' runs for every question. For SA, TEXT
+# and IMAGE_UPLOAD questions options are optional.
+QUESTION_SCHEMA = {
+    'common': (_check_question_text, _check_marks),
+    'MCQ': (_check_options,),
+    'TF': (partial(_check_options, single_correct=True),),
+}
+
+
+def compile_question_schema(schema=QUESTION_SCHEMA):
+    """Flatten the schema into a tuple of checks per question type"""
+    common = tuple(schema.get('common', ()))
+    return {
+        question_type: common + tuple(schema.get(question_type, ()))
+        for question_type in QUESTION_TYPES
+    }
+
+
+_COMPILED_SCHEMA = compile_question_schema()
+_COMMON_CHECKS = tuple(QUESTION_SCHEMA['common'])
+
+
+def validate_question(question_data, emit):
+    """
+    Run the compiled schema against one question dict
+
+    `emit(column, code, message, severity=ERROR)` is called for every
+    problem found. Returns the question type, or None if the entry is not
+    a question object at all.
+    """
+    if not isinstance(question_data, dict):
+        emit(None, 'invalid_question', "Question must be an object")
+        return None
+
+    question_type = question_data.get('question_type', 'MCQ')
+    checks = _COMPILED_SCHEMA.get(question_type)
+    if checks is None:
+        emit('question_type', 'invalid_question_type',
+             "Invalid question_type. Must be MCQ, TF, SA, TEXT, or IMAGE_UPLOAD")
+        checks = _COMMON_CHECKS
+
+    for check in checks:
+        check(question_data, emit)
+    return question_type
+
+
+class ImportValidator:
+    """Collect diagnostics and statistics for a dry-run import"""
+
+    def __init__(self, max_diagnostics=MAX_DIAGNOSTICS):
+        self.max_diagnostics = max_diagnostics
+        self.diagnostics = []
+        self.error_count = 0
+        self.warning_count = 0
+        self.total = 0
+        self.valid = 0
+        self.by_type = {}
+        self.missing_correct = 0
+        self.duplicates = 0
+        self.with_images = 0
+        self.total_marks = 0
+        self._seen_questions = {}
+        self._row = None
+        self._columns = None
+        self._row_errors = 0
+
+    def add(self, row, column, code, message, severity=ERROR):
+        """Record a diagnostic that is not tied to the question schema"""
+        if severity == ERROR:
+            self.error_count += 1
+            self._row_errors += 1
+        else:
+            self.warning_count += 1
+        if len(self.diagnostics) < self.max_diagnostics:
+            self.diagnostics.append({
+                'row': row,
+                'column': column,
+                'code': code,
+                'severity': severity,
+                'message': message,
+            })
+
+    def reject(self, row, column, code, message):
+        """Count a row that could not be turned into a question at all"""
+        self.total += 1
+        self._row_errors = 0
+        self.add(row, column, code, message)
+
+    def _emit(self, column, code, message, severity=ERROR):
+        if self._columns and column in self._columns:
+            column = self._columns[column]
+        if code == 'missing_correct_option':
+            self.missing_correct += 1
+        self.add(self._row, column, code, message, severity)
+
+    def check(self, question_data, row, columns=None):
+        """
+        Validate one question
+
+        `row` is reported with every diagnostic and `columns` optionally maps
+        schema fields to source column names (e.g. CSV headers).
+        """
+        self.total += 1
+        self._row = row
+        self._columns = columns
+        self._row_errors = 0
+
+        question_type = validate_question(question_data, self._emit)
+        if question_type is None:
+            return False
+
+        self.by_type[question_type] = self.by_type.get(question_type, 0) + 1
+
+        text = question_data.get('question_text')
+        if isinstance(text, str) and text:
+            key = ' '.join(text.split()).casefold()
+            first_row = self._seen_questions.get(key)
+            if first_row is None:
+                self._seen_questions[key] = row
+            else:
+                self.duplicates += 1
+                self._emit('question_text', 'duplicate_question', f"Duplicate of the question in row {first_row}", WARNING)
+
+        if question_data.get('question_image') or any(
+            isinstance(option, dict) and option.get('option_image')
+            for option in question_data.get('options') or ()
+        ):
+            self.with_images += 1
+
+        if self._row_errors:
+            return False
+        self.valid += 1
+        self.total_marks += question_data.get('marks', 1)
+        return True
+
+    def report(self):
+        return {
+            'valid': self.error_count == 0 and self.valid > 0,
+            'total': self.total,
+            'valid_count': self.valid,
+            'error_count': self.error_count,
+            'warning_count': self.warning_count,
+            'diagnostics': self.diagnostics,
+            'truncated': self.error_count + self.warning_count > len(self.diagnostics),
+            'stats': {
+                'by_type': self.by_type,
+                'missing_correct_answers': self.missing_correct,
+                'duplicate_questions': self.duplicates,
+                'with_images': self.with_images,
+                'total_marks': self.total_marks,
+            },
+        }
@@ -0,0 +1,251 @@
+# backend/exam_app/item_analysis.py
+"""
+Classical item analysis for exams
+The attempt x question answer matrix of an exam is loaded with one query,
+read from the cursor in chunks, into NumPy arrays and every statistic is computed column-wise: item
+difficulty (p-value), upper/lower 27% discrimination, corrected
+point-biserial correlation, distractor analysis per option, KR-20 /
+Cronbach's alpha reliability and the standard error of measurement.
+"""
+from itertools import chain
+from django.db import connection
+from django.db.models import Case, FloatField, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+from .models import Answer, ExamAttempt, Option
+
+# Optional imports for item analysis
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# Share of candidates in each of the upper and lower groups
+GROUP_FRACTION = 0.27
+
+# Thresholds used to flag items for review
+LOW_DISCRIMINATION = 0.2
+TOO_EASY = 0.95
+TOO_HARD = 0.1
+
+CHOICE_TYPES = ('MCQ', 'TF')
+
+# Answer rows read from the cursor at a time
+FETCH_SIZE = 10000
+
+
+def _round(value, digits=4):
+    """Round a NumPy scalar for JSON, mapping NaN to None"""
+    value = float(value)
+    if value != value:
+        return None
+    return round(value, digits)
+
+
+def _answer_rows(exam):
+    """
+    Fetch (attempt_id, question_id, is_correct, has_marks, marks, option_id)
+    for every answer of a completed attempt as one flat float array
+    """
+    queryset = Answer.objects.filter(
+        attempt__exam=exam, attempt__status='COMPLETED'
+    ).values_list(
+        'attempt_id',
+        'question_id',
+        Case(When(is_correct=True, then=Value(1)), default=Value(0), output_field=IntegerField()),
+        Case(When(marks_awarded__isnull=True, then=Value(0)), default=Value(1), output_field=IntegerField()),
+        Coalesce('marks_awarded', Value(0.0), output_field=FloatField()),
+        Coalesce('selected_option_id', Value(0), output_field=IntegerField()),
+    )
+    # Skip model iteration: the raw rows go straight into NumPy
+    sql, params = queryset.query.sql_with_params()
+    chunks = []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            flat = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=len(rows) * 6)
+            chunks.append(flat.reshape(len(rows), 6))
+    if not chunks:
+        return np.empty((0, 6), dtype=np.float64)
+    return np.concatenate(chunks)
+
+
+def _column_correlation(x, y):
+    """Pearson correlation of matching columns of two matrices"""
+    xc = x - x.mean(axis=0)
+    yc = y - y.mean(axis=0)
+    denominator = np.sqrt((xc ** 2).sum(axis=0) * (yc ** 2).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, (xc * yc).sum(axis=0) / denominator, np.nan)
+
+
+def _reliability(item_scores, totals):
+    """Cronbach's alpha (KR-20 for 0/1 items) from an item score matrix"""
+    k = item_scores.shape[1]
+    total_variance = totals.var()
+    if k < 2 or total_variance <= 0:
+        return float('nan')
+    return k / (k - 1) * (1 - item_scores.var(axis=0).sum() / total_variance)
+
+
+def analyze_exam_items(exam):
+    """
+    Run item analysis over the completed attempts of an exam
+
+    Unanswered questions count as incorrect with zero marks. Raises
+    RuntimeError if NumPy is not installed.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("Item analysis requires numpy. Install it with: pip install numpy")
+
+    questions = list(exam.questions.order_by('order', 'id').values_list(
+        'id', 'question_text', 'question_type', 'marks'
+    ))
+    attempt_ids = np.fromiter(
+        ExamAttempt.objects.filter(exam=exam, status='COMPLETED').values_list('id', flat=True),
+        dtype=np.float64
+    )
+    attempt_ids.sort()
+    question_ids = np.array([question[0] for question in questions], dtype=np.float64)
+    max_marks = np.array([question[3] for question in questions], dtype=np.float64)
+
+    n, k = len(attempt_ids), len(questions)
+    result = {
+        'exam_id': exam.id,
+        'exam_title': exam.title,
+        'candidates': n,
+        'item_count': k,
+        'group_size': 0,
+        'reliability': {
+            'kr20': None,
+            'cronbach_alpha': None,
+            'sem': None,
+            'mean_score': None,
+            'score_sd': None,
+        },
+        'items': [],
+    }
+    if n == 0 or k == 0:
+        return result
+
+    # Dense attempt x question matrices, filled from the answer rows
+    correct = np.zeros((n, k))
+    scores = np.zeros((n, k))
+    selected = np.zeros((n, k), dtype=np.int64)
+
+    rows = _answer_rows(exam)
+    question_order = np.argsort(question_ids)
+    sorted_question_ids = question_ids[question_order]
+    row_idx = np.searchsorted(attempt_ids, rows[:, 0]).clip(max=n - 1)
+    col_pos = np.searchsorted(sorted_question_ids, rows[:, 1]).clip(max=k - 1)
+    known = (attempt_ids[row_idx] == rows[:, 0]) & (sorted_question_ids[col_pos] == rows[:, 1])
+    row_idx, col_idx, rows = row_idx[known], question_order[col_pos[known]], rows[known]
+
+    correct[row_idx, col_idx] = rows[:, 2]
+    # Unmarked answers score full marks when correct (auto-marked MCQ/TF)
+    scores[row_idx, col_idx] = np.where(rows[:, 3] > 0, rows[:, 4], rows[:, 2] * max_marks[col_idx])
+    selected[row_idx, col_idx] = rows[:, 5].astype(np.int64)
+
+    totals = scores.sum(axis=1)
+    p_values = correct.mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        facility = np.where(max_marks > 0, scores.mean(axis=0) / max_marks, np.nan)
+
+    # Upper/lower 27% groups by total score
+    group_size = max(1, int(round(n * GROUP_FRACTION)))
+    ranking = np.argsort(totals, kind='stable')
+    lower, upper = ranking[:group_size], ranking[-group_size:]
+    discrimination = correct[upper].mean(axis=0) - correct[lower].mean(axis=0)
+
+    # Corrected point-biserial: item vs total score without the item itself
+    point_biserial = _column_correlation(correct, totals[:, None] - scores)
+
+    alpha = _reliability(scores, totals)
+    kr20 = _reliability(correct, correct.sum(axis=1))
+    score_sd = totals.std()
+    sem = score_sd * np.sqrt(1 - alpha) if alpha == alpha and alpha <= 1 else float('nan')
+
+    result['group_size'] = group_size
+    result['reliability'] = {
+        'kr20': _round(kr20),
+        'cronbach_alpha': _round(alpha),
+        'sem': _round(sem),
+        'mean_score': _round(totals.mean()),
+        'score_sd': _round(score_sd),
+    }
+
+    # Distractor analysis: option selections overall and per group
+    options = list(Option.objects.filter(
+        question__exam=exam, question__question_type__in=CHOICE_TYPES
+    ).order_by('question_id', 'order', 'id').values_list('id', 'question_id', 'option_text', 'is_correct'))
+    options_by_question = {}
+    option_stats = {}
+    if options:
+        option_ids = np.array([option[0] for option in options], dtype=np.int64)
+        option_sort = np.argsort(option_ids)
+        sorted_option_ids = option_ids[option_sort]
+        flat_selected = selected.ravel()
+        chosen = flat_selected > 0
+        pos = np.searchsorted(sorted_option_ids, flat_selected[chosen]).clip(max=len(options) - 1)
+        valid = sorted_option_ids[pos] == flat_selected[chosen]
+        option_index = option_sort[pos[valid]]
+        chooser = np.nonzero(chosen)[0][valid] // k
+
+        counts = np.bincount(option_index, minlength=len(options))
+        score_sums = np.bincount(option_index, weights=totals[chooser], minlength=len(options))
+        in_upper = np.zeros(n, dtype=bool)
+        in_upper[upper] = True
+        in_lower = np.zeros(n, dtype=bool)
+        in_lower[lower] = True
+        upper_counts = np.bincount(option_index[in_upper[chooser]], minlength=len(options))
+        lower_counts = np.bincount(option_index[in_lower[chooser]], minlength=len(options))
+
+        for idx, (option_id, question_id, option_text, is_correct) in enumerate(options):
+            options_by_question.setdefault(question_id, []).append(option_id)
+            option_stats[option_id] = {
+                'option_id': option_id,
+                'option_text': option_text[:50],
+                'is_correct': is_correct,
+                'count': int(counts[idx]),
+                'proportion': _round(counts[idx] / n),
+                'upper_proportion': _round(upper_counts[idx] / group_size),
+                'lower_proportion': _round(lower_counts[idx] / group_size),
+                'mean_score': _round(score_sums[idx] / counts[idx]) if counts[idx] else None,
+            }
+
+    for col, (question_id, question_text, question_type, marks) in enumerate(questions):
+        item_options = [option_stats[option_id] for option_id in options_by_question.get(question_id, [])]
+
+        flags = []
+        if discrimination[col] < 0:
+            flags.append('negative_discrimination')
+        elif discrimination[col] < LOW_DISCRIMINATION:
+            flags.append('low_discrimination')
+        if p_values[col] >= TOO_EASY:
+            flags.append('too_easy')
+        elif p_values[col] <= TOO_HARD:
+            flags.append('too_hard')
+        if any(
+            not option['is_correct'] and option['upper_proportion'] > option['lower_proportion']
+            for option in item_options
+        ):
+            flags.append('distractor_attracts_upper_group')
+
+        result['items'].append({
+            'question_id': question_id,
+            'question_text': question_text[:50],
+            'question_type': question_type,
+            'max_marks': float(marks),
+            'p_value': _round(p_values[col]),
+            'facility': _round(facility[col]),
+            'discrimination': _round(discrimination[col]),
+            'point_biserial': _round(point_biserial[col]),
+            'flags': flags,
+            'options': item_options,
+        })
+
+    return result
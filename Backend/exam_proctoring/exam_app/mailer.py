@@ -0,0 +1,283 @@
+# backend/exam_app/mailer.py
+"""
+Email outbox
+Emails are queued as OutboxEmail rows and delivered by a background sender.
+The sender claims due rows in batches of EMAIL_BATCH_SIZE and sends them
+over one connection that stays open for the whole run, instead of a new SMTP
+session per message. Failed deliveries are retried with exponential backoff
+up to MAX_TRIES. Each row is marked SENT as soon as the server accepts it;
+rows claimed by a sender that died become due again once the claim expires.
+
+Retries are picked up by a timer while background workers are enabled;
+`python manage.py send_outbox` delivers whatever is due (cron, or after a
+restart).
+"""
+import smtplib
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .background import run_in_background
+from .models import OutboxEmail
+
+MAX_TRIES = 5
+
+# Seconds before the first retry, doubled for every further failure
+RETRY_BASE_DELAY = 60
+RETRY_MAX_DELAY = 60 * 60
+
+# Seconds a sender may hold claimed rows before others may take them over
+CLAIM_TIMEOUT = 15 * 60
+
+QUEUE_BATCH_SIZE = 500
+
+# Rejections that retrying will not fix
+_PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused,)
+
+# Errors that leave the connection usable for the next message
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+_sender_lock = threading.Lock()
+_sender_running = False
+_sender_wake = False
+_retry_timer = None
+
+
+def result_email_context(attempt):
+    user = attempt.user
+    return {
+        'student_name': f'{user.first_name} {user.last_name}'.strip() or user.username,
+        'exam_title': attempt.exam.title,
+        'score': f'{attempt.score or 0:g}',
+        'total_marks': attempt.exam.total_marks,
+        'percentage': attempt.percentage_score,
+        'is_passed': attempt.is_passed,
+        'correct_answers': attempt.correct_answers,
+        'total_questions': attempt.total_questions,
+    }
+
+
+def render_result_email(attempt):
+    """Subject, text body and HTML body of an attempt's results email"""
+    context = result_email_context(attempt)
+    subject = ' '.join(render_to_string('exam_app/emails/results_subject.txt', context).split())
+    body = render_to_string('exam_app/emails/results.txt', context)
+    html_body = render_to_string('exam_app/emails/results.html', context)
+    return subject, body, html_body
+
+
+def queue_result_emails(attempts, created_by=None, resend=False):
+    """
+    Queue results emails for attempts (with user and exam loaded) and start
+    the sender once the transaction commits
+
+    Attempts that already have a queued or sent results email are skipped
+    unless `resend` is set. Returns counts of queued and skipped emails.
+    """
+    result = {'queued': 0, 'skipped_no_email': 0, 'skipped_already_sent': 0}
+    attempts = list(attempts)
+    already = set()
+    if not resend:
+        already = set(OutboxEmail.objects.filter(
+            kind='RESULTS',
+            attempt__in=attempts,
+            status__in=['PENDING', 'SENDING', 'SENT'],
+        ).values_list('attempt_id', flat=True))
+
+    now = timezone.now()
+    batch = []
+    for attempt in attempts:
+        if not attempt.user.email:
+            result['skipped_no_email'] += 1
+            continue
+        if attempt.id in already:
+            result['skipped_already_sent'] += 1
+            continue
+        subject, body, html_body = render_result_email(attempt)
+        batch.append(OutboxEmail(
+            kind='RESULTS',
+            attempt=attempt,
+            recipient=attempt.user.email,
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            next_attempt_at=now,
+            created_by=created_by,
+        ))
+        if len(batch) >= QUEUE_BATCH_SIZE:
+            OutboxEmail.objects.bulk_create(batch)
+            result['queued'] += len(batch)
+            batch = []
+    if batch:
+        OutboxEmail.objects.bulk_create(batch)
+        result['queued'] += len(batch)
+
+    if result['queued']:
+        start_sender()
+    return result
+
+
+def _backoff(tries):
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** (tries - 1), RETRY_MAX_DELAY))
+
+
+def _claim_batch(limit):
+    """Mark up to `limit` due emails as SENDING for this sender and return them"""
+    now = timezone.now()
+    claim_until = now + timedelta(seconds=CLAIM_TIMEOUT)
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(status__in=['PENDING', 'SENDING'], next_attempt_at__lte=now)
+        ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+        # Conditional update: rows another sender claimed meanwhile no longer match
+        due.filter(id__in=ids).update(status='SENDING', next_attempt_at=claim_until)
+    return list(OutboxEmail.objects.filter(
+        id__in=ids, status='SENDING', next_attempt_at=claim_until
+    ).order_by('id'))
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.recipient], connection=connection
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _record_failure(email, error, totals):
+    tries = email.tries + 1
+    if tries >= MAX_TRIES or isinstance(error, _PERMANENT_ERRORS):
+        status, next_attempt_at = 'FAILED', timezone.now()
+        totals['failed'] += 1
+    else:
+        status, next_attempt_at = 'PENDING', timezone.now() + _backoff(tries)
+        totals['retrying'] += 1
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        status=status, tries=tries, next_attempt_at=next_attempt_at, last_error=str(error)[:1000]
+    )
+
+
+def _deliver(connection, emails, totals):
+    for email in emails:
+        try:
+            # No-op while the connection is open; reconnects after a failure
+            connection.open()
+            if not connection.send_messages([_message(email, connection)]):
+                raise smtplib.SMTPException('Message was not accepted')
+        except Exception as e:
+            if not isinstance(e, _MESSAGE_ERRORS):
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            _record_failure(email, e, totals)
+            continue
+        # Recorded straight away, so a sender that dies later in the batch
+        # does not send this one again once the claim expires
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            status='SENT', tries=F('tries') + 1, sent_at=timezone.now(), last_error=''
+        )
+        totals['sent'] += 1
+
+
+def send_due_emails(batch_size=None):
+    """Deliver all due emails in batches over one connection; returns counts"""
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+    connection = get_connection(fail_silently=False)
+    try:
+        while True:
+            emails = _claim_batch(batch_size)
+            if not emails:
+                break
+            _deliver(connection, emails, totals)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return totals
+
+
+def _schedule_retry():
+    """Wake the sender when the next retry is due"""
+    global _retry_timer
+    if settings.BACKGROUND_JOB_WORKERS <= 0:
+        return
+    next_due = OutboxEmail.objects.filter(status__in=['PENDING', 'SENDING']).aggregate(
+        next_due=Min('next_attempt_at')
+    )['next_due']
+    if next_due is None:
+        return
+    delay = max((next_due - timezone.now()).total_seconds(), 1)
+    with _sender_lock:
+        if _retry_timer is not None:
+            _retry_timer.cancel()
+        _retry_timer = threading.Timer(delay, start_sender)
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+
+def _run_sender():
+    global _sender_running, _sender_wake
+    with _sender_lock:
+        if _sender_running:
+            # The running sender makes another pass for the new emails
+            _sender_wake = True
+            return
+        _sender_running = True
+        _sender_wake = False
+
+    try:
+        while True:
+            send_due_emails()
+            with _sender_lock:
+                if not _sender_wake:
+                    _sender_running = False
+                    break
+                _sender_wake = False
+        _schedule_retry()
+    except Exception as e:
+        with _sender_lock:
+            _sender_running = False
+        print(f"Error in email sender: {e}")
+        traceback.print_exc()
+
+
+def start_sender():
+    """Run the sender on the background pool once the current transaction commits"""
+    run_in_background(_run_sender)
+
+
+def outbox_email_data(email):
+    return {
+        'id': email.id,
+        'kind': email.kind,
+        'attempt_id': email.attempt_id,
+        'recipient': email.recipient,
+        'subject': email.subject,
+        'status': email.status,
+        'tries': email.tries,
+        'last_error': email.last_error,
+        'next_attempt_at': email.next_attempt_at.isoformat() if email.status == 'PENDING' else None,
+        'created_at': email.created_at.isoformat() if email.created_at else None,
+        'sent_at': email.sent_at.isoformat() if email.sent_at else None,
+    }
+
+
+def exam_email_summary(exam):
+    """Results email counts per status for an exam, with the latest failures"""
+    emails = OutboxEmail.objects.filter(kind='RESULTS', attempt__exam=exam)
+    counts = {status: 0 for status, _ in OutboxEmail.STATUS_CHOICES}
+    for row in emails.values('status').annotate(count=Count('id')):
+        counts[row['status']] = row['count']
+    return {
+        'exam_id': exam.id,
+        'counts': counts,
+        'failures': [outbox_email_data(email) for email in emails.filter(status='FAILED')[:20]],
+    }
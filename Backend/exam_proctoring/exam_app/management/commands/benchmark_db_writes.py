@@ -0,0 +1,125 @@
+# backend/exam_app/management/commands/benchmark_db_writes.py
+"""
+Concurrent write throughput of the configured database
+Each thread plays one student during an exam: autosave an answer, then log
+an activity, each in its own transaction, as the exam endpoints do. Run it
+once per DATABASE_URL to compare backends. The scratch exam, students and
+everything under them are deleted afterwards.
+"""
+import statistics
+import threading
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, connections, transaction
+from exam_app.models import Answer, Exam, ExamActivityLog, ExamAttempt, Question
+
+User = get_user_model()
+
+QUESTION_COUNT = 10
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent write throughput (answer autosaves and activity logs) of the configured database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent writers (default: 8)")
+        parser.add_argument('--writes', type=int, default=200, help="Autosave + activity log pairs per writer (default: 200)")
+
+    def handle(self, *args, **options):
+        threads, writes = options['threads'], options['writes']
+        if threads < 1 or writes < 1:
+            raise CommandError("--threads and --writes must be positive")
+
+        exam, attempts = self._setup(threads)
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(threads + 1)
+
+        def writer(attempt):
+            answer_ids = list(Answer.objects.filter(attempt=attempt).values_list('id', flat=True))
+            own_latencies, own_errors = [], []
+            start.wait()
+            for idx in range(writes):
+                began = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        Answer.objects.filter(id=answer_ids[idx % len(answer_ids)]).update(answer_text=f'draft {idx}')
+                    with transaction.atomic():
+                        # bulk_create skips post_save: measure the database, not the channel layer
+                        ExamActivityLog.objects.bulk_create([ExamActivityLog(
+                            attempt=attempt, activity_type='ANSWER_CHANGED', description='benchmark'
+                        )])
+                    own_latencies.append(time.perf_counter() - began)
+                except DatabaseError as e:
+                    own_errors.append(str(e))
+            with lock:
+                latencies.extend(own_latencies)
+                errors.extend(own_errors)
+            connection.close()
+
+        workers = [threading.Thread(target=writer, args=(attempt,)) for attempt in attempts]
+        try:
+            for worker in workers:
+                worker.start()
+            start.wait()
+            began = time.perf_counter()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - began
+        finally:
+            close_old_connections()
+            self._teardown(exam, attempts)
+
+        self._report(threads, writes, elapsed, latencies, errors)
+
+    def _setup(self, threads):
+        tag = uuid.uuid4().hex[:8]
+        exam = Exam.objects.create(title=f'DB write benchmark {tag}', is_active=False, auto_calculate_total=False)
+        questions = Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'Question {idx}', question_type='SA', order=idx)
+            for idx in range(QUESTION_COUNT)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'dbbench_{tag}_{idx}', is_active=False) for idx in range(threads)
+        ])
+        if not users[0].pk:
+            # Backends without RETURNING leave bulk-created primary keys unset
+            users = list(User.objects.filter(username__startswith=f'dbbench_{tag}_').order_by('id'))
+            questions = list(exam.questions.order_by('order'))
+        attempts = ExamAttempt.objects.bulk_create([
+            ExamAttempt(user=user, exam=exam, total_questions=QUESTION_COUNT, is_proctored=False)
+            for user in users
+        ])
+        if not attempts[0].pk:
+            attempts = list(ExamAttempt.objects.filter(exam=exam).order_by('id'))
+        Answer.objects.bulk_create([
+            Answer(attempt=attempt, question=question) for attempt in attempts for question in questions
+        ])
+        return exam, attempts
+
+    def _teardown(self, exam, attempts):
+        user_ids = [attempt.user_id for attempt in attempts]
+        exam.delete()
+        User.objects.filter(id__in=user_ids).delete()
+
+    def _report(self, threads, writes, elapsed, latencies, errors):
+        settings_dict = connections['default'].settings_dict
+        self.stdout.write(f"Backend: {connection.vendor} ({settings_dict['NAME']})")
+        self.stdout.write(f"Writers: {threads} x {writes} autosave + activity log pairs")
+        self.stdout.write(f"Elapsed: {elapsed:.2f}s")
+        completed = len(latencies)
+        self.stdout.write(f"Throughput: {completed * 2 / elapsed:.0f} writes/s ({completed / elapsed:.0f} pairs/s)")
+        if completed:
+            ordered = sorted(latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            self.stdout.write(
+                f"Pair latency: p50 {statistics.median(ordered) * 1000:.1f}ms, "
+                f"p95 {p95 * 1000:.1f}ms, max {ordered[-1] * 1000:.1f}ms"
+            )
+        if errors:
+            self.stdout.write(self.style.WARNING(f"Failed pairs: {len(errors)} (first: {errors[0]})"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No failed writes"))
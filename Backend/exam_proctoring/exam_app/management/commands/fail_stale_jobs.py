@@ -0,0 +1,18 @@
+# backend/exam_app/management/commands/fail_stale_jobs.py
+from django.core.management.base import BaseCommand
+from exam_app.background import fail_stale_jobs
+from exam_app.models import CollusionScan, QuestionImportJob, ResultPdfBundle, StudentImportJob
+
+# Job models run on the background worker pool
+JOB_MODELS = (QuestionImportJob, StudentImportJob, CollusionScan, ResultPdfBundle)
+
+
+class Command(BaseCommand):
+    help = "Mark background jobs whose worker process stopped (no heartbeat) as failed"
+
+    def handle(self, *args, **options):
+        for model in JOB_MODELS:
+            failed = fail_stale_jobs(model.objects.all())
+            for job in failed:
+                self.stdout.write(f"{model.__name__} {job.pk}: marked failed")
+        self.stdout.write(self.style.SUCCESS("Stale jobs checked"))
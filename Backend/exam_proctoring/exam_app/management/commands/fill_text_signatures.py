@@ -0,0 +1,18 @@
+# backend/exam_app/management/commands/fill_text_signatures.py
+from django.core.management.base import BaseCommand
+from exam_app.models import Answer
+from exam_app.text_similarity import fill_text_signatures
+
+
+class Command(BaseCommand):
+    help = "Store near-duplicate signatures of text answers saved before they were computed on save"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int, help="Exams to fill (default: all)")
+
+    def handle(self, *args, **options):
+        answers = Answer.objects.all()
+        if options['exam_ids']:
+            answers = answers.filter(attempt__exam_id__in=options['exam_ids'])
+        updated = fill_text_signatures(answers)
+        self.stdout.write(self.style.SUCCESS(f"Stored {updated} signatures"))
@@ -0,0 +1,24 @@
+# backend/exam_app/management/commands/rebuild_exam_stats.py
+from django.core.management.base import BaseCommand, CommandError
+from exam_app.models import Exam
+from exam_app.exam_stats import rebuild_exam_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized analytics tables from attempts and answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int, help="Exams to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.all()
+        if options['exam_ids']:
+            exams = exams.filter(id__in=options['exam_ids'])
+            missing = set(options['exam_ids']) - set(exams.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"Exam(s) not found: {', '.join(map(str, sorted(missing)))}")
+
+        for exam in exams.iterator():
+            score_stats = rebuild_exam_stats(exam)
+            self.stdout.write(f"{exam.id} {exam.title}: {score_stats.attempt_count} completed attempts")
+        self.stdout.write(self.style.SUCCESS("Exam stats rebuilt"))
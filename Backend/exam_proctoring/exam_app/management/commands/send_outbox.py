@@ -0,0 +1,16 @@
+# backend/exam_app/management/commands/send_outbox.py
+from django.core.management.base import BaseCommand
+from exam_app.mailer import send_due_emails
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails that are due (new ones and retries)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Emails sent per connection batch (default: EMAIL_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        totals = send_due_emails(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']}, retrying {totals['retrying']}, failed {totals['failed']}"
+        ))
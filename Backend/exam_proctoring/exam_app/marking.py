@@ -0,0 +1,205 @@
+# backend/exam_app/marking.py
+"""
+Manual marking helpers
+The marking queue lists unmarked SA/TEXT/IMAGE_UPLOAD answers of a question
+grouped by normalized answer text (Answer.answer_key), largest groups first,
+with keyset pagination. Marks are applied to a whole group with one UPDATE,
+and attempt scores are recomputed for all affected attempts with one grouped
+aggregate and one bulk update.
+"""
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+from .analytics import invalidate_student_performance
+from .exam_stats import invalidate_exam_stats, refresh_attempt_stats
+from .models import Answer, ExamAttempt
+
+MANUAL_MARKING_TYPES = ('SA', 'TEXT', 'IMAGE_UPLOAD')
+
+# Attempts refreshed one by one in the materialized stats; larger batches
+# mark the exam stale and leave the rebuild to the next read
+INCREMENTAL_STATS_LIMIT = 20
+
+# Students listed per group in the queue
+GROUP_SAMPLE_SIZE = 10
+
+
+class MarkingError(Exception):
+    """Invalid marking request"""
+    pass
+
+
+def attempt_totals(attempt_ids):
+    """Score, correct/wrong counts and unmarked manual answers per attempt, in one query"""
+    rows = Answer.objects.filter(attempt_id__in=attempt_ids).values('attempt_id').annotate(
+        total=Sum('marks_awarded'),
+        correct=Count('id', filter=Q(is_correct=True)),
+        wrong=Count('id', filter=Q(is_correct=False, marks_awarded__isnull=False)),
+        unmarked=Count('id', filter=Q(
+            question__question_type__in=MANUAL_MARKING_TYPES, marks_awarded__isnull=True
+        )),
+    )
+    return {row['attempt_id']: row for row in rows}
+
+
+def apply_attempt_totals(attempt, totals, update_results_ready=False):
+    """Copy recomputed totals onto an attempt (without saving it)"""
+    totals = totals or {'total': None, 'correct': 0, 'wrong': 0, 'unmarked': 0}
+    attempt.score = float(totals['total'] or 0.0)
+    if attempt.exam.total_marks > 0:
+        attempt.percentage_score = (attempt.score / attempt.exam.total_marks) * 100
+    else:
+        attempt.percentage_score = 0.0
+    attempt.correct_answers = totals['correct']
+    attempt.wrong_answers = totals['wrong']
+    attempt.is_passed = attempt.percentage_score >= attempt.exam.passing_marks if attempt.exam.total_marks > 0 else False
+    if update_results_ready:
+        attempt.results_ready = totals['unmarked'] == 0
+
+
+def recalculate_attempt_scores(attempt_ids, update_results_ready=False):
+    """
+    Recompute and save the scores of many attempts
+
+    Also keeps the exam stats and cached student summaries current, which
+    the per-attempt save() signals would otherwise have done. Returns the
+    updated attempts by id.
+    """
+    attempt_ids = list(set(attempt_ids))
+    if not attempt_ids:
+        return {}
+
+    totals = attempt_totals(attempt_ids)
+    attempts = list(ExamAttempt.objects.filter(id__in=attempt_ids).select_related('exam'))
+    fields = ['score', 'percentage_score', 'correct_answers', 'wrong_answers', 'is_passed']
+    if update_results_ready:
+        fields.append('results_ready')
+    for attempt in attempts:
+        apply_attempt_totals(attempt, totals.get(attempt.id), update_results_ready)
+    ExamAttempt.objects.bulk_update(attempts, fields, batch_size=500)
+
+    if len(attempts) <= INCREMENTAL_STATS_LIMIT:
+        for attempt in attempts:
+            refresh_attempt_stats(attempt)
+    else:
+        for exam_id in {attempt.exam_id for attempt in attempts}:
+            invalidate_exam_stats(exam_id)
+    invalidate_student_performance(*{attempt.user_id for attempt in attempts})
+    return {attempt.id: attempt for attempt in attempts}
+
+
+def _group_field(question):
+    # Image answers have no text to group by: each one is its own group
+    return 'id' if question.question_type == 'IMAGE_UPLOAD' else 'answer_key'
+
+
+def _pending_answers(question):
+    return Answer.objects.filter(question=question, attempt__status='COMPLETED', is_manually_marked=False)
+
+
+def parse_queue_cursor(cursor):
+    """Split a 'size:key' cursor; raises MarkingError if malformed"""
+    try:
+        size, key = cursor.split(':', 1)
+        return int(size), key
+    except (AttributeError, ValueError):
+        raise MarkingError('Invalid cursor')
+
+
+def marking_queue(question, cursor=None, limit=50):
+    """
+    One page of unmarked answers for a question, grouped by answer text
+
+    Groups are ordered by size (largest first) and key; `cursor` is the
+    `next_cursor` of the previous page.
+    """
+    if question.question_type not in MANUAL_MARKING_TYPES:
+        raise MarkingError('Question does not need manual marking')
+
+    group_field = _group_field(question)
+    pending = _pending_answers(question)
+    groups = pending.values(group_field).annotate(size=Count('id'), first_id=Min('id')).order_by('-size', group_field)
+    if cursor:
+        size, key = parse_queue_cursor(cursor)
+        if group_field == 'id':
+            try:
+                key = int(key)
+            except ValueError:
+                raise MarkingError('Invalid cursor')
+        groups = groups.filter(Q(size__lt=size) | Q(size=size, **{f'{group_field}__gt': key}))
+
+    page = list(groups[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    members = {}
+    answers = pending.filter(**{f'{group_field}__in': [group[group_field] for group in page]}).values_list(
+        group_field, 'id', 'attempt_id', 'attempt__user__username', 'answer_text'
+    ).order_by('id')
+    for key, answer_id, attempt_id, username, answer_text in answers:
+        members.setdefault(key, []).append((answer_id, attempt_id, username, answer_text))
+
+    result_groups = []
+    for group in page:
+        key = group[group_field]
+        group_answers = members.get(key, [])
+        result_groups.append({
+            'key': str(key),
+            'size': group['size'],
+            'answer_text': group_answers[0][3] if group_answers else '',
+            'answer_ids': [answer[0] for answer in group_answers],
+            'students': [
+                {'answer_id': answer_id, 'attempt_id': attempt_id, 'student_name': username}
+                for answer_id, attempt_id, username, _ in group_answers[:GROUP_SAMPLE_SIZE]
+            ],
+        })
+
+    last = page[-1] if page else None
+    return {
+        'question_id': question.id,
+        'question_text': question.question_text,
+        'question_type': question.question_type,
+        'max_marks': float(question.marks),
+        'pending_count': pending.count(),
+        'groups': result_groups,
+        'next_cursor': f"{last['size']}:{last[group_field]}" if has_more else None,
+    }
+
+
+def mark_answer_group(question, marks_awarded, key=None, answer_ids=None, is_correct=None):
+    """
+    Give every answer of a queue group (or an explicit id list) the same marks
+
+    `key` selects the still unmarked answers of a group; `answer_ids` may
+    also re-mark answers of the question that were marked before. Returns
+    the number of answers marked and the recomputed attempts by id.
+    """
+    if question.question_type not in MANUAL_MARKING_TYPES:
+        raise MarkingError('Question does not need manual marking')
+    max_marks = float(question.marks)
+    try:
+        marks_awarded = float(marks_awarded)
+    except (TypeError, ValueError):
+        raise MarkingError('marks_awarded must be a number')
+    if marks_awarded < 0 or marks_awarded > max_marks:
+        raise MarkingError(f'Marks must be between 0 and {max_marks}')
+
+    if answer_ids is not None:
+        answers = Answer.objects.filter(question=question, attempt__status='COMPLETED', id__in=answer_ids)
+    elif key is not None:
+        answers = _pending_answers(question).filter(**{_group_field(question): key})
+    else:
+        raise MarkingError('key or answer_ids is required')
+
+    with transaction.atomic():
+        rows = list(answers.select_for_update().values_list('id', 'attempt_id'))
+        marked = Answer.objects.filter(id__in=[answer_id for answer_id, _ in rows]).update(
+            marks_awarded=marks_awarded,
+            is_correct=marks_awarded > 0 if is_correct is None else bool(is_correct),
+            is_manually_marked=True,
+            updated_at=timezone.now(),
+        )
+        attempts = recalculate_attempt_scores(
+            [attempt_id for _, attempt_id in rows], update_results_ready=True
+        )
+    return marked, attempts
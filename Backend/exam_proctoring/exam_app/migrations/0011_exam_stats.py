@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0010_questionimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats_snapshot', to='exam_app.examattempt')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamQuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered_count', models.IntegerField(default=0)),
+                ('correct_count', models.IntegerField(default=0)),
+                ('marked_count', models.IntegerField(default=0, help_text='Answers with marks_awarded set')),
+                ('marks_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_stats', to='exam_app.exam')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='exam_app.question')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamScoreStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_marks', models.IntegerField(default=0, help_text='Exam total marks the grade distribution was built for')),
+                ('attempt_count', models.IntegerField(default=0)),
+                ('passed_count', models.IntegerField(default=0)),
+                ('scored_count', models.IntegerField(default=0, help_text='Attempts with a score')),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_min', models.FloatField(blank=True, null=True)),
+                ('score_max', models.FloatField(blank=True, null=True)),
+                ('duration_count', models.IntegerField(default=0)),
+                ('duration_sum_seconds', models.FloatField(default=0)),
+                ('grade_distribution', models.JSONField(blank=True, default=dict)),
+                ('score_distribution', models.JSONField(blank=True, default=dict)),
+                ('is_stale', models.BooleanField(default=False, help_text='Rebuilt from scratch on next read')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_stats', to='exam_app.exam')),
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0011_exam_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollusionScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('min_shared_wrong', models.IntegerField(default=5, help_text='Identical wrong answers needed before a pair is considered')),
+                ('candidates', models.IntegerField(default=0)),
+                ('questions', models.IntegerField(default=0)),
+                ('flagged_count', models.IntegerField(default=0)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collusion_scans', to='exam_app.exam')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CollusionPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shared_wrong', models.IntegerField(help_text='Questions where both chose the same wrong option')),
+                ('both_wrong', models.IntegerField(help_text='Questions both answered wrongly')),
+                ('differences', models.IntegerField(help_text='Questions both answered with different options')),
+                ('similarity_index', models.FloatField(help_text='Identical wrong answers per difference (Harpp-Hogan ratio)')),
+                ('rank', models.IntegerField()),
+                ('attempt_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exam_app.examattempt')),
+                ('attempt_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exam_app.examattempt')),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairs', to='exam_app.collusionscan')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='collusionscan',
+            index=models.Index(fields=['exam', 'status', 'created_at'], name='exam_app_co_exam_id_2418b7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collusionpair',
+            index=models.Index(fields=['scan', 'rank'], name='exam_app_co_scan_id_726082_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collusionpair',
+            index=models.Index(fields=['attempt_a'], name='exam_app_co_attempt_05d779_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collusionpair',
+            index=models.Index(fields=['attempt_b'], name='exam_app_co_attempt_151697_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0012_collusion_scan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='text_signature',
+            field=models.BinaryField(blank=True, help_text='MinHash signature of answer_text for near-duplicate detection', null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:50
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def answer_text_key(text):
+    # Frozen copy of exam_app.text_similarity.answer_text_key
+    normalized = _NON_WORD.sub(' ', (text or '').casefold()).strip()
+    if not normalized:
+        return ''
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def fill_answer_keys(apps, schema_editor):
+    Answer = apps.get_model('exam_app', 'Answer')
+    batch = []
+    for answer in Answer.objects.exclude(answer_text='').only('id', 'answer_text').iterator(chunk_size=2000):
+        answer.answer_key = answer_text_key(answer.answer_text)
+        batch.append(answer)
+        if len(batch) >= 1000:
+            Answer.objects.bulk_update(batch, ['answer_key'])
+            batch = []
+    Answer.objects.bulk_update(batch, ['answer_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0013_answer_text_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='answer_key',
+            field=models.CharField(blank=True, editable=False, help_text='Digest of the normalized answer_text, used to group identical answers for marking', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'is_manually_marked', 'answer_key'], name='exam_app_an_questio_6d61de_idx'),
+        ),
+        migrations.RunPython(fill_answer_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0014_answer_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examactivitylog',
+            index=models.Index(fields=['attempt', '-timestamp', '-id'], name='exam_app_ex_attempt_ca908f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', '-start_time', '-id'], name='exam_app_ex_exam_id_ce5bb0_idx'),
+        ),
+    ]
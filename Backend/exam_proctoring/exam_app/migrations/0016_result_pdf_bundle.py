@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:02
+
+import django.db.models.deletion
+import exam_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0015_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultPdfBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('file', models.FileField(blank=True, storage=exam_app.models.result_pdf_storage, upload_to='bundles/')),
+                ('total', models.IntegerField(default=0, help_text='Released attempts to render')),
+                ('processed', models.IntegerField(default=0)),
+                ('rendered', models.IntegerField(default=0, help_text='PDFs rendered for this bundle (the rest came from the cache)')),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_pdf_bundles', to='exam_app.exam')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['exam', 'status', 'created_at'], name='exam_app_re_exam_id_af8665_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0017_outbox_email'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examactivitylog',
+            name='activity_type',
+            field=models.CharField(choices=[('ANSWER_SUBMITTED', 'Answer Submitted'), ('ANSWER_CHANGED', 'Answer Changed'), ('QUESTION_VIEWED', 'Question Viewed'), ('EXAM_STARTED', 'Exam Started'), ('EXAM_SUBMITTED', 'Exam Submitted'), ('TAB_SWITCHED', 'Tab Switched'), ('WINDOW_FOCUS_LOST', 'Window Focus Lost'), ('WINDOW_FOCUS_GAINED', 'Window Focus Gained'), ('COPY_ATTEMPTED', 'Copy Attempted'), ('PASTE_ATTEMPTED', 'Paste Attempted'), ('RIGHT_CLICK', 'Right Click Detected'), ('KEYBOARD_SHORTCUT', 'Keyboard Shortcut Used'), ('RESULTS_RELEASED', 'Results Released'), ('RESULTS_UNRELEASED', 'Results Unreleased')], max_length=30),
+        ),
+    ]
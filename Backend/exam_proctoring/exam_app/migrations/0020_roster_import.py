@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0019_student_import_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentimportjob',
+            name='exams',
+            field=models.ManyToManyField(blank=True, help_text='Exams the imported students are enrolled in', related_name='student_import_jobs', to='exam_app.exam'),
+        ),
+        migrations.AddField(
+            model_name='studentimportjob',
+            name='file',
+            field=models.FileField(blank=True, help_text='Uploaded CSV/XLSX roster, removed once the import finishes', upload_to='student_imports/'),
+        ),
+        migrations.AddField(
+            model_name='studentimportjob',
+            name='file_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='studentimportjob',
+            name='results_file',
+            field=models.FileField(blank=True, help_text='CSV with the outcome of every row', upload_to='student_imports/results/'),
+        ),
+        migrations.AddField(
+            model_name='studentimportjob',
+            name='update_existing',
+            field=models.BooleanField(default=False, help_text='Update students whose username already exists instead of skipping them'),
+        ),
+        migrations.CreateModel(
+            name='ExamEnrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enrolled_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='exam_app.exam')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('exam', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0020_roster_import'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='enrollment_required',
+            field=models.BooleanField(default=False, help_text='Only enrolled students can see and start the exam'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['is_active', 'enrollment_required', 'end_time'], name='exam_app_ex_is_acti_30e954_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examenrollment',
+            index=models.Index(fields=['user', 'exam'], name='exam_app_ex_user_id_a765e5_idx'),
+        ),
+    ]
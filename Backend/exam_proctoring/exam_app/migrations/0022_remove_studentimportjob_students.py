@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0021_exam_enrollment'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='studentimportjob',
+            name='students',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:04
+
+import os
+import shutil
+import exam_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_out_of_media(apps, schema_editor):
+    """Move import files out of the public MEDIA_ROOT; drop uploads of finished jobs"""
+    StudentImportJob = apps.get_model('exam_app', 'StudentImportJob')
+    for job in StudentImportJob.objects.exclude(file='', results_file=''):
+        if job.file.name:
+            source = os.path.join(settings.MEDIA_ROOT, job.file.name)
+            if job.status in ('COMPLETED', 'FAILED'):
+                if os.path.exists(source):
+                    os.remove(source)
+                job.file = ''
+            elif os.path.exists(source):
+                target = os.path.join(settings.IMPORT_FILES_DIR, job.file.name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(source, target)
+        if job.results_file.name:
+            source = os.path.join(settings.MEDIA_ROOT, job.results_file.name)
+            if os.path.exists(source):
+                target = os.path.join(settings.IMPORT_FILES_DIR, job.results_file.name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(source, target)
+        job.save(update_fields=['file'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0022_remove_studentimportjob_students'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentimportjob',
+            name='file',
+            field=models.FileField(blank=True, help_text='Uploaded CSV/XLSX roster, removed once the import finishes', storage=exam_app.models.import_file_storage, upload_to='student_imports/'),
+        ),
+        migrations.AlterField(
+            model_name='studentimportjob',
+            name='results_file',
+            field=models.FileField(blank=True, help_text='CSV with the outcome of every row', storage=exam_app.models.import_file_storage, upload_to='student_imports/results/'),
+        ),
+        migrations.RunPython(move_out_of_media, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:05
+
+import os
+import shutil
+import exam_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_out_of_media(apps, schema_editor):
+    """Move pending uploads out of the public MEDIA_ROOT; drop those of finished jobs"""
+    QuestionImportJob = apps.get_model('exam_app', 'QuestionImportJob')
+    for job in QuestionImportJob.objects.exclude(file=''):
+        source = os.path.join(settings.MEDIA_ROOT, job.file.name)
+        if job.status in ('COMPLETED', 'FAILED'):
+            if os.path.exists(source):
+                os.remove(source)
+            job.file = ''
+            job.save(update_fields=['file'])
+        elif os.path.exists(source):
+            target = os.path.join(settings.IMPORT_FILES_DIR, job.file.name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(source, target)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0023_private_student_import_files'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questionimportjob',
+            name='file',
+            field=models.FileField(blank=True, help_text='Uploaded file, removed once the import finishes', storage=exam_app.models.import_file_storage, upload_to='question_imports/'),
+        ),
+        migrations.RunPython(move_out_of_media, migrations.RunPython.noop),
+    ]
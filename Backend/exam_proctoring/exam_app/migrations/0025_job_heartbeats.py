@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0024_private_question_import_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionimportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Refreshed while a worker runs the job', null=True),
+        ),
+        migrations.AddField(
+            model_name='studentimportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Refreshed while a worker runs the job', null=True),
+        ),
+    ]
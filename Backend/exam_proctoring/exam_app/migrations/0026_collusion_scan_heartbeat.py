@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0025_job_heartbeats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collusionscan',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Refreshed while a worker runs the scan', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0026_collusion_scan_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultpdfbundle',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Refreshed while a worker renders the bundle', null=True),
+        ),
+    ]
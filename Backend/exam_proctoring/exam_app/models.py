@@ -2,6 +2,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 import random
 
 # Get the user model
@@ -36,6 +37,13 @@ class Exam(models.Model):
     enable_partial_marking = models.BooleanField(default=False, help_text="Enable partial marks for partially correct answers")
     auto_calculate_total = models.BooleanField(default=True, help_text="Automatically calculate total marks from questions")
     metadata = models.JSONField(default=dict, blank=True, help_text="Additional data like retake requests, tags, etc.")
+    enrollment_required = models.BooleanField(default=False, help_text="Only enrolled students can see and start the exam")
+    
+    class Meta:
+        indexes = [
+            # Exam list: active, unfinished exams open to everyone
+            models.Index(fields=['is_active', 'enrollment_required', 'end_time']),
+        ]
     
     def calculate_total_marks(self):
         """Calculate total marks from all questions"""
@@ -92,6 +100,8 @@ class ExamAttempt(models.Model):
             models.Index(fields=['user', 'exam']),
             models.Index(fields=['status']),
             models.Index(fields=['exam', 'status']),
+            # Keyset pagination of an exam's attempts, newest first
+            models.Index(fields=['exam', '-start_time', '-id']),
         ]
 
     def calculate_score(self):
@@ -211,12 +221,15 @@ class Answer(models.Model):
     solution_text = models.TextField(blank=True, null=True, help_text="Correct solution explanation")
     is_manually_marked = models.BooleanField(default=False, help_text="Whether this answer was manually marked by admin")
     needs_manual_marking = models.BooleanField(default=False, help_text="Whether this question type requires manual marking")
+    text_signature = models.BinaryField(null=True, blank=True, editable=False, help_text="MinHash signature of answer_text for near-duplicate detection")
+    answer_key = models.CharField(max_length=16, blank=True, editable=False, help_text="Digest of the normalized answer_text, used to group identical answers for marking")
     
     class Meta:
         unique_together = ['attempt', 'question']
         indexes = [
             models.Index(fields=['attempt', 'question']),
             models.Index(fields=['is_correct']),
+            models.Index(fields=['question', 'is_manually_marked', 'answer_key']),
         ]
 
     def save(self, *args, **kwargs):
@@ -268,6 +281,17 @@ class Answer(models.Model):
             if not preserve_manual_marks:
                 self.marks_awarded = 0.0
         
+        # Keep the marking queue's grouping key and the near-duplicate
+        # signature in step with the text
+        if update_fields is None or 'answer_text' in update_fields:
+            from .text_similarity import answer_text_key, answer_text_signature
+            self.answer_key = answer_text_key(self.answer_text)
+            self.text_signature = answer_text_signature(self.answer_text, self.question.question_type)
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + [
+                    field for field in ('answer_key', 'text_signature') if field not in update_fields
+                ]
+        
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -337,6 +361,8 @@ class ExamActivityLog(models.Model):
         ('PASTE_ATTEMPTED', 'Paste Attempted'),
         ('RIGHT_CLICK', 'Right Click Detected'),
         ('KEYBOARD_SHORTCUT', 'Keyboard Shortcut Used'),
+        ('RESULTS_RELEASED', 'Results Released'),
+        ('RESULTS_UNRELEASED', 'Results Unreleased'),
     ]
     
     attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='activity_logs')
@@ -351,8 +377,277 @@ class ExamActivityLog(models.Model):
         indexes = [
             models.Index(fields=['attempt', 'timestamp']),
             models.Index(fields=['activity_type', 'timestamp']),
+            # Keyset pagination of an attempt's activities, newest first
+            models.Index(fields=['attempt', '-timestamp', '-id']),
         ]
     
     def __str__(self):
         return f"{self.attempt.user.username} - {self.activity_type} at {self.timestamp}"
 
+
+def import_file_storage():
+    # Kept out of MEDIA_ROOT: uploads and reports hold student details and
+    # unreleased questions, and are only served through authenticated views
+    return FileSystemStorage(location=settings.IMPORT_FILES_DIR)
+
+
+class QuestionImportJob(models.Model):
+    """Background question import started from the admin panel"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='import_jobs')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    file = models.FileField(upload_to='question_imports/', storage=import_file_storage, blank=True, help_text="Uploaded file, removed once the import finishes")
+    file_name = models.CharField(max_length=255, blank=True)
+    overwrite = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    processed = models.IntegerField(default=0, help_text="Rows/questions processed so far")
+    imported = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Refreshed while a worker runs the job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['exam', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Import {self.file_name or self.id} into {self.exam.title} - {self.status}"
+
+
+class StudentImportJob(models.Model):
+    """Background bulk import of student accounts"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='student_import_jobs')
+    file = models.FileField(upload_to='student_imports/', storage=import_file_storage, blank=True, help_text="Uploaded CSV/XLSX roster, removed once the import finishes")
+    file_name = models.CharField(max_length=255, blank=True)
+    update_existing = models.BooleanField(default=False, help_text="Update students whose username already exists instead of skipping them")
+    exams = models.ManyToManyField(Exam, blank=True, related_name='student_import_jobs', help_text="Exams the imported students are enrolled in")
+    results_file = models.FileField(upload_to='student_imports/results/', storage=import_file_storage, blank=True, help_text="CSV with the outcome of every row")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    processed = models.IntegerField(default=0)
+    imported = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Refreshed while a worker runs the job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Student import {self.id} - {self.status}"
+
+
+class ExamEnrollment(models.Model):
+    """A student enrolled in an exam"""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='enrollments')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='exam_enrollments')
+    enrolled_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['exam', 'user']
+        indexes = [
+            # A student's enrolments (exam list, start checks)
+            models.Index(fields=['user', 'exam']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} enrolled in {self.exam.title}"
+
+
+# Materialized analytics, maintained by exam_app/exam_stats.py
+class ExamScoreStats(models.Model):
+    """Running totals over the completed attempts of an exam"""
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, related_name='score_stats')
+    total_marks = models.IntegerField(default=0, help_text="Exam total marks the grade distribution was built for")
+    attempt_count = models.IntegerField(default=0)
+    passed_count = models.IntegerField(default=0)
+    scored_count = models.IntegerField(default=0, help_text="Attempts with a score")
+    score_sum = models.FloatField(default=0)
+    score_min = models.FloatField(null=True, blank=True)
+    score_max = models.FloatField(null=True, blank=True)
+    duration_count = models.IntegerField(default=0)
+    duration_sum_seconds = models.FloatField(default=0)
+    grade_distribution = models.JSONField(default=dict, blank=True)
+    score_distribution = models.JSONField(default=dict, blank=True)
+    is_stale = models.BooleanField(default=False, help_text="Rebuilt from scratch on next read")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Score stats for {self.exam.title}"
+
+
+class ExamQuestionStats(models.Model):
+    """Running answer totals for one question over completed attempts"""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='question_stats')
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='stats')
+    answered_count = models.IntegerField(default=0)
+    correct_count = models.IntegerField(default=0)
+    marked_count = models.IntegerField(default=0, help_text="Answers with marks_awarded set")
+    marks_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+
+
+class AttemptStatsSnapshot(models.Model):
+    """What an attempt currently contributes to its exam's stats"""
+    attempt = models.OneToOneField(ExamAttempt, on_delete=models.CASCADE, related_name='stats_snapshot')
+    data = models.JSONField(default=dict, blank=True)
+    
+    def __str__(self):
+        return f"Stats snapshot for attempt {self.attempt_id}"
+
+
+class CollusionScan(models.Model):
+    """Exam-level comparison of answer patterns between completed attempts"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='collusion_scans')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    min_shared_wrong = models.IntegerField(default=5, help_text="Identical wrong answers needed before a pair is considered")
+    candidates = models.IntegerField(default=0)
+    questions = models.IntegerField(default=0)
+    flagged_count = models.IntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Refreshed while a worker runs the scan")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['exam', 'status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Collusion scan for {self.exam.title} - {self.status}"
+
+
+class CollusionPair(models.Model):
+    """Pair of attempts with suspiciously similar wrong answers"""
+    scan = models.ForeignKey(CollusionScan, on_delete=models.CASCADE, related_name='pairs')
+    attempt_a = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='+')
+    attempt_b = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='+')
+    shared_wrong = models.IntegerField(help_text="Questions where both chose the same wrong option")
+    both_wrong = models.IntegerField(help_text="Questions both answered wrongly")
+    differences = models.IntegerField(help_text="Questions both answered with different options")
+    similarity_index = models.FloatField(help_text="Identical wrong answers per difference (Harpp-Hogan ratio)")
+    rank = models.IntegerField()
+    
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['scan', 'rank']),
+            models.Index(fields=['attempt_a']),
+            models.Index(fields=['attempt_b']),
+        ]
+    
+    def __str__(self):
+        return f"Attempts {self.attempt_a_id} / {self.attempt_b_id} ({self.similarity_index:.2f})"
+
+
+def result_pdf_storage():
+    # Kept out of MEDIA_ROOT: the files hold student results
+    return FileSystemStorage(location=settings.PDF_CACHE_DIR)
+
+
+class ResultPdfBundle(models.Model):
+    """ZIP of the result sheet PDFs of an exam's released attempts"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='result_pdf_bundles')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to='bundles/', storage=result_pdf_storage, blank=True)
+    total = models.IntegerField(default=0, help_text="Released attempts to render")
+    processed = models.IntegerField(default=0)
+    rendered = models.IntegerField(default=0, help_text="PDFs rendered for this bundle (the rest came from the cache)")
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Refreshed while a worker renders the bundle")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['exam', 'status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Result PDFs for {self.exam.title} - {self.status}"
+
+
+class OutboxEmail(models.Model):
+    """Queued email, delivered by exam_app/mailer.py"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('RESULTS', 'Exam results'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='RESULTS')
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, null=True, blank=True, related_name='emails')
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    tries = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(help_text="When a pending email is due, or when a claim on a sending one expires")
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['attempt', 'kind', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {self.recipient} - {self.status}"
@@ -0,0 +1,185 @@
+# backend/exam_app/pagination.py
+"""
+Keyset (cursor) pagination and list filters for admin listings
+A page is fetched with `WHERE (ordering) < (last row) ORDER BY ordering
+LIMIT n`, so with a matching index every page costs the same however much
+history has accumulated. Cursors are opaque base64 strings holding the
+ordering values of the last row of the previous page; the last ordering
+field must be unique (normally the primary key) and none may be null.
+
+List endpoints keep returning a JSON array and expose the next page through
+the X-Next-Cursor and Link response headers.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    """Invalid cursor, limit or filter value"""
+    pass
+
+
+def _ordering_fields(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _model_field(model, path):
+    """Resolve a (possibly related) field path such as 'user__username'"""
+    field = None
+    for part in path.split('__'):
+        field = model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, (datetime, date)) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Turn a cursor back into typed ordering values"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        fields = _ordering_fields(ordering)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [_model_field(model, name).to_python(value) for (name, _), value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError, FieldDoesNotExist):
+        raise PaginationError('Invalid cursor')
+
+
+def _after(ordering, values):
+    """Rows strictly after `values` in `ordering` (row-value comparison)"""
+    condition = Q()
+    fields = _ordering_fields(ordering)
+    for idx, (name, descending) in enumerate(fields):
+        equal = {fields[prev][0]: values[prev] for prev in range(idx)}
+        beyond = {f'{name}__{"lt" if descending else "gt"}': values[idx]}
+        condition |= Q(**equal, **beyond)
+    return condition
+
+
+def _row_value(row, name):
+    for part in name.split('__'):
+        row = getattr(row, part)
+    return row
+
+
+def page_limit(params, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    limit = params.get('limit')
+    if limit in (None, ''):
+        return default
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    return min(max(limit, 1), maximum)
+
+
+def paginate(queryset, params, ordering, default_limit=DEFAULT_PAGE_SIZE, max_limit=MAX_PAGE_SIZE):
+    """
+    Fetch one page of `queryset` ordered by `ordering`
+
+    `params` is a dict-like (request.GET or a WebSocket message) with the
+    optional `cursor` and `limit`. Returns (rows, next_cursor), where
+    next_cursor is None on the last page.
+    """
+    limit = page_limit(params, default_limit, max_limit)
+    queryset = queryset.order_by(*ordering)
+    cursor = params.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([_row_value(last, name) for name, _ in _ordering_fields(ordering)])
+
+
+def _parse_bound(value, end_of_day=False):
+    """Parse an ISO date or datetime filter value into an aware datetime"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _choice_value(field, item):
+    item = str(item).strip()
+    if field.get_internal_type() == 'BooleanField':
+        # Accept ?is_active=true as well as Django's True/1
+        item = {'true': 'True', 'false': 'False'}.get(item.lower(), item)
+    return item
+
+
+def filter_queryset(queryset, params, choices=None, date_field=None, search_fields=()):
+    """
+    Apply the shared list filters
+
+    - `choices` maps query parameters to model fields; values may be comma
+      separated (e.g. ?status=COMPLETED,TERMINATED).
+    - `date_field` is filtered by ?since= and ?until= (ISO date or datetime;
+      a bare `until` date includes the whole day).
+    - ?search= matches any of `search_fields` case-insensitively.
+    """
+    for param, field_name in (choices or {}).items():
+        value = params.get(param)
+        if value in (None, ''):
+            continue
+        field = _model_field(queryset.model, field_name)
+        items = value if isinstance(value, (list, tuple)) else str(value).split(',')
+        try:
+            values = [field.to_python(_choice_value(field, item)) for item in items if str(item).strip()]
+        except ValidationError:
+            raise PaginationError(f'Invalid value for {param}')
+        queryset = queryset.filter(**{f'{field_name}__in': values})
+
+    if date_field:
+        for param, lookup, end_of_day in (('since', 'gte', False), ('until', 'lte', True)):
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                bound = _parse_bound(value, end_of_day)
+            except ValueError:
+                raise PaginationError(f'{param} must be an ISO date or datetime')
+            queryset = queryset.filter(**{f'{date_field}__{lookup}': bound})
+
+    search = (params.get('search') or '').strip()
+    if search and search_fields:
+        condition = Q()
+        for field_name in search_fields:
+            condition |= Q(**{f'{field_name}__icontains': search})
+        queryset = queryset.filter(condition)
+
+    return queryset
+
+
+def page_response(request, rows, next_cursor):
+    """Response with a JSON array body and next-page headers"""
+    response = Response(rows)
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
+    return response
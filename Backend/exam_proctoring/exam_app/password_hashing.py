@@ -0,0 +1,70 @@
+# backend/exam_app/password_hashing.py
+"""
+Password hashing spread over worker processes
+Hashing is deliberately slow (PBKDF2 runs hundreds of thousands of
+iterations), so bulk account imports hash on a bounded pool of processes
+instead of one password at a time in the request thread.
+
+The worker function must not need Django settings: the pool's processes are
+spawned and never set Django up. They are given the dotted path of the
+configured default hasher and salt and encode with it directly, producing
+the same encoded passwords as make_password().
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.utils.module_loading import import_string
+
+# Passwords sent to a worker process at a time
+HASH_CHUNK_SIZE = 25
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hash_chunk(hasher_path, passwords):
+    hasher = import_string(hasher_path)()
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the web process runs threads and event loops
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def hash_passwords(passwords):
+    """
+    Encoded passwords for `passwords`, in order, hashed with the default
+    hasher on PASSWORD_HASH_WORKERS processes (0 hashes in this thread)
+    """
+    hasher = get_hasher('default')
+    hasher_path = f'{type(hasher).__module__}.{type(hasher).__qualname__}'
+    chunks = [passwords[idx:idx + HASH_CHUNK_SIZE] for idx in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    if settings.PASSWORD_HASH_WORKERS <= 0 or len(chunks) <= 1:
+        return [hasher.encode(password, hasher.salt()) for password in passwords]
+    try:
+        results = _get_pool().map(_hash_chunk, [hasher_path] * len(chunks), chunks)
+        return [encoded for chunk in results for encoded in chunk]
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time
+        _reset_pool()
+        print("Error in password hashing pool, hashing in process")
+        return [hasher.encode(password, hasher.salt()) for password in passwords]
@@ -0,0 +1,229 @@
+# backend/exam_app/pdf.py
+"""
+Minimal pure-Python PDF writer and the result sheet layout
+Only the standard Helvetica fonts are used, so no font files or third-party
+libraries are needed. Text is wrapped with the Helvetica metrics and laid out
+top to bottom over as many A4 pages as it takes; page content is deflated.
+
+This module must not import Django: render_result_sheet() runs in worker
+processes that never set Django up.
+"""
+import zlib
+
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 50
+
+LINE_SPACING = 1.3
+
+# Advance widths (1/1000 em) of ASCII 32-126 in Helvetica and Helvetica-Bold
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+# Used for characters outside ASCII
+_DEFAULT_WIDTH = 556
+
+_FONTS = {False: ('F1', _HELVETICA_WIDTHS), True: ('F2', _HELVETICA_BOLD_WIDTHS)}
+
+
+def _encode(text):
+    """Text as WinAnsi bytes; characters the encoding lacks become '?'"""
+    return text.encode('cp1252', errors='replace')
+
+
+def text_width(text, size, bold=False):
+    widths = _FONTS[bold][1]
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += widths[code - 32] if 32 <= code <= 126 else _DEFAULT_WIDTH
+    return total * size / 1000
+
+
+def wrap_text(text, width, size, bold=False):
+    """Split text into lines no wider than `width` points"""
+    space = text_width(' ', size, bold)
+    lines = []
+    for paragraph in (text or '').replace('\r\n', '\n').replace('\t', '    ').split('\n'):
+        line, line_width = [], 0
+        for word in paragraph.split(' '):
+            word_width = text_width(word, size, bold)
+            if not line or line_width + space + word_width <= width:
+                if line:
+                    line_width += space
+                line.append(word)
+                line_width += word_width
+                if line_width <= width:
+                    continue
+                # A single word wider than the line
+                line.pop()
+                line_width = 0
+            if line:
+                lines.append(' '.join(line))
+            # Break words that are wider than a whole line
+            while word_width > width:
+                cut, cut_width = 0, 0
+                while cut < len(word) - 1:
+                    char_width = text_width(word[cut], size, bold)
+                    if cut and cut_width + char_width > width:
+                        break
+                    cut_width += char_width
+                    cut += 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = text_width(word, size, bold)
+            line, line_width = [word], word_width
+        lines.append(' '.join(line))
+    return lines
+
+
+def _escape(data):
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class PDFDocument:
+    """Flowing text document: add paragraphs and rules, then render()"""
+
+    def __init__(self, title=''):
+        self.title = title
+        self.pages = []
+        self._new_page()
+
+    def _new_page(self):
+        self._ops = []
+        self.pages.append(self._ops)
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def _ensure(self, height):
+        if self._y - height < MARGIN:
+            self._new_page()
+
+    def space(self, height):
+        self._y -= height
+
+    def text(self, text, size=10, bold=False, indent=0, color=None):
+        """Add a wrapped paragraph"""
+        leading = size * LINE_SPACING
+        font = _FONTS[bold][0]
+        for line in wrap_text(str(text), PAGE_WIDTH - 2 * MARGIN - indent, size, bold):
+            self._ensure(leading)
+            self._y -= leading
+            fill = '%.3f %.3f %.3f rg ' % color if color else ''
+            self._ops.append(
+                b'BT ' + fill.encode() + b'/%s %.1f Tf %.2f %.2f Td (' % (font.encode(), size, MARGIN + indent, self._y)
+                + _escape(_encode(line)) + b') Tj ET'
+            )
+
+    def rule(self):
+        """Horizontal line across the text area"""
+        self._ensure(8)
+        self._y -= 4
+        self._ops.append(b'0.6 G 0.5 w %.2f %.2f m %.2f %.2f l S 0 G' % (
+            MARGIN, self._y, PAGE_WIDTH - MARGIN, self._y
+        ))
+        self._y -= 4
+
+    def render(self):
+        """The document as PDF bytes"""
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,  # page tree, filled in once the page ids are known
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+            b'<< /Title (' + _escape(_encode(self.title)) + b') /Producer (exam_proctoring) >>',
+        ]
+        page_ids = []
+        total = len(self.pages)
+        for number, ops in enumerate(self.pages, start=1):
+            footer = b'BT /F1 8 Tf 0.4 g %.2f %.2f Td (Page %d of %d) Tj ET' % (
+                PAGE_WIDTH - MARGIN - 60, MARGIN / 2, number, total
+            )
+            content = zlib.compress(b'\n'.join(ops + [footer]))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream')
+            content_id = len(objects)
+            objects.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] '
+                b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+            )
+            page_ids.append(len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids)
+        )
+
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            output += b'%010d 00000 n \n' % offset
+        output += b'trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            len(objects) + 1, xref
+        )
+        return bytes(output)
+
+
+def _marks(value):
+    return '-' if value is None else f'{value:g}'
+
+
+def render_result_sheet(data):
+    """Render the result sheet described by result_pdfs.result_sheet_data()"""
+    doc = PDFDocument(title=f"{data['exam_title']} - {data['student_name']}")
+    doc.text(data['exam_title'], size=18, bold=True)
+    doc.text('Result sheet', size=11, color=(0.4, 0.4, 0.4))
+    doc.space(8)
+
+    details = [
+        ('Student', data['student_name'] + (f" ({data['full_name']})" if data['full_name'] else '')),
+        ('Email', data['email'] or '-'),
+        ('Started', data['start_time'] or '-'),
+        ('Finished', data['end_time'] or '-'),
+        ('Status', data['status']),
+        ('Score', f"{_marks(data['score'])} / {data['total_marks']}"),
+        ('Percentage', '-' if data['percentage'] is None else f"{data['percentage']:.2f}%"),
+        ('Result', {True: 'Passed', False: 'Not passed'}.get(data['is_passed'], '-')),
+    ]
+    if not data['results_ready']:
+        details.append(('Note', 'Results have not been released yet; marks may change'))
+    for label, value in details:
+        doc.text(f'{label}: {value}', size=10)
+    doc.space(6)
+    doc.rule()
+
+    for question in data['questions']:
+        doc.space(6)
+        doc.text(
+            f"Q{question['number']}. {question['question_text']}",
+            size=10, bold=True
+        )
+        if question['answer'] is not None:
+            doc.text(f"Answer: {question['answer'] or '-'}", size=10, indent=12)
+        else:
+            doc.text('Not answered', size=10, indent=12, color=(0.5, 0.5, 0.5))
+        if question['correct_answer']:
+            doc.text(f"Correct answer: {question['correct_answer']}", size=10, indent=12)
+        if question['marks_awarded'] is None and question['needs_manual_marking'] and question['answer'] is not None:
+            awarded = 'awaiting marking'
+        else:
+            awarded = _marks(question['marks_awarded'] or 0)
+        doc.text(f"Marks: {awarded} / {question['marks']}", size=10, indent=12, color=(0.3, 0.3, 0.3))
+        if question['solution_text']:
+            doc.text(f"Solution: {question['solution_text']}", size=9, indent=12, color=(0.3, 0.3, 0.3))
+    return doc.render()
@@ -8,13 +8,27 @@ import json
 import csv
 import io
 import base64
+import codecs
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from .models import Exam, Question, Option
+from .import_validation import ERROR, WARNING, ImportValidator, validate_question
+
+# Number of questions inserted per bulk_create batch by the streaming importers
+IMPORT_CHUNK_SIZE = 500
+# Block size used when reading uploads that don't provide chunks()
+CSV_READ_BLOCK_SIZE = 64 * 1024
+# Cap on the error messages returned for a single import
+MAX_REPORTED_ERRORS = 200
+# Worker threads used to decode/download question and option images
+IMAGE_RESOLVE_WORKERS = 8
+# (connect, read) timeout in seconds for downloading images from URLs
+IMAGE_FETCH_TIMEOUT = (5, 20)
 
 
 class QuestionImportError(Exception):
@@ -48,10 +62,11 @@ def decode_base64_image(base64_string, filename='image.png'):
         raise QuestionImportError(f"Invalid base64 image: {str(e)}")
 
 
-def get_image_from_url_or_path(image_path, exam_id=None):
+def get_image_from_url_or_path(image_path, exam_id=None, session=None):
     """
     Get image from URL or local path
     
+    Pass a requests `session` to reuse pooled connections across downloads.
     Returns ContentFile or None
     """
     if not image_path or not image_path.strip():
@@ -65,7 +80,7 @@ def get_image_from_url_or_path(image_path, exam_id=None):
         # It's a URL - download it
         try:
             import requests
-            response = requests.get(image_path, timeout=10)
+            response = (session or requests).get(image_path, timeout=IMAGE_FETCH_TIMEOUT)
             response.raise_for_status()
             
             # Get filename from URL or use default
@@ -89,43 +104,205 @@ def get_image_from_url_or_path(image_path, exam_id=None):
             raise QuestionImportError(f"Failed to read image file {image_path}: {str(e)}")
 
 
+def _is_inline_image(image_data):
+    """Whether an image reference is base64 data rather than a URL or path"""
+    return image_data.startswith('data:image') or len(image_data) > 100
+
+
+def _new_image_session(pool_size):
+    """requests session whose per-host connection pool fits all workers"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _collect_image_refs(indexed_questions):
+    """
+    Map every distinct (image reference, field) in the questions to the
+    default file name used when the reference carries no name of its own
+    """
+    refs = {}
+    for index, question_data in indexed_questions:
+        image_data = question_data.get('question_image')
+        if image_data and isinstance(image_data, str):
+            refs.setdefault((image_data, 'question_image'), f'question_{index + 1}.png')
+
+        if question_data.get('question_type', 'MCQ') in ['MCQ', 'TF']:
+            for opt_idx, opt_data in enumerate(question_data.get('options') or []):
+                if not isinstance(opt_data, dict):
+                    continue
+                image_data = opt_data.get('option_image')
+                if image_data and isinstance(image_data, str):
+                    refs.setdefault((image_data, 'option_image'), f'option_{index + 1}_{opt_idx}.png')
+    return refs
+
+
+def save_import_image(content, field_name):
+    """Write image content to the storage of Question.question_image or Option.option_image"""
+    model = Question if field_name == 'question_image' else Option
+    field = model._meta.get_field(field_name)
+    name = field.generate_filename(None, content.name)
+    return field.storage.save(name, content, max_length=field.max_length)
+
+
+def _store_image(image_data, field_name, filename, exam_id, session):
+    """Decode or download one image and write it to the field's storage"""
+    if _is_inline_image(image_data):
+        content = decode_base64_image(image_data, filename)
+    else:
+        content = get_image_from_url_or_path(image_data, exam_id, session=session)
+    return save_import_image(content, field_name)
+
+
+def resolve_import_images(indexed_questions, exam_id=None, max_workers=IMAGE_RESOLVE_WORKERS, known=None):
+    """
+    Decode and download all images referenced by the questions concurrently
+
+    Runs before any import transaction is opened: every distinct image is
+    resolved once on a bounded thread pool (URLs share one pooled requests
+    session) and saved to storage. Returns a dict mapping
+    (image reference, field name) to the stored file name, or to the
+    QuestionImportError raised while resolving it. Entries in `known` are
+    already stored and are returned as they are.
+    """
+    known = dict(known or {})
+    refs = {
+        key: filename for key, filename in _collect_image_refs(indexed_questions).items()
+        if key not in known
+    }
+    if not refs:
+        return known
+
+    workers = max(1, min(max_workers, len(refs)))
+    session = None
+    if any(urlparse(ref.strip()).scheme in ['http', 'https'] for ref, _ in refs):
+        session = _new_image_session(workers)
+
+    resolved = known
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_store_image, image_data, field_name, filename, exam_id, session): (image_data, field_name)
+                for (image_data, field_name), filename in refs.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    resolved[key] = future.result()
+                except QuestionImportError as e:
+                    resolved[key] = e
+                except Exception as e:
+                    resolved[key] = QuestionImportError(f"Failed to store image: {str(e)}")
+    finally:
+        if session:
+            session.close()
+    return resolved
+
+
+def discard_unused_images(resolved_images, used_names=()):
+    """Delete pre-stored images that did not end up attached to a saved row"""
+    used_names = set(used_names)
+    for (_, field_name), name in resolved_images.items():
+        if isinstance(name, Exception) or name in used_names:
+            continue
+        model = Question if field_name == 'question_image' else Option
+        try:
+            model._meta.get_field(field_name).storage.delete(name)
+        except Exception as e:
+            print(f"Warning: Could not delete unused import image {name}: {e}")
+
+
+def _image_value(image_data, field_name, default_name, exam_id, resolved_images):
+    """Return a stored file name (pre-pass) or a ContentFile for an image reference"""
+    if not image_data or not isinstance(image_data, str):
+        return None
+    if resolved_images is not None and (image_data, field_name) in resolved_images:
+        value = resolved_images[(image_data, field_name)]
+        if isinstance(value, Exception):
+            raise value
+        return value
+    if _is_inline_image(image_data):
+        return decode_base64_image(image_data, default_name)
+    return get_image_from_url_or_path(image_data, exam_id)
+
+
+def _stored_image_names(question, options):
+    """File names already in storage referenced by built objects"""
+    names = []
+    for image in [question.question_image] + [option.option_image for option in options]:
+        if image and image.name and getattr(image, '_committed', True):
+            names.append(image.name)
+    return names
+
+
+def _normalize_simple_options(question_data):
+    """Convert ["Option 1", "Option 2"] + correct_option into option dicts"""
+    options_list = question_data.get('options')
+    if isinstance(options_list, list) and len(options_list) > 0 and isinstance(options_list[0], str):
+        correct_index = question_data.get('correct_option', 0)
+        question_data['options'] = [
+            {
+                'option_text': opt,
+                'is_correct': idx == correct_index,
+                'order': idx
+            }
+            for idx, opt in enumerate(options_list)
+        ]
+
+
 def validate_question_data(question_data, question_index):
     """Validate a single question data structure"""
     errors = []
     
-    if 'question_text' not in question_data or not question_data['question_text']:
-        errors.append(f"Question {question_index + 1}: Missing or empty 'question_text'")
+    def emit(column, code, message, severity=ERROR):
+        if severity == ERROR:
+            errors.append(f"Question {question_index + 1}: {message}")
     
-    question_type = question_data.get('question_type', 'MCQ')
-    if question_type not in ['MCQ', 'TF', 'SA', 'TEXT', 'IMAGE_UPLOAD']:
-        errors.append(f"Question {question_index + 1}: Invalid question_type. Must be MCQ, TF, SA, TEXT, or IMAGE_UPLOAD")
+    validate_question(question_data, emit)
+    return errors
+
+
+def _questions_from_json(json_data):
+    """Return the list of question dicts from parsed or raw JSON data"""
+    # Parse JSON if string
+    if isinstance(json_data, str):
+        try:
+            data = json.loads(json_data)
+        except json.JSONDecodeError as e:
+            raise QuestionImportError(f"Invalid JSON format: {str(e)}")
+    else:
+        data = json_data
     
-    if question_type in ['MCQ', 'TF']:
-        if 'options' not in question_data or not isinstance(question_data['options'], list):
-            errors.append(f"Question {question_index + 1}: Missing or invalid 'options' array")
-        elif len(question_data['options']) < 2:
-            errors.append(f"Question {question_index + 1}: Must have at least 2 options")
-        else:
-            # Check if at least one option is marked as correct
-            correct_options = [opt for opt in question_data['options'] if opt.get('is_correct', False)]
-            if len(correct_options) == 0:
-                errors.append(f"Question {question_index + 1}: At least one option must be marked as correct")
-            elif len(correct_options) > 1 and question_type == 'TF':
-                errors.append(f"Question {question_index + 1}: True/False questions must have exactly one correct option")
+    # Handle different JSON formats
+    if isinstance(data, list):
+        # Simple format: list of questions
+        questions_data = data
+    elif isinstance(data, dict) and 'questions' in data:
+        # Standard format: {"questions": [...]}
+        questions_data = data['questions']
+    else:
+        raise QuestionImportError("Invalid JSON structure. Expected array of questions or object with 'questions' key")
     
-    # For SA, TEXT, IMAGE_UPLOAD - options are optional
-    if question_type in ['SA', 'TEXT', 'IMAGE_UPLOAD']:
-        # Options can be empty or not provided
-        pass
+    if not isinstance(questions_data, list):
+        raise QuestionImportError("Questions must be an array")
     
-    marks = question_data.get('marks', 1)
-    if not isinstance(marks, (int, float)) or marks <= 0:
-        errors.append(f"Question {question_index + 1}: 'marks' must be a positive number")
+    if len(questions_data) == 0:
+        raise QuestionImportError("No questions found in JSON data")
     
-    return errors
+    # Convert the simple ["Option 1", "Option 2"] format before validating
+    for question_data in questions_data:
+        if isinstance(question_data, dict):
+            _normalize_simple_options(question_data)
+    
+    return questions_data
 
 
-def import_questions_from_json(exam_id, json_data, overwrite=False):
+def import_questions_from_json(exam_id, json_data, overwrite=False, images=None, progress_callback=None):
     """
     Import questions from JSON data
     
@@ -164,36 +341,19 @@ def import_questions_from_json(exam_id, json_data, overwrite=False):
             "correct_option": 1  # index of correct option
         }
     ]
+    
+    `images` maps (image reference, field name) to files that are already
+    in storage, e.g. images extracted from a DOCX file.
+    
+    `progress_callback(processed, imported, error_count)` is called after
+    every inserted chunk. The whole import still commits as one transaction.
     """
     try:
         exam = Exam.objects.get(id=exam_id)
     except Exam.DoesNotExist:
         raise QuestionImportError(f"Exam with id {exam_id} does not exist")
     
-    # Parse JSON if string
-    if isinstance(json_data, str):
-        try:
-            data = json.loads(json_data)
-        except json.JSONDecodeError as e:
-            raise QuestionImportError(f"Invalid JSON format: {str(e)}")
-    else:
-        data = json_data
-    
-    # Handle different JSON formats
-    if isinstance(data, list):
-        # Simple format: list of questions
-        questions_data = data
-    elif isinstance(data, dict) and 'questions' in data:
-        # Standard format: {"questions": [...]}
-        questions_data = data['questions']
-    else:
-        raise QuestionImportError("Invalid JSON structure. Expected array of questions or object with 'questions' key")
-    
-    if not isinstance(questions_data, list):
-        raise QuestionImportError("Questions must be an array")
-    
-    if len(questions_data) == 0:
-        raise QuestionImportError("No questions found in JSON data")
+    questions_data = _questions_from_json(json_data)
     
     # Validate all questions first
     all_errors = []
@@ -204,102 +364,46 @@ def import_questions_from_json(exam_id, json_data, overwrite=False):
     if all_errors:
         raise QuestionImportError("Validation errors:\n" + "\n".join(all_errors))
     
+    # Decode/download images up front so the transaction below only
+    # references files that are already in storage
+    resolved_images = resolve_import_images(enumerate(questions_data), exam_id, known=images)
+    
     # Import questions
     imported_count = 0
     errors = []
+    used_images = set()
     
-    with transaction.atomic():
-        if overwrite:
-            # Delete existing questions
-            Question.objects.filter(exam=exam).delete()
-        
-        for i, question_data in enumerate(questions_data):
-            try:
-                # Handle simple format
-                if 'options' in question_data and isinstance(question_data['options'], list):
-                    if len(question_data['options']) > 0 and isinstance(question_data['options'][0], str):
-                        # Simple format: ["Option 1", "Option 2"]
-                        options_list = question_data['options']
-                        correct_index = question_data.get('correct_option', 0)
-                        
-                        # Convert to standard format
-                        question_data['options'] = [
-                            {
-                                'option_text': opt,
-                                'is_correct': idx == correct_index,
-                                'order': idx
-                            }
-                            for idx, opt in enumerate(options_list)
-                        ]
-                
-                # Create question
-                question_type = question_data.get('question_type', 'MCQ')
-                
-                # Handle question image
-                question_image = None
-                if 'question_image' in question_data and question_data['question_image']:
-                    image_data = question_data['question_image']
-                    if isinstance(image_data, str):
-                        if image_data.startswith('data:image') or len(image_data) > 100:
-                            # Base64 encoded image
-                            question_image = decode_base64_image(image_data, f'question_{i+1}.png')
-                        else:
-                            # URL or path
-                            question_image = get_image_from_url_or_path(image_data, exam_id)
-                
-                question = Question.objects.create(
-                    exam=exam,
-                    question_text=question_data['question_text'],
-                    question_type=question_type,
-                    marks=question_data.get('marks', 1),
-                    order=question_data.get('order', i + 1),
-                    question_image=question_image
-                )
-                
-                # Create options (only for MCQ/TF)
-                if question_type in ['MCQ', 'TF']:
-                    options_data = question_data.get('options', [])
-                    for opt_idx, opt_data in enumerate(options_data):
-                        option_text = ''
-                        option_image = None
-                        
-                        if isinstance(opt_data, dict):
-                            option_text = opt_data.get('option_text', '')
-                            
-                            # Handle option image
-                            if 'option_image' in opt_data and opt_data['option_image']:
-                                image_data = opt_data['option_image']
-                                if isinstance(image_data, str):
-                                    if image_data.startswith('data:image') or len(image_data) > 100:
-                                        # Base64 encoded image
-                                        option_image = decode_base64_image(image_data, f'option_{i+1}_{opt_idx}.png')
-                                    else:
-                                        # URL or path
-                                        option_image = get_image_from_url_or_path(image_data, exam_id)
-                            
-                            Option.objects.create(
-                                question=question,
-                                option_text=option_text,
-                                option_image=option_image,
-                                is_correct=opt_data.get('is_correct', False),
-                                order=opt_data.get('order', opt_idx)
-                            )
-                        else:
-                            # Handle string options
-                            Option.objects.create(
-                                question=question,
-                                option_text=str(opt_data),
-                                is_correct=False,
-                                order=opt_idx
-                            )
-                
-                imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Question {i + 1}: {str(e)}")
-        
-        if errors and imported_count == 0:
-            raise QuestionImportError("Failed to import any questions:\n" + "\n".join(errors))
+    try:
+        with transaction.atomic():
+            if overwrite:
+                # Delete existing questions
+                Question.objects.filter(exam=exam).delete()
+            
+            chunk = []
+            for i, question_data in enumerate(questions_data):
+                try:
+                    question, options = build_question_objects(exam, question_data, i, resolved_images)
+                except Exception as e:
+                    errors.append(f"Question {i + 1}: {str(e)}")
+                    continue
+                used_images.update(_stored_image_names(question, options))
+                chunk.append((question, options))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    imported_count += save_question_chunk(chunk)
+                    chunk = []
+                    if progress_callback:
+                        progress_callback(i + 1, imported_count, len(errors))
+            imported_count += save_question_chunk(chunk)
+            if progress_callback:
+                progress_callback(len(questions_data), imported_count, len(errors))
+            
+            if errors and imported_count == 0:
+                raise QuestionImportError("Failed to import any questions:\n" + "\n".join(errors))
+    except Exception:
+        used_images = set()
+        raise
+    finally:
+        discard_unused_images(resolved_images, used_images)
     
     # Recalculate exam total marks
     exam.save()  # This will trigger auto_calculate_total if enabled
@@ -311,176 +415,383 @@ def import_questions_from_json(exam_id, json_data, overwrite=False):
     }
 
 
-def import_questions_from_csv(exam_id, csv_content, overwrite=False):
+def _iter_decoded_lines(csv_source, encoding='utf-8'):
+    """
+    Yield text lines from CSV bytes, text or an uploaded file without
+    decoding the whole upload at once.
+
+    Uploaded files are read through ``chunks()`` (or ``read()`` in fixed
+    blocks) and fed to an incremental decoder, so multi-byte characters
+    split across chunk boundaries are handled correctly. Lines keep their
+    trailing newline so ``csv.reader`` can parse quoted multi-line fields.
+    """
+    if isinstance(csv_source, str):
+        chunks = [csv_source]
+        decoder = None
+    else:
+        if isinstance(csv_source, bytes):
+            chunks = [csv_source]
+        elif hasattr(csv_source, 'chunks'):
+            if hasattr(csv_source, 'seek'):
+                csv_source.seek(0)
+            chunks = csv_source.chunks()
+        else:
+            chunks = iter(lambda: csv_source.read(CSV_READ_BLOCK_SIZE), b'')
+        decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+
+    pending = ''
+    first = True
+    for chunk in chunks:
+        text = decoder.decode(chunk) if decoder else chunk
+        if first and text:
+            # Strip a UTF-8 byte order mark written by Excel
+            text = text.lstrip('\ufeff')
+            first = False
+        pending += text
+        start = 0
+        newline = pending.find('\n', start)
+        while newline != -1:
+            yield pending[start:newline + 1]
+            start = newline + 1
+            newline = pending.find('\n', start)
+        pending = pending[start:]
+
+    if decoder:
+        pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def _find_question_image_column(header):
+    """Return the index of the QuestionImage column in the CSV header, if any"""
+    for col_idx, col_name in enumerate(header):
+        if col_name.strip().lower() in ['questionimage', 'question_image', 'qimage', 'q_image']:
+            return col_idx
+    return None
+
+
+def csv_row_to_question_data(row, row_idx, image_col_idx=None):
+    """
+    Convert a single CSV data row into the question dict used by the importers
+
+    Returns None for rows that should be skipped (blank or too short) and
+    raises QuestionImportError for rows that cannot be converted.
+    """
+    if not row or len(row) < 3:  # Need at least Question, Type, Marks
+        return None
+
+    question_text = row[0].strip()
+    question_type = row[1].strip().upper() or 'MCQ'
+    marks = row[2].strip()
+
+    if not question_text:
+        return None
+
+    # Parse marks
+    try:
+        marks = float(marks)
+    except ValueError:
+        marks = 1.0
+
+    question_data = {
+        'question_text': question_text,
+        'question_type': question_type,
+        'marks': marks,
+        'order': row_idx + 1
+    }
+
+    # Format: Question,Type,Marks,QuestionImage,Option1,Option2,...
+    if image_col_idx is not None and len(row) > image_col_idx and row[image_col_idx].strip():
+        question_data['question_image'] = row[image_col_idx].strip()
+
+    # Handle options for MCQ/TF
+    if question_type in ['MCQ', 'TF']:
+        # Options start after Question, Type, Marks (skipping the QuestionImage column if present)
+        option_cols = [value for col_idx, value in enumerate(row) if col_idx >= 3 and col_idx != image_col_idx]
+
+        # Find correct option index (last column holds the 1-based correct option number)
+        correct_index = None
+        if len(option_cols) > 0:
+            try:
+                correct_index = int(option_cols[-1]) - 1  # Convert to 0-based
+                option_cols = option_cols[:-1]  # Remove correct index column
+            except ValueError:
+                # Last column is not a number, might be an option itself
+                pass
+
+        # Separate text from images
+        # Format: Option1,Option1Image,Option2,Option2Image,...
+        option_texts = []
+        option_images = []
+        for opt in option_cols:
+            opt = opt.strip() if opt else ''
+            if opt:
+                # Check if it looks like base64 or URL
+                if opt.startswith('data:image') or opt.startswith('http') or len(opt) > 100:
+                    if option_texts:
+                        # Attach image to the last option
+                        option_images[-1] = opt
+                    else:
+                        # Image-only option
+                        option_texts.append('')
+                        option_images.append(opt)
+                else:
+                    option_texts.append(opt)
+                    option_images.append(None)
+
+        # Ensure we have at least 2 options
+        if len(option_texts) < 2:
+            if len(option_cols) >= 2:
+                # Re-process: treat all as text options
+                option_texts = [opt.strip() for opt in option_cols if opt.strip()]
+                option_images = [None] * len(option_texts)
+            else:
+                raise QuestionImportError(f"Row {row_idx + 2}: MCQ/TF questions need at least 2 options")
+
+        # If correct_index not found, default to first option
+        if correct_index is None:
+            correct_index = 0
+
+        options = []
+        for idx, opt_text in enumerate(option_texts):
+            opt_data = {
+                'option_text': opt_text,
+                'is_correct': idx == correct_index,
+                'order': idx
+            }
+            if idx < len(option_images) and option_images[idx]:
+                opt_data['option_image'] = option_images[idx]
+            options.append(opt_data)
+        question_data['options'] = options
+
+    return question_data
+
+
+def build_question_objects(exam, question_data, index, resolved_images=None):
+    """
+    Build unsaved Question and Option instances for one validated question
+
+    Images found in `resolved_images` (see resolve_import_images) are
+    referenced by their stored name; any others are decoded or downloaded
+    here and written to storage when the rows are saved.
+    """
+    question_type = question_data.get('question_type', 'MCQ')
+
+    question = Question(
+        exam=exam,
+        question_text=question_data['question_text'],
+        question_type=question_type,
+        marks=question_data.get('marks', 1),
+        order=question_data.get('order', index + 1),
+        question_image=_image_value(
+            question_data.get('question_image'), 'question_image',
+            f'question_{index + 1}.png', exam.id, resolved_images
+        )
+    )
+
+    options = []
+    if question_type in ['MCQ', 'TF']:
+        for opt_idx, opt_data in enumerate(question_data.get('options', [])):
+            if isinstance(opt_data, dict):
+                options.append(Option(
+                    option_text=opt_data.get('option_text', ''),
+                    option_image=_image_value(
+                        opt_data.get('option_image'), 'option_image',
+                        f'option_{index + 1}_{opt_idx}.png', exam.id, resolved_images
+                    ),
+                    is_correct=opt_data.get('is_correct', False),
+                    order=opt_data.get('order', opt_idx)
+                ))
+            else:
+                options.append(Option(option_text=str(opt_data), is_correct=False, order=opt_idx))
+
+    return question, options
+
+
+def save_question_chunk(chunk):
+    """
+    Insert a chunk of (Question, [Option]) pairs with two bulk_create calls
+    """
+    if not chunk:
+        return 0
+
+    with transaction.atomic():
+        questions = Question.objects.bulk_create([question for question, _ in chunk])
+        options = []
+        for question, (_, question_options) in zip(questions, chunk):
+            for option in question_options:
+                option.question = question
+                options.append(option)
+        if options:
+            Option.objects.bulk_create(options)
+    return len(questions)
+
+
+def import_questions_from_csv(exam_id, csv_content, overwrite=False,
+                              chunk_size=IMPORT_CHUNK_SIZE, progress_callback=None):
     """
     Import questions from CSV data
-    
+
     CSV Format:
     - Column 1: Question Text
     - Column 2: Question Type (MCQ, TF, SA, TEXT, IMAGE_UPLOAD)
     - Column 3: Marks
     - Column 4+: Options (for MCQ/TF) - last column indicates correct option number (1-based)
-    
+
     Example CSV:
     Question,Type,Marks,Option1,Option2,Option3,Option4,Correct
     "What is 2+2?",MCQ,1,3,4,5,6,2
     "Python is a language",TF,1,True,False,,
     "Explain recursion",SA,5,,,,
+
+    `csv_content` may be bytes, text or an uploaded file. The file is decoded
+    and parsed incrementally, each row is validated on its own and valid
+    questions are committed in chunks of `chunk_size` with bulk_create, so
+    memory use does not grow with the size of the file. Images of each
+    chunk are resolved concurrently before its insert transaction opens.
+    Invalid rows are skipped and reported in `errors`.
+
+    With `overwrite`, the exam's existing questions are deleted only once
+    every chunk has committed; if the import fails part way (including a
+    file that cannot be parsed to the end), the questions it already
+    committed are removed again, so the exam keeps either its old questions
+    or the complete new set.
+
+    `progress_callback(processed, imported, error_count)` is called after
+    every committed chunk.
     """
     try:
         exam = Exam.objects.get(id=exam_id)
     except Exam.DoesNotExist:
         raise QuestionImportError(f"Exam with id {exam_id} does not exist")
-    
-    # Parse CSV
+
+    csv_reader = csv.reader(_iter_decoded_lines(csv_content))
+
     try:
-        if isinstance(csv_content, bytes):
-            csv_content = csv_content.decode('utf-8')
-        
-        csv_reader = csv.reader(io.StringIO(csv_content))
-        rows = list(csv_reader)
-        
-        if len(rows) < 2:  # Header + at least one question
-            raise QuestionImportError("CSV file must have at least one question row")
-        
-        # Skip header row
-        header = rows[0] if len(rows) > 0 else []
-        data_rows = rows[1:]
-        
-    except Exception as e:
+        header = next(csv_reader, None)
+    except (csv.Error, UnicodeDecodeError) as e:
         raise QuestionImportError(f"Error parsing CSV: {str(e)}")
-    
-    # Convert CSV rows to question data format
-    questions_data = []
-    for row_idx, row in enumerate(data_rows):
-        if not row or len(row) < 3:  # Need at least Question, Type, Marks
-            continue
-        
-        question_text = row[0].strip() if len(row) > 0 else ''
-        question_type = row[1].strip().upper() if len(row) > 1 else 'MCQ'
-        marks = row[2].strip() if len(row) > 2 else '1'
-        
-        if not question_text:
-            continue
-        
-        # Parse marks
+    if header is None:
+        raise QuestionImportError("CSV file must have at least one question row")
+    image_col_idx = _find_question_image_column(header)
+
+    replaced_ids = list(Question.objects.filter(exam=exam).values_list('id', flat=True)) if overwrite else []
+    # Committed questions and their stored images, to undo a failed overwrite
+    imported_ids = []
+    imported_images = {}
+
+    processed = 0
+    imported_count = 0
+    error_count = 0
+    errors = []
+    chunk = []
+
+    def record_error(message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(message)
+
+    def flush():
+        nonlocal imported_count, chunk
+        resolved_images = resolve_import_images(chunk, exam.id)
+        built = []
+        used_images = set()
+        for index, question_data in chunk:
+            try:
+                question, options = build_question_objects(exam, question_data, index, resolved_images)
+            except Exception as e:
+                record_error(f"Row {index + 2}: {str(e)}")
+                continue
+            used_images.update(_stored_image_names(question, options))
+            built.append((question, options))
+        chunk = []
+
         try:
-            marks = float(marks)
-        except ValueError:
-            marks = 1.0
-        
-        question_data = {
-            'question_text': question_text,
-            'question_type': question_type,
-            'marks': marks,
-            'order': row_idx + 1
-        }
-        
-        # Handle question image (check if there's a QuestionImage column or in a specific position)
-        # Look for columns that might contain image data
-        # Format: Question,Type,Marks,QuestionImage,Option1,Option2,...
-        question_image_col = None
-        if len(header) > 3:
-            # Check if there's a "QuestionImage" column
-            for col_idx, col_name in enumerate(header):
-                if col_name.lower() in ['questionimage', 'question_image', 'qimage', 'q_image']:
-                    if len(row) > col_idx:
-                        question_image_col = row[col_idx].strip() if row[col_idx] else None
-                    break
-        
-        if question_image_col:
-            question_data['question_image'] = question_image_col
-        
-        # Handle options for MCQ/TF
-        if question_type in ['MCQ', 'TF']:
-            options = []
-            # Get options from columns 3 onwards (skip Question, Type, Marks, and QuestionImage if present)
-            start_col = 4 if question_image_col else 3
-            option_cols = row[start_col:] if len(row) > start_col else []
-            
-            # Find correct option index (last column or explicit "Correct" column)
-            correct_index = None
-            if len(option_cols) > 0:
-                # Check if last column is a number (correct option index)
-                try:
-                    correct_index = int(option_cols[-1]) - 1  # Convert to 0-based
-                    option_cols = option_cols[:-1]  # Remove correct index column
-                except ValueError:
-                    # Last column is not a number, might be an option itself
-                    pass
-            
-            # Filter out empty options and separate text from images
-            # Format: Option1,Option1Image,Option2,Option2Image,...
-            option_texts = []
-            option_images = []
-            
-            # Simple approach: treat every other column as option text/image pairs
-            # Or just treat all as text options
-            for opt in option_cols:
-                opt = opt.strip() if opt else ''
-                if opt:
-                    # Check if it looks like base64 or URL
-                    if opt.startswith('data:image') or opt.startswith('http') or len(opt) > 100:
-                        # It's an image - attach to last option or create image-only option
-                        if option_texts:
-                            option_images.append(opt)
-                        else:
-                            # Image-only option
-                            option_texts.append('')
-                            option_images.append(opt)
+            imported_count += save_question_chunk(built)
+        except Exception:
+            used_images = set()
+            raise
+        finally:
+            discard_unused_images(resolved_images, used_images)
+        if overwrite:
+            imported_ids.extend(question.pk for question, _ in built)
+            imported_images.update(
+                (key, name) for key, name in resolved_images.items() if name in used_images
+            )
+        if progress_callback:
+            progress_callback(processed, imported_count, error_count)
+
+    row_idx = 0
+    try:
+        while True:
+            try:
+                row = next(csv_reader)
+            except StopIteration:
+                break
+            except (csv.Error, UnicodeDecodeError) as e:
+                if overwrite:
+                    # The rest of the file is unreadable, so the import is not
+                    # complete: undo it below instead of replacing the questions
+                    raise QuestionImportError(f"Row {row_idx + 2}: Error parsing CSV: {str(e)}")
+                record_error(f"Row {row_idx + 2}: Error parsing CSV: {str(e)}")
+                break
+
+            try:
+                question_data = csv_row_to_question_data(row, row_idx, image_col_idx)
+                if question_data is not None:
+                    processed += 1
+                    validation_errors = validate_question_data(question_data, row_idx)
+                    if validation_errors:
+                        for error in validation_errors:
+                            record_error(error)
                     else:
-                        # It's text
-                        option_texts.append(opt)
-                        option_images.append(None)
-            
-            # Ensure we have at least 2 options
-            if len(option_texts) < 2:
-                if len(option_cols) >= 2:
-                    # Re-process: treat all as text options
-                    option_texts = [opt.strip() for opt in option_cols if opt.strip()]
-                    option_images = [None] * len(option_texts)
-                else:
-                    raise QuestionImportError(f"Row {row_idx + 2}: MCQ/TF questions need at least 2 options")
-            
-            # If correct_index not found, default to first option
-            if correct_index is None:
-                correct_index = 0
-            
-            # Create options array
-            for idx, opt_text in enumerate(option_texts):
-                opt_data = {
-                    'option_text': opt_text,
-                    'is_correct': idx == correct_index,
-                    'order': idx
-                }
-                # Add image if available
-                if idx < len(option_images) and option_images[idx]:
-                    opt_data['option_image'] = option_images[idx]
-                question_data.setdefault('options', []).append(opt_data)
-        
-        questions_data.append(question_data)
-    
-    if len(questions_data) == 0:
+                        chunk.append((row_idx, question_data))
+            except Exception as e:
+                record_error(f"Row {row_idx + 2}: {str(e)}")
+            row_idx += 1
+
+            if len(chunk) >= chunk_size:
+                flush()
+
+        flush()
+    except Exception:
+        if imported_ids:
+            Question.objects.filter(id__in=imported_ids).delete()
+            discard_unused_images(imported_images)
+        raise
+
+    if processed == 0 and error_count == 0:
         raise QuestionImportError("No valid questions found in CSV file")
-    
-    # Use existing JSON import function
-    return import_questions_from_json(exam_id, questions_data, overwrite)
+    if imported_count == 0:
+        raise QuestionImportError("Failed to import any questions:\n" + "\n".join(errors))
+
+    if replaced_ids:
+        # Every chunk is in: swap out the old questions in one transaction
+        with transaction.atomic():
+            Question.objects.filter(id__in=replaced_ids).delete()
+
+    # Recalculate exam total marks
+    exam.save()  # This will trigger auto_calculate_total if enabled
+
+    return {
+        'imported': imported_count,
+        'total': processed,
+        'errors': errors,
+        'error_count': error_count
+    }
 
 
 def extract_image_from_docx_paragraph(para):
-    """Extract image from a DOCX paragraph"""
+    """Extract image relationship id from a DOCX paragraph"""
     try:
-        from docx.document import Document as _Document
-        from docx.oxml.text.paragraph import CT_P
         from docx.oxml.ns import qn
         
-        # Check for inline shapes (images)
-        for run in para.runs:
-            for drawing in run.element.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/main}blip'):
-                # Get image relationship ID
-                embed_id = drawing.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                if embed_id:
-                    return embed_id
+        # Look for inline shapes (images) directly on the paragraph element
+        for blip in para._p.iter(qn('a:blip')):
+            embed_id = blip.get(qn('r:embed'))
+            if embed_id:
+                return embed_id
         return None
     except:
         return None
@@ -489,18 +800,15 @@ def extract_image_from_docx_paragraph(para):
 def get_image_from_docx_relationship(doc, embed_id):
     """Get image content from DOCX relationship"""
     try:
-        # Access the document's part relationships
-        part = doc.part
-        if hasattr(part, 'related_parts'):
-            for rel_id, rel_part in part.related_parts.items():
-                if rel_id == embed_id:
-                    return rel_part.blob
+        rel = doc.part.rels.get(embed_id)
+        if rel is not None and not rel.is_external:
+            return rel.target_part.blob
         return None
     except:
         return None
 
 
-def import_questions_from_docx(exam_id, docx_content, overwrite=False):
+def import_questions_from_docx(exam_id, docx_content, overwrite=False, progress_callback=None):
     """
     Import questions from DOCX (Word) file with image support
     
@@ -525,6 +833,36 @@ def import_questions_from_docx(exam_id, docx_content, overwrite=False):
     except Exam.DoesNotExist:
         raise QuestionImportError(f"Exam with id {exam_id} does not exist")
     
+    questions_data, image_parts = parse_docx_questions(docx_content)
+    
+    # Write each referenced image straight to storage (no base64 round trip)
+    stored_images = {}
+    try:
+        for ref, field_name in _collect_image_refs(enumerate(questions_data)):
+            part = image_parts[ref[len('docx:'):]]
+            filename = os.path.basename(str(part.partname)) or 'image.png'
+            stored_images[(ref, field_name)] = save_import_image(ContentFile(part.blob, name=filename), field_name)
+        
+        # Use existing JSON import function
+        return import_questions_from_json(
+            exam_id, questions_data, overwrite,
+            images=stored_images, progress_callback=progress_callback
+        )
+    except QuestionImportError:
+        discard_unused_images(stored_images)
+        raise
+    except Exception as e:
+        discard_unused_images(stored_images)
+        raise QuestionImportError(f"Error parsing DOCX file: {str(e)}")
+
+
+def parse_docx_questions(docx_content):
+    """
+    Parse a DOCX file into question dicts without touching the database
+
+    Returns (questions_data, image_parts). Embedded images are referenced
+    as "docx:<rId>" and `image_parts` maps each rId to its image part.
+    """
     try:
         # Try to import docx - check if it's available
         try:
@@ -542,42 +880,31 @@ def import_questions_from_docx(exam_id, docx_content, overwrite=False):
             error_msg += "  pip install python-docx==1.1.2"
             raise QuestionImportError(error_msg)
         
-        import io
+        from docx.opc.constants import RELATIONSHIP_TYPE as RT
         import re
         
-        # Parse DOCX
+        # Parse DOCX - uploaded files are read in place rather than copied
         if isinstance(docx_content, bytes):
             doc = Document(io.BytesIO(docx_content))
-            docx_bytes = docx_content
         else:
-            docx_bytes = docx_content.read()
-            doc = Document(io.BytesIO(docx_bytes))
+            if hasattr(docx_content, 'seek'):
+                docx_content.seek(0)
+            doc = Document(docx_content)
         
-        # Extract all images from document
-        images_dict = {}
+        # Index image relationships once: rId -> image part. Paragraphs refer
+        # to images as "docx:<rId>" and the bytes are only written to storage
+        # once the questions using them are known.
+        image_parts = {}
         try:
-            # Access document relationships to get images
-            part = doc.part
-            if hasattr(part, 'related_parts'):
-                for rel_id, rel_part in part.related_parts.items():
-                    if hasattr(rel_part, 'blob'):
-                        # Determine image format from content type
-                        content_type = getattr(rel_part, 'content_type', '')
-                        ext = 'png'
-                        if 'jpeg' in content_type or 'jpg' in content_type:
-                            ext = 'jpg'
-                        elif 'gif' in content_type:
-                            ext = 'gif'
-                        elif 'webp' in content_type:
-                            ext = 'webp'
-                        
-                        images_dict[rel_id] = {
-                            'content': rel_part.blob,
-                            'ext': ext
-                        }
+            for rel_id, rel in doc.part.rels.items():
+                if rel.reltype == RT.IMAGE and not rel.is_external:
+                    image_parts[rel_id] = rel.target_part
         except Exception as e:
             print(f"Warning: Could not extract all images: {e}")
         
+        blip_tag = qn('a:blip')
+        embed_attr = qn('r:embed')
+        
         questions_data = []
         current_question = None
         current_options = []
@@ -588,26 +915,13 @@ def import_questions_from_docx(exam_id, docx_content, overwrite=False):
         for para_idx, para in enumerate(doc.paragraphs):
             text = para.text.strip()
             
-            # Check for images in this paragraph
+            # Check for images (a:blip elements) in this paragraph
             para_image = None
-            try:
-                # Check for inline shapes (images) in paragraph
-                for run in para.runs:
-                    if run._element.xml:
-                        # Look for image relationships
-                        import xml.etree.ElementTree as ET
-                        root = ET.fromstring(run._element.xml)
-                        for blip in root.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/main}blip'):
-                            embed_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                            if embed_id and embed_id in images_dict:
-                                img_data = images_dict[embed_id]
-                                # Convert to base64
-                                import base64
-                                base64_img = base64.b64encode(img_data['content']).decode('utf-8')
-                                para_image = f"data:image/{img_data['ext']};base64,{base64_img}"
-                                break
-            except Exception as e:
-                print(f"Warning: Could not extract image from paragraph {para_idx}: {e}")
+            for blip in para._p.iter(blip_tag):
+                embed_id = blip.get(embed_attr)
+                if embed_id in image_parts:
+                    para_image = f'docx:{embed_id}'
+                    break
             
             if not text and not para_image:
                 continue
@@ -749,8 +1063,7 @@ def import_questions_from_docx(exam_id, docx_content, overwrite=False):
         if len(questions_data) == 0:
             raise QuestionImportError("No questions found in DOCX file. Please ensure questions are properly formatted.")
         
-        # Use existing JSON import function
-        return import_questions_from_json(exam_id, questions_data, overwrite)
+        return questions_data, image_parts
         
     except ImportError as e:
         import sys
@@ -780,3 +1093,153 @@ def import_questions_from_file(exam_id, file_path, overwrite=False):
     except Exception as e:
         raise QuestionImportError(f"Error reading file: {str(e)}")
 
+
+def import_questions_from_upload(exam_id, upload, file_name='', overwrite=False, progress_callback=None):
+    """
+    Import questions from an uploaded JSON, CSV or DOCX file
+
+    The format is chosen from the file extension; files with an unknown
+    extension are tried as JSON, then CSV, then DOCX.
+    """
+    file_name = (file_name or getattr(upload, 'name', '') or '').lower()
+
+    if file_name.endswith('.csv'):
+        # CSV is streamed straight from the upload
+        return import_questions_from_csv(exam_id, upload, overwrite, progress_callback=progress_callback)
+
+    if file_name.endswith('.json'):
+        try:
+            json_data = json.loads(upload.read().decode('utf-8'))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise QuestionImportError(f"Invalid JSON format: {str(e)}")
+        return import_questions_from_json(exam_id, json_data, overwrite, progress_callback=progress_callback)
+
+    if file_name.endswith(('.docx', '.doc')):
+        return import_questions_from_docx(exam_id, upload, overwrite, progress_callback=progress_callback)
+
+    # Try to detect format by content
+    file_content = upload.read()
+    try:
+        json_data = json.loads(file_content.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        pass
+    else:
+        return import_questions_from_json(exam_id, json_data, overwrite, progress_callback=progress_callback)
+
+    try:
+        return import_questions_from_csv(exam_id, file_content, overwrite, progress_callback=progress_callback)
+    except Exception:
+        return import_questions_from_docx(exam_id, file_content, overwrite, progress_callback=progress_callback)
+
+
+def _dry_run_csv(csv_source, validator):
+    csv_reader = csv.reader(_iter_decoded_lines(csv_source))
+    try:
+        header = next(csv_reader, None)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise QuestionImportError(f"Error parsing CSV: {str(e)}")
+    if header is None:
+        raise QuestionImportError("CSV file must have at least one question row")
+    image_col_idx = _find_question_image_column(header)
+
+    # Report schema fields under the file's own column names
+    columns = {}
+    for field, col_idx in (('question_text', 0), ('question_type', 1), ('marks', 2), ('question_image', image_col_idx)):
+        if col_idx is not None and col_idx < len(header) and header[col_idx].strip():
+            columns[field] = header[col_idx].strip()
+
+    row_idx = 0
+    while True:
+        try:
+            row = next(csv_reader)
+        except StopIteration:
+            break
+        except (csv.Error, UnicodeDecodeError) as e:
+            validator.add(row_idx + 2, None, 'parse_error', f"Error parsing CSV: {str(e)}")
+            break
+
+        row_number = row_idx + 2
+        if row and any(value.strip() for value in row):
+            if len(row) < 3 or not row[0].strip():
+                validator.add(row_number, None, 'row_skipped',
+                              "Row skipped: needs question text, type and marks", WARNING)
+            else:
+                marks = row[2].strip()
+                try:
+                    float(marks)
+                except ValueError:
+                    validator.add(row_number, columns.get('marks', 'marks'), 'marks_defaulted',
+                                  f"Marks '{marks}' is not a number, defaulting to 1", WARNING)
+                try:
+                    question_data = csv_row_to_question_data(row, row_idx, image_col_idx)
+                except QuestionImportError as e:
+                    validator.reject(row_number, 'options', 'too_few_options', str(e))
+                else:
+                    validator.check(question_data, row_number, columns)
+        row_idx += 1
+
+
+def _dry_run_questions(questions_data, validator):
+    for index, question_data in enumerate(questions_data):
+        validator.check(question_data, index + 1)
+
+
+def dry_run_import_json(json_data):
+    """Validate JSON question data without touching the database"""
+    validator = ImportValidator()
+    try:
+        _dry_run_questions(_questions_from_json(json_data), validator)
+    except QuestionImportError as e:
+        validator.add(None, None, 'invalid_file', str(e))
+    report = validator.report()
+    report['format'] = 'json'
+    return report
+
+
+def dry_run_import_upload(upload, file_name=''):
+    """
+    Validate an uploaded JSON, CSV or DOCX file without touching the database
+
+    Returns a report with per-row diagnostics ({row, column, code, severity,
+    message}) and statistics (questions per type, missing correct answers,
+    duplicate questions). Nothing is saved, images are not fetched.
+    """
+    file_name = (file_name or getattr(upload, 'name', '') or '').lower()
+
+    if file_name.endswith('.csv'):
+        file_format = 'csv'
+    elif file_name.endswith('.json'):
+        file_format = 'json'
+    elif file_name.endswith(('.docx', '.doc')):
+        file_format = 'docx'
+    else:
+        # Detect format by content: DOCX files are zip archives
+        upload = upload.read()
+        stripped = upload.lstrip()
+        if upload.startswith(b'PK'):
+            file_format = 'docx'
+        elif stripped.startswith((b'{', b'[', b'\xef\xbb\xbf{', b'\xef\xbb\xbf[')):
+            file_format = 'json'
+        else:
+            file_format = 'csv'
+
+    validator = ImportValidator()
+    try:
+        if file_format == 'csv':
+            _dry_run_csv(upload, validator)
+        elif file_format == 'json':
+            content = upload if isinstance(upload, bytes) else upload.read()
+            try:
+                json_data = json.loads(content.decode('utf-8-sig'))
+            except (ValueError, UnicodeDecodeError) as e:
+                raise QuestionImportError(f"Invalid JSON format: {str(e)}")
+            _dry_run_questions(_questions_from_json(json_data), validator)
+        else:
+            questions_data, _ = parse_docx_questions(upload)
+            _dry_run_questions(questions_data, validator)
+    except QuestionImportError as e:
+        validator.add(None, None, 'invalid_file', str(e))
+
+    report = validator.report()
+    report['format'] = file_format
+    return report
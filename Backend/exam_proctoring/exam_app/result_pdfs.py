@@ -0,0 +1,305 @@
+# backend/exam_app/result_pdfs.py
+"""
+Result sheet PDFs
+Sheets are rendered by exam_app.pdf in a bounded pool of worker processes,
+so CPU-heavy rendering neither holds the GIL of the web process nor runs
+unbounded. Rendered sheets are cached on disk under PDF_CACHE_DIR, keyed by
+attempt and a version hash of everything printed on the sheet: any change
+to marks, answers or questions yields a new version and the stale file is
+replaced the next time the sheet is requested.
+
+Bundles render the sheets of all released attempts of an exam into one ZIP
+on the background worker pool, reporting progress on the job row and the
+admin monitoring WebSocket.
+"""
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from .background import claim_job, heartbeat, run_in_background
+from .models import Answer, ExamAttempt, ResultPdfBundle
+from .pdf import render_result_sheet
+
+# Bump when the layout in pdf.render_result_sheet changes
+RENDERER_VERSION = 1
+
+# Seconds to wait for one batch of sheets from the renderer processes
+RENDER_TIMEOUT = 300
+
+# Attempts loaded, rendered and zipped per step of a bundle job
+BUNDLE_BATCH_SIZE = 50
+
+# Finished bundles kept per exam; older ones are deleted with their files
+BUNDLES_KEPT = 3
+
+MANUAL_MARKING_TYPES = ('SA', 'TEXT', 'IMAGE_UPLOAD')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _format_time(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M %Z') if value else None
+
+
+def released_attempts(exam):
+    return ExamAttempt.objects.filter(exam=exam, status='COMPLETED', results_ready=True)
+
+
+def result_sheets_data(exam, attempts):
+    """
+    Everything printed on the sheets of `attempts` (all of one exam), as
+    plain picklable dicts in the same order; three queries per call
+    """
+    questions = list(exam.questions.order_by('order', 'id').prefetch_related('options'))
+    answers = {}
+    rows = Answer.objects.filter(attempt__in=attempts).annotate(
+        image_count=Count('answer_images')
+    ).values_list(
+        'attempt_id', 'question_id', 'selected_option__option_text', 'answer_text',
+        'marks_awarded', 'solution_text', 'image_count'
+    )
+    for attempt_id, question_id, option_text, answer_text, marks_awarded, solution_text, image_count in rows:
+        if option_text is not None:
+            answer = option_text
+        elif image_count:
+            answer = f'{answer_text} [{image_count} image(s) uploaded]'.strip()
+        else:
+            answer = answer_text or ''
+        answers[(attempt_id, question_id)] = (answer, marks_awarded, solution_text)
+
+    result = []
+    for attempt in attempts:
+        sheet_questions = []
+        for number, question in enumerate(questions, start=1):
+            answer, marks_awarded, solution_text = answers.get((attempt.id, question.id), (None, None, None))
+            correct = [option.option_text for option in question.options.all() if option.is_correct]
+            sheet_questions.append({
+                'number': number,
+                'question_text': question.question_text,
+                'marks': question.marks,
+                'answer': answer,
+                'correct_answer': ', '.join(correct),
+                'marks_awarded': marks_awarded,
+                'needs_manual_marking': question.question_type in MANUAL_MARKING_TYPES,
+                'solution_text': solution_text or '',
+            })
+        user = attempt.user
+        result.append({
+            'attempt_id': attempt.id,
+            'exam_id': exam.id,
+            'exam_title': exam.title,
+            'student_name': user.username,
+            'full_name': f'{user.first_name} {user.last_name}'.strip(),
+            'email': user.email,
+            'status': attempt.status,
+            'start_time': _format_time(attempt.start_time),
+            'end_time': _format_time(attempt.end_time),
+            'score': attempt.score,
+            'total_marks': exam.total_marks,
+            'percentage': attempt.percentage_score,
+            'is_passed': attempt.is_passed,
+            'results_ready': attempt.results_ready,
+            'questions': sheet_questions,
+        })
+    return result
+
+
+def sheet_version(data):
+    """Hash of the sheet contents and renderer version"""
+    payload = json.dumps([RENDERER_VERSION, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+
+def _cache_path(data):
+    return os.path.join(
+        settings.PDF_CACHE_DIR, 'sheets', str(data['exam_id']),
+        f"{data['attempt_id']}-{sheet_version(data)}.pdf"
+    )
+
+
+def _read_cached(path):
+    try:
+        with open(path, 'rb') as cached:
+            return cached.read()
+    except FileNotFoundError:
+        return None
+
+
+def _store(path, attempt_id, content):
+    """Write a sheet atomically and drop older versions of it"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as output:
+        output.write(content)
+    os.replace(output.name, path)
+    for stale in glob.glob(os.path.join(directory, f'{attempt_id}-*.pdf')):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the web process runs threads and event loops
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_sheets(sheets):
+    """Render sheet data to PDF bytes on the renderer processes"""
+    if not sheets:
+        return []
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return [render_result_sheet(data) for data in sheets]
+    try:
+        return list(_get_pool().map(render_result_sheet, sheets, timeout=RENDER_TIMEOUT))
+    except BrokenProcessPool:
+        # A renderer died (e.g. killed for memory); start a fresh pool next time
+        _reset_pool()
+        print("Error in PDF renderer pool, rendering in process")
+        return [render_result_sheet(data) for data in sheets]
+
+
+def result_sheet_pdfs(exam, attempts):
+    """PDF bytes for each attempt, from the cache where possible; also returns how many were rendered"""
+    sheets = result_sheets_data(exam, attempts)
+    paths = [_cache_path(data) for data in sheets]
+    contents = [_read_cached(path) for path in paths]
+    missing = [idx for idx, content in enumerate(contents) if content is None]
+    for idx, content in zip(missing, render_sheets([sheets[idx] for idx in missing])):
+        _store(paths[idx], sheets[idx]['attempt_id'], content)
+        contents[idx] = content
+    return contents, len(missing)
+
+
+def result_sheet_pdf(attempt):
+    """PDF bytes of one attempt's result sheet"""
+    contents, _ = result_sheet_pdfs(attempt.exam, [attempt])
+    return contents[0]
+
+
+def result_sheet_filename(attempt):
+    return get_valid_filename(f'{attempt.exam.title}_{attempt.user.username}_{attempt.id}.pdf')
+
+
+def bundle_data(bundle):
+    return {
+        'id': bundle.id,
+        'exam_id': bundle.exam_id,
+        'status': bundle.status,
+        'total': bundle.total,
+        'processed': bundle.processed,
+        'rendered': bundle.rendered,
+        'message': bundle.message,
+        'download_url': f'/api/exam/admin/result-pdfs/{bundle.id}/download/' if bundle.status == 'COMPLETED' else None,
+        'created_at': bundle.created_at.isoformat() if bundle.created_at else None,
+        'started_at': bundle.started_at.isoformat() if bundle.started_at else None,
+        'finished_at': bundle.finished_at.isoformat() if bundle.finished_at else None,
+    }
+
+
+def _notify(bundle):
+    """Push bundle progress to admins watching the exam"""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f'admin_exam_{bundle.exam_id}',
+            {
+                'type': 'result_pdf_progress',
+                'data': bundle_data(bundle)
+            }
+        )
+    except Exception as e:
+        print(f"Error sending result PDF progress: {e}")
+
+
+def _save(bundle, **fields):
+    for field, value in fields.items():
+        setattr(bundle, field, value)
+    ResultPdfBundle.objects.filter(pk=bundle.pk).update(**fields)
+    _notify(bundle)
+
+
+def _prune_bundles(exam_id):
+    finished = ResultPdfBundle.objects.filter(exam_id=exam_id, status__in=['COMPLETED', 'FAILED'])
+    for old in finished[BUNDLES_KEPT:]:
+        if old.file:
+            old.file.delete(save=False)
+        old.delete()
+
+
+def execute_result_bundle(bundle_id):
+    """Build a bundle in the current thread"""
+    bundle = ResultPdfBundle.objects.select_related('exam').get(pk=bundle_id)
+    exam = bundle.exam
+    if not claim_job(bundle):
+        return
+    attempt_ids = list(released_attempts(exam).order_by('id').values_list('id', flat=True))
+    _save(bundle, total=len(attempt_ids))
+
+    processed = rendered = 0
+    try:
+        with heartbeat(bundle), tempfile.TemporaryFile() as output:
+            # PDF content is already deflated, so entries are stored as is
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+                for start in range(0, len(attempt_ids), BUNDLE_BATCH_SIZE):
+                    attempts = list(ExamAttempt.objects.filter(
+                        id__in=attempt_ids[start:start + BUNDLE_BATCH_SIZE]
+                    ).select_related('user').order_by('id'))
+                    contents, batch_rendered = result_sheet_pdfs(exam, attempts)
+                    for attempt, content in zip(attempts, contents):
+                        archive.writestr(get_valid_filename(f'{attempt.user.username}_{attempt.id}.pdf'), content)
+                    processed += len(attempts)
+                    rendered += batch_rendered
+                    _save(bundle, processed=processed, rendered=rendered)
+            output.seek(0)
+            bundle.file.save(get_valid_filename(f'exam_{exam.id}_results_{bundle.id}.zip'), File(output), save=False)
+        _save(
+            bundle,
+            file=bundle.file.name,
+            status='COMPLETED',
+            message=f'{processed} result sheets ({rendered} rendered, {processed - rendered} from cache)',
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        print(f"Error in result PDF bundle {bundle.id}: {e}")
+        traceback.print_exc()
+        _save(bundle, status='FAILED', message=f'Error rendering result sheets: {str(e)}', finished_at=timezone.now())
+    _prune_bundles(exam.id)
+
+
+def start_result_bundle(bundle):
+    """Queue a saved bundle once the current transaction commits"""
+    run_in_background(execute_result_bundle, bundle.id)
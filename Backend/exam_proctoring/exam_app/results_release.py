@@ -0,0 +1,140 @@
+# backend/exam_app/results_release.py
+"""
+Set-based release and un-release of results
+Whole exams (or any attempt queryset) are released with one grouped
+aggregate to check that manual marking is complete and batched UPDATEs to
+flip results_ready, both while the attempts are locked. Activity log rows
+are bulk inserted, so neither the per-attempt save() signals nor the
+per-activity broadcasts fire; admins watching an exam get one summary
+message instead.
+"""
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from .analytics import invalidate_student_performance
+from .marking import MANUAL_MARKING_TYPES
+from .models import Answer, ExamActivityLog
+
+LOG_BATCH_SIZE = 500
+UPDATE_BATCH_SIZE = 500
+
+
+class ReleaseError(Exception):
+    """Results cannot be released"""
+
+    def __init__(self, message, unmarked_attempts=0, unmarked_answers=0):
+        super().__init__(message)
+        self.unmarked_attempts = unmarked_attempts
+        self.unmarked_answers = unmarked_answers
+
+
+def _unmarked_answers():
+    return Answer.objects.filter(
+        question__question_type__in=MANUAL_MARKING_TYPES, marks_awarded__isnull=True
+    )
+
+
+def _broadcast(exam_ids, data):
+    """One summary message per affected exam"""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    for exam_id, count in exam_ids.items():
+        try:
+            async_to_sync(channel_layer.group_send)(
+                f'admin_exam_{exam_id}',
+                {
+                    'type': 'results_release',
+                    'data': dict(data, exam_id=exam_id, count=count),
+                }
+            )
+        except Exception as e:
+            print(f"Error sending results release update: {e}")
+
+
+def _log(rows, activity_type, description, user, timestamp):
+    metadata_key = 'released' if activity_type == 'RESULTS_RELEASED' else 'unreleased'
+    ExamActivityLog.objects.bulk_create([
+        ExamActivityLog(
+            attempt_id=attempt_id,
+            activity_type=activity_type,
+            description=description,
+            metadata={
+                f'{metadata_key}_by': user.username if user else None,
+                f'{metadata_key}_at': timestamp.isoformat(),
+                'bulk': True,
+            },
+        )
+        for attempt_id, _, _ in rows
+    ], batch_size=LOG_BATCH_SIZE)
+
+
+def _finish(rows, data):
+    exam_counts = {}
+    for _, _, exam_id in rows:
+        exam_counts[exam_id] = exam_counts.get(exam_id, 0) + 1
+    invalidate_student_performance(*{user_id for _, user_id, _ in rows})
+    transaction.on_commit(lambda: _broadcast(exam_counts, data))
+
+
+def release_attempts(attempts, user, description='Admin released results', skip_unmarked=False):
+    """
+    Release the results of the completed, unreleased attempts in `attempts`
+
+    Raises ReleaseError if any of them still has unmarked manual answers,
+    unless `skip_unmarked` is set, in which case those attempts are left
+    unreleased. Returns the ids of the released attempts and the number of
+    attempts skipped.
+    """
+    candidates = attempts.filter(status='COMPLETED', results_ready=False)
+    now = timezone.now()
+    with transaction.atomic():
+        # Lock the attempts before checking their marking, so the check sees
+        # the same rows the UPDATE flips
+        rows = list(candidates.select_for_update().values_list('id', 'user_id', 'exam_id'))
+        locked = {attempt_id for attempt_id, _, _ in rows}
+        unmarked = {
+            attempt_id: count
+            for attempt_id, count in _unmarked_answers().filter(attempt__in=candidates)
+            .values('attempt_id').annotate(count=Count('id')).values_list('attempt_id', 'count')
+            if attempt_id in locked
+        }
+        if unmarked and not skip_unmarked:
+            answers = sum(unmarked.values())
+            raise ReleaseError(
+                f'{len(unmarked)} attempt(s) still have {answers} unmarked answer(s)',
+                unmarked_attempts=len(unmarked),
+                unmarked_answers=answers,
+            )
+        rows = [row for row in rows if row[0] not in unmarked]
+        if rows:
+            ids = [attempt_id for attempt_id, _, _ in rows]
+            for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+                candidates.filter(pk__in=ids[start:start + UPDATE_BATCH_SIZE]).update(results_ready=True)
+            _log(rows, 'RESULTS_RELEASED', description, user, now)
+            _finish(rows, {
+                'action': 'released',
+                'by': user.username if user else None,
+                'at': now.isoformat(),
+                'skipped_unmarked': len(unmarked),
+            })
+    return [attempt_id for attempt_id, _, _ in rows], len(unmarked)
+
+
+def unrelease_attempts(attempts, user, description='Admin withdrew released results'):
+    """Withdraw released results in `attempts`; returns the affected attempt ids"""
+    candidates = attempts.filter(results_ready=True)
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(candidates.select_for_update().values_list('id', 'user_id', 'exam_id'))
+        if rows:
+            candidates.update(results_ready=False)
+            _log(rows, 'RESULTS_UNRELEASED', description, user, now)
+            _finish(rows, {
+                'action': 'unreleased',
+                'by': user.username if user else None,
+                'at': now.isoformat(),
+            })
+    return [attempt_id for attempt_id, _, _ in rows]
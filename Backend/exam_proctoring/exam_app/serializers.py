@@ -67,7 +67,7 @@ class ExamSerializer(serializers.ModelSerializer):
             'start_time', 'end_time', 'questions', 'questions_count',
             'shuffle_questions', 'shuffle_options', 'is_active', 'created_at',
             'enable_negative_marking', 'negative_mark_percentage', 
-            'enable_partial_marking', 'auto_calculate_total'
+            'enable_partial_marking', 'auto_calculate_total', 'enrollment_required'
         ]
     
     def get_questions_count(self, obj):
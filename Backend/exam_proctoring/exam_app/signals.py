@@ -10,6 +10,8 @@ from django.db.models import Sum
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from .models import ExamActivityLog, ExamAttempt, Question, Option, Answer
+from .exam_stats import invalidate_exam_stats
+from .analytics import invalidate_student_performance
 
 
 @receiver(post_save, sender=ExamActivityLog)
@@ -135,6 +137,9 @@ def update_answers_on_option_change(sender, instance, created, **kwargs):
                     )['total'] or 0.0
                     attempt.score = float(total_marks)
                     attempt.save()
+        
+        # Answers may have been re-marked; rebuild analytics on next read
+        invalidate_exam_stats(question.exam_id)
 
 
 @receiver(post_delete, sender=Option)
@@ -161,4 +166,19 @@ def update_answers_on_option_delete(sender, instance, **kwargs):
             )['total'] or 0.0
             attempt.score = float(total_marks)
             attempt.save()
+    
+    invalidate_exam_stats(question.exam_id)
+
 
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=ExamAttempt)
+def invalidate_stats_on_delete(sender, instance, **kwargs):
+    """Deleted questions/attempts are dropped from analytics by a rebuild"""
+    invalidate_exam_stats(instance.exam_id)
+
+
+@receiver(post_save, sender=ExamAttempt)
+@receiver(post_delete, sender=ExamAttempt)
+def invalidate_student_performance_cache(sender, instance, **kwargs):
+    """Drop the cached performance summary of the attempt's student"""
+    invalidate_student_performance(instance.user_id)
@@ -0,0 +1,496 @@
+# backend/exam_app/student_import.py
+"""
+Bulk student account import
+Rows come from a JSON list or are streamed from an uploaded CSV/XLSX roster
+and are imported in batches of IMPORT_BATCH_SIZE: existing usernames and
+emails are looked up with one IN query each per batch, passwords are hashed
+on the process pool of password_hashing, and users and their profiles are
+inserted (or, with update_existing, updated) in bulk. A batch that hits a
+concurrent insert of the same username falls back to row-by-row inserts so
+only the clashing rows fail. Imported students can be enrolled in exams.
+
+Only plain student accounts are updated: rows matching a staff, superuser
+or instructor account are skipped, so a roster cannot reset their
+passwords. A new password revokes all of the student's API tokens.
+
+Only one batch is held in memory at a time, so memory stays flat however
+long the roster is; the outcome of every row is written to a CSV report as
+the import goes. Duplicates are detected within a batch and against the
+database, so a username repeated in a later batch counts as existing.
+
+Imports run as StudentImportJob rows on the background worker pool; progress
+is saved after every batch and pushed to the admin monitoring WebSocket.
+Rows posted as JSON are handed to the job in memory and never stored, so
+roster passwords do not outlive the import.
+"""
+import csv
+import itertools
+import os
+import tempfile
+import traceback
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from authentication.models import AuthToken, UserProfile
+from authentication.token_cache import invalidate_user_tokens
+from authentication.tokens import revoke_tokens
+from .background import claim_job, heartbeat, run_in_background
+from .models import ExamEnrollment, StudentImportJob
+from .password_hashing import hash_passwords
+from .question_import import _iter_decoded_lines
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 500
+
+# Kept for accounts imported without a password, as before
+DEFAULT_PASSWORD = 'defaultpassword123'
+
+# Errors stored on the job row; the rest are only counted (and in the report)
+MAX_STORED_ERRORS = 1000
+
+ROSTER_FORMATS = ('csv', 'xlsx')
+
+USER_FIELDS = ('email', 'first_name', 'last_name', 'phone_number')
+PROFILE_FIELDS = ('student_id', 'department', 'year_of_study')
+
+REPORT_HEADER = ['row', 'username', 'result', 'error']
+
+# The only existing accounts a roster may update
+UPDATABLE_ACCOUNT = {'is_student': True, 'is_staff': False, 'is_superuser': False, 'is_instructor': False}
+
+
+class StudentImportError(Exception):
+    """The roster as a whole cannot be imported"""
+
+
+def _text(value, max_length):
+    return str(value if value is not None else '').strip()[:max_length]
+
+
+def _clean(row):
+    """Validated field values of a row, or raise ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('Row must be an object')
+    username = User.normalize_username(_text(row.get('username'), 150))
+    email = User.objects.normalize_email(_text(row.get('email'), 254))
+    if not username or not email:
+        raise ValueError('Missing username or email')
+    year = row.get('year_of_study')
+    if year not in (None, ''):
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            raise ValueError('year_of_study must be a number')
+    else:
+        year = None
+    return {
+        'username': username,
+        'email': email,
+        'password': str(row.get('password') or '') or None,
+        'first_name': _text(row.get('first_name'), 150),
+        'last_name': _text(row.get('last_name'), 150),
+        'phone_number': _text(row.get('phone_number'), 15),
+        'student_id': _text(row.get('student_id'), 20) or None,
+        'department': _text(row.get('department'), 100) or None,
+        'year_of_study': year,
+    }
+
+
+def _build(values, password_hash):
+    return User(
+        username=values['username'],
+        password=password_hash,
+        is_student=True,
+        **{field: values[field] for field in USER_FIELDS}
+    )
+
+
+def _profile(user_id, values):
+    return UserProfile(user_id=user_id, **{field: values[field] for field in PROFILE_FIELDS})
+
+
+def _insert(rows):
+    """
+    Insert (row_number, values, password_hash) rows; returns the new user id
+    of each inserted row number, leaving out rows that clashed with a
+    concurrent insert
+    """
+    try:
+        with transaction.atomic():
+            users = User.objects.bulk_create([_build(values, password_hash) for _, values, password_hash in rows])
+            UserProfile.objects.bulk_create([_profile(user.id, values) for user, (_, values, _) in zip(users, rows)])
+        return {row_number: user.id for user, (row_number, _, _) in zip(users, rows)}
+    except IntegrityError:
+        pass
+
+    created = {}
+    for row_number, values, password_hash in rows:
+        try:
+            with transaction.atomic():
+                user = _build(values, password_hash)
+                user.save()
+                _profile(user.id, values).save()
+            created[row_number] = user.id
+        except IntegrityError:
+            pass
+    return created
+
+
+def _update(rows):
+    """
+    Apply (user_id, values, password_hash) rows to existing student
+    accounts (any other account is left alone); blank values keep what is
+    stored, a missing password keeps the old one
+    """
+    users = User.objects.filter(**UPDATABLE_ACCOUNT).in_bulk([user_id for user_id, _, _ in rows])
+    rows = [row for row in rows if row[0] in users]
+    profiles = {
+        profile.user_id: profile
+        for profile in UserProfile.objects.filter(user_id__in=users.keys())
+    }
+    new_profiles = []
+    for user_id, values, password_hash in rows:
+        user = users[user_id]
+        for field in USER_FIELDS:
+            if values[field]:
+                setattr(user, field, values[field])
+        if password_hash:
+            user.password = password_hash
+        profile = profiles.get(user_id)
+        if profile is None:
+            new_profiles.append(_profile(user_id, values))
+            continue
+        for field in PROFILE_FIELDS:
+            if values[field] is not None:
+                setattr(profile, field, values[field])
+    with transaction.atomic():
+        User.objects.bulk_update(list(users.values()), USER_FIELDS + ('password',))
+        UserProfile.objects.bulk_update(list(profiles.values()), PROFILE_FIELDS)
+        UserProfile.objects.bulk_create(new_profiles)
+        # A new password signs the student out everywhere
+        revoke_tokens(AuthToken.objects.filter(
+            user_id__in=[user_id for user_id, _, password_hash in rows if password_hash]
+        ))
+    # bulk_update sends no signals, so drop cached logins of changed users here
+    invalidate_user_tokens(*users.keys())
+
+
+def _enroll(user_ids, exam_ids, enrolled_by):
+    ExamEnrollment.objects.bulk_create([
+        ExamEnrollment(exam_id=exam_id, user_id=user_id, enrolled_by=enrolled_by)
+        for exam_id in exam_ids
+        for user_id in user_ids
+    ], ignore_conflicts=True)
+
+
+def import_students(rows, progress_callback=None, update_existing=False, exam_ids=(), enrolled_by=None, report=None):
+    """
+    Create (or update) student accounts from (row_number, row dict) pairs
+
+    Row keys are username, email, password, first_name, last_name,
+    phone_number, student_id, department and year_of_study. Students created
+    or updated are enrolled in `exam_ids`. `report(row_number, username,
+    result, error)` is called for every row.
+    """
+    result = {'total': 0, 'processed': 0, 'imported': 0, 'updated': 0, 'skipped': 0, 'error_count': 0, 'errors': []}
+    outcomes = []
+
+    def fail(row_number, username, error, outcome='error'):
+        if outcome == 'skipped':
+            result['skipped'] += 1
+        else:
+            result['error_count'] += 1
+        if len(result['errors']) < MAX_STORED_ERRORS:
+            result['errors'].append({'row': row_number, 'username': username, 'error': error})
+        outcomes.append((row_number, username, outcome, error))
+
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, IMPORT_BATCH_SIZE))
+        if not chunk:
+            break
+
+        batch = []
+        seen_usernames = set()
+        seen_emails = set()
+        for row_number, row in chunk:
+            try:
+                values = _clean(row)
+            except ValueError as e:
+                fail(row_number, row.get('username') if isinstance(row, dict) else None, str(e))
+                continue
+            if values['username'] in seen_usernames:
+                fail(row_number, values['username'], 'Duplicate username in import')
+                continue
+            if values['email'].lower() in seen_emails:
+                fail(row_number, values['username'], 'Duplicate email in import')
+                continue
+            seen_usernames.add(values['username'])
+            seen_emails.add(values['email'].lower())
+            batch.append((row_number, values))
+
+        existing_users = {}
+        updatable_ids = set()
+        for user in User.objects.filter(
+            username__in=[values['username'] for _, values in batch]
+        ).values('id', 'username', *UPDATABLE_ACCOUNT):
+            existing_users[user['username']] = user['id']
+            if all(user[field] == value for field, value in UPDATABLE_ACCOUNT.items()):
+                updatable_ids.add(user['id'])
+        email_owners = dict(User.objects.filter(
+            email__in=[values['email'] for _, values in batch]
+        ).values_list('email', 'username'))
+        new_rows = []
+        update_rows = []
+        for row_number, values in batch:
+            owner = email_owners.get(values['email'])
+            if values['username'] in existing_users and not update_existing:
+                fail(row_number, values['username'], 'Username already exists')
+            elif owner is not None and owner != values['username']:
+                fail(row_number, values['username'], 'Email already exists')
+            elif values['username'] in existing_users and existing_users[values['username']] not in updatable_ids:
+                fail(row_number, values['username'], 'Existing account is not a student account, not updated', 'skipped')
+            elif values['username'] in existing_users:
+                update_rows.append((row_number, values))
+            else:
+                new_rows.append((row_number, values))
+
+        password_hashes = iter(hash_passwords(
+            [values['password'] or DEFAULT_PASSWORD for _, values in new_rows]
+            + [values['password'] for _, values in update_rows if values['password']]
+        ))
+        created = _insert([(row_number, values, next(password_hashes)) for row_number, values in new_rows])
+        if update_rows:
+            _update([
+                (existing_users[values['username']], values, next(password_hashes) if values['password'] else None)
+                for _, values in update_rows
+            ])
+        enrolled_ids = list(created.values()) + [existing_users[values['username']] for _, values in update_rows]
+        if exam_ids and enrolled_ids:
+            _enroll(enrolled_ids, exam_ids, enrolled_by)
+
+        for row_number, values in new_rows:
+            if row_number not in created:
+                fail(row_number, values['username'], 'Username already exists')
+            else:
+                outcomes.append((row_number, values['username'], 'created', ''))
+        outcomes.extend((row_number, values['username'], 'updated', '') for row_number, values in update_rows)
+        if report:
+            for outcome in sorted(outcomes):
+                report(*outcome)
+        outcomes.clear()
+        result['imported'] += len(created)
+        result['updated'] += len(update_rows)
+        result['processed'] += len(chunk)
+        result['total'] = result['processed']
+
+        if progress_callback:
+            progress_callback(result)
+    result['errors'].sort(key=lambda error: error['row'])
+    return result
+
+
+def roster_format(file_name):
+    """'csv' or 'xlsx' from a roster's file name, or None"""
+    extension = os.path.splitext(file_name or '')[1].lower().lstrip('.')
+    return extension if extension in ROSTER_FORMATS else None
+
+
+def _column(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def _check_header(header):
+    if not header:
+        raise StudentImportError('Roster is empty')
+    columns = [_column(name) for name in header]
+    missing = [name for name in ('username', 'email') if name not in columns]
+    if missing:
+        raise StudentImportError(f"Roster is missing the column(s): {', '.join(missing)}")
+    return columns
+
+
+def _csv_rows(upload):
+    reader = csv.reader(_iter_decoded_lines(upload))
+    try:
+        columns = _check_header(next(reader, None))
+        # Numbered like the spreadsheet: the header is row 1
+        for row_number, cells in enumerate(reader, start=2):
+            if any(cell.strip() for cell in cells):
+                yield row_number, dict(zip(columns, cells))
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise StudentImportError(f'Error reading CSV: {str(e)}')
+
+
+def _xlsx_rows(upload):
+    if not OPENPYXL_AVAILABLE:
+        raise StudentImportError('XLSX rosters require openpyxl. Install it with: pip install openpyxl')
+    try:
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+    except Exception as e:
+        raise StudentImportError(f'Error reading XLSX: {str(e)}')
+    try:
+        cells = workbook.active.iter_rows(values_only=True)
+        columns = _check_header(next(cells, None))
+        for row_number, values in enumerate(cells, start=2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, {
+                    column: '' if value is None else value
+                    for column, value in zip(columns, values)
+                }
+    finally:
+        workbook.close()
+
+
+def roster_rows(upload, file_format):
+    """(row_number, row dict) pairs streamed from a CSV or XLSX roster"""
+    return _csv_rows(upload) if file_format == 'csv' else _xlsx_rows(upload)
+
+
+def student_import_job_data(job):
+    return {
+        'id': job.id,
+        'file_name': job.file_name,
+        'update_existing': job.update_existing,
+        'exam_ids': [exam.id for exam in job.exams.all()],
+        'status': job.status,
+        'processed': job.processed,
+        'imported': job.imported,
+        'total': job.total,
+        'error_count': job.error_count,
+        'errors': job.errors,
+        'message': job.message,
+        'results_url': f'/api/exam/admin/student-import-jobs/{job.id}/results/' if job.results_file else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _notify(job):
+    """Push job progress to admins on the monitoring dashboard"""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            'admin_monitoring',
+            {
+                'type': 'student_import_progress',
+                'data': student_import_job_data(job)
+            }
+        )
+    except Exception as e:
+        print(f"Error sending student import progress: {e}")
+
+
+def _save(job, **fields):
+    for field, value in fields.items():
+        setattr(job, field, value)
+    StudentImportJob.objects.filter(pk=job.pk).update(**fields)
+    _notify(job)
+
+
+def _count_rows(job, file_format):
+    """Rows in the upload, for progress; a cheap extra pass over the file"""
+    with job.file.open('rb') as upload:
+        if file_format == 'csv':
+            return sum(1 for _ in _csv_rows(upload))
+        if not OPENPYXL_AVAILABLE:
+            return 0
+        workbook = load_workbook(upload, read_only=True)
+        try:
+            return max((workbook.active.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+
+
+def _delete_upload(job):
+    if job.file:
+        job.file.delete(save=False)
+        StudentImportJob.objects.filter(pk=job.pk).update(file='')
+
+
+def execute_student_import(job_id, students=None):
+    """Run a student import job in the current thread, on `students` rows or the uploaded roster"""
+    job = StudentImportJob.objects.prefetch_related('exams').get(pk=job_id)
+    exam_ids = [exam.id for exam in job.exams.all()]
+    if not claim_job(job):
+        return
+    _notify(job)
+
+    def progress(result):
+        _save(job, processed=result['processed'], imported=result['imported'], error_count=result['error_count'])
+
+    try:
+        with heartbeat(job), tempfile.TemporaryFile(mode='w+', encoding='utf-8', newline='') as report_file:
+            writer = csv.writer(report_file)
+            writer.writerow(REPORT_HEADER)
+
+            def report(row_number, username, outcome, error):
+                writer.writerow([row_number, username or '', outcome, error])
+
+            options = {
+                'progress_callback': progress,
+                'update_existing': job.update_existing,
+                'exam_ids': exam_ids,
+                'enrolled_by': job.created_by,
+                'report': report,
+            }
+            if job.file:
+                file_format = roster_format(job.file_name)
+                if file_format is None:
+                    raise StudentImportError('Roster must be a .csv or .xlsx file')
+                _save(job, total=_count_rows(job, file_format))
+                with job.file.open('rb') as upload:
+                    result = import_students(roster_rows(upload, file_format), **options)
+            else:
+                _save(job, total=len(students or []))
+                result = import_students(enumerate(students or [], start=1), **options)
+
+            report_file.seek(0)
+            job.results_file.save(f'student_import_{job.id}.csv', File(report_file), save=False)
+    except StudentImportError as e:
+        _save(job, status='FAILED', message=str(e), finished_at=timezone.now())
+        return
+    except Exception as e:
+        print(f"Error in student import job {job.id}: {e}")
+        traceback.print_exc()
+        _save(job, status='FAILED', message=f'Error importing students: {str(e)}', finished_at=timezone.now())
+        return
+    finally:
+        # The roster may hold passwords: remove it however the import ended
+        _delete_upload(job)
+
+    message = f'Imported {result["imported"]} of {result["total"]} students'
+    if result['updated']:
+        message += f', updated {result["updated"]}'
+    if result['skipped']:
+        message += f', skipped {result["skipped"]} non-student account(s)'
+    _save(
+        job,
+        results_file=job.results_file.name,
+        status='COMPLETED',
+        processed=result['total'],
+        imported=result['imported'],
+        total=result['total'],
+        error_count=result['error_count'],
+        errors=result['errors'],
+        message=message,
+        finished_at=timezone.now(),
+    )
+
+
+def start_student_import(job, students=None):
+    """Queue a saved job, with its JSON rows if any, once the current transaction commits"""
+    run_in_background(execute_student_import, job.id, students)
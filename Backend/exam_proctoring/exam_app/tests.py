@@ -1,3 +1,1153 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import os
+import random
+import shutil
+import smtplib
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.core import mail
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import OperationalError, connection
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.tokens import issue_token
+from . import (
+    background, collusion, exam_stats, exports, item_analysis, mailer, password_hashing, question_import,
+    result_pdfs, results_release, student_import, text_similarity,
+)
+from .models import (
+    Answer, Exam, ExamAttempt, ExamQuestionStats, ExamScoreStats, Option, OutboxEmail, Question, QuestionImportJob,
+    ResultPdfBundle, StudentImportJob,
+)
+from .question_import import (
+    QuestionImportError, get_image_from_url_or_path, import_questions_from_csv, resolve_import_images,
+)
 
-# Create your tests here.
+User = get_user_model()
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+CSV_HEADER = 'Question,Type,Marks,Option1,Option2,Option3,Option4,Correct\n'
+
+
+def csv_questions(count, prefix='Q'):
+    return CSV_HEADER + ''.join(f'"{prefix} {idx}",MCQ,1,a,b,c,d,2\n' for idx in range(count))
+
+
+def completed_attempt(exam, username, **fields):
+    user = User.objects.create_user(username, password='x', email=f'{username}@example.com')
+    fields.setdefault('status', 'COMPLETED')
+    fields.setdefault('total_questions', exam.questions.count())
+    return ExamAttempt.objects.create(user=user, exam=exam, **fields)
+
+
+def admin_client():
+    admin = User.objects.create_user('admin', password='x', is_staff=True)
+    client = APIClient()
+    client.force_authenticate(admin)
+    return admin, client
+
+
+def use_temporary_storage(test, location, model, *field_names):
+    """Point file fields at `location`; their storage was built from the settings at import"""
+    for field_name in field_names:
+        patcher = mock.patch.object(model._meta.get_field(field_name), 'storage', FileSystemStorage(location=location))
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+class ImageServer(ThreadingHTTPServer):
+    """Local stand-in for an image host, recording the client port of every request"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ImageRequestHandler)
+        self.ports = []
+        self.release = threading.Event()
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on /slow close the socket under the handler
+        pass
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled connections can be told apart from new ones
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.ports.append(self.client_address[1])
+        if self.path.startswith('/slow'):
+            self.server.release.wait(5)
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(PNG_BYTES)))
+        self.end_headers()
+        self.wfile.write(PNG_BYTES)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ImageFetchTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ImageServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def tearDown(self):
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_downloads_image(self):
+        content = get_image_from_url_or_path(self.server.url('/images/logo.png'))
+        self.assertEqual(content.name, 'logo.png')
+        self.assertEqual(content.read(), PNG_BYTES)
+
+    def test_http_error_raises_import_error(self):
+        with self.assertRaises(QuestionImportError):
+            get_image_from_url_or_path(self.server.url('/missing.png'))
+
+    def test_slow_host_times_out(self):
+        with mock.patch.object(question_import, 'IMAGE_FETCH_TIMEOUT', (1, 0.2)):
+            with self.assertRaisesMessage(QuestionImportError, 'timed out'):
+                get_image_from_url_or_path(self.server.url('/slow.png'))
+
+    def test_session_reuses_connection(self):
+        session = question_import._new_image_session(1)
+        try:
+            for idx in range(3):
+                get_image_from_url_or_path(self.server.url(f'/{idx}.png'), session=session)
+        finally:
+            session.close()
+        self.assertEqual(len(self.server.ports), 3)
+        self.assertEqual(len(set(self.server.ports)), 1)
+
+    def test_resolve_shares_pooled_session(self):
+        questions = [
+            (idx, {'question_type': 'SA', 'question_image': self.server.url(f'/q{idx}.png')})
+            for idx in range(12)
+        ]
+        questions.append((12, {'question_type': 'SA', 'question_image': self.server.url('/missing.png')}))
+
+        resolved = resolve_import_images(questions, max_workers=4)
+
+        self.assertEqual(len(resolved), 13)
+        failed = resolved.pop((self.server.url('/missing.png'), 'question_image'))
+        self.assertIsInstance(failed, QuestionImportError)
+        for name in resolved.values():
+            self.assertTrue(name.startswith('questions/'))
+        # Every worker keeps its connection open for its next download
+        self.assertEqual(len(self.server.ports), 13)
+        self.assertLessEqual(len(set(self.server.ports)), 4)
+
+
+class FlakyEmailBackend(EmailBackend):
+    """locmem backend that refuses some recipients the way an SMTP server would"""
+    def send_messages(self, messages):
+        for message in messages:
+            recipient = message.to[0]
+            if recipient.startswith('refused'):
+                raise smtplib.SMTPRecipientsRefused({recipient: (550, b'No such user')})
+            if recipient.startswith('busy'):
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            if recipient.startswith('crash'):
+                # The worker process going away, not a delivery error
+                raise SystemExit('worker killed')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='exam_app.tests.FlakyEmailBackend',
+    EMAIL_BATCH_SIZE=2,
+    BACKGROUND_JOB_WORKERS=0,
+)
+class SendDueEmailsTests(TestCase):
+    def queue(self, recipient, **fields):
+        fields.setdefault('next_attempt_at', timezone.now())
+        return OutboxEmail.objects.create(recipient=recipient, subject='Results', body='Your results', **fields)
+
+    def test_sends_due_emails_in_batches(self):
+        emails = [self.queue(f'student{idx}@example.com') for idx in range(5)]
+        not_due = self.queue('later@example.com', next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        totals = mailer.send_due_emails()
+
+        self.assertEqual(totals, {'sent': 5, 'retrying': 0, 'failed': 0})
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(email.recipient for email in emails))
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.tries), ('SENT', 1))
+            self.assertIsNotNone(email.sent_at)
+        not_due.refresh_from_db()
+        self.assertEqual(not_due.status, 'PENDING')
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        email = self.queue('busy@example.com')
+        other = self.queue('student@example.com')
+
+        before = timezone.now()
+        totals = mailer.send_due_emails()
+
+        self.assertEqual(totals, {'sent': 1, 'retrying': 1, 'failed': 0})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tries), ('PENDING', 1))
+        self.assertIn('unexpectedly closed', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=mailer.RETRY_BASE_DELAY))
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'SENT')
+
+        # Not due again until the backoff has passed
+        self.assertEqual(mailer.send_due_emails(), {'sent': 0, 'retrying': 0, 'failed': 0})
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        mailer.send_due_emails()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tries), ('PENDING', 2))
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=2 * mailer.RETRY_BASE_DELAY))
+
+    def test_gives_up_after_max_tries(self):
+        email = self.queue('busy@example.com', tries=mailer.MAX_TRIES - 1)
+
+        self.assertEqual(mailer.send_due_emails(), {'sent': 0, 'retrying': 0, 'failed': 1})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tries), ('FAILED', mailer.MAX_TRIES))
+
+    def test_refused_recipient_fails_permanently(self):
+        email = self.queue('refused@example.com')
+        other = self.queue('student@example.com')
+
+        self.assertEqual(mailer.send_due_emails(), {'sent': 1, 'retrying': 0, 'failed': 1})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tries), ('FAILED', 1))
+        self.assertEqual([message.to[0] for message in mail.outbox], [other.recipient])
+
+    def test_expired_claim_is_taken_over(self):
+        now = timezone.now()
+        claimed = self.queue('claimed@example.com', status='SENDING', next_attempt_at=now + timedelta(minutes=5))
+        abandoned = self.queue('abandoned@example.com', status='SENDING', next_attempt_at=now - timedelta(seconds=1))
+
+        self.assertEqual(mailer.send_due_emails()['sent'], 1)
+        claimed.refresh_from_db()
+        abandoned.refresh_from_db()
+        self.assertEqual(claimed.status, 'SENDING')
+        self.assertEqual(abandoned.status, 'SENT')
+        self.assertEqual([message.to[0] for message in mail.outbox], ['abandoned@example.com'])
+
+    def test_sent_emails_are_recorded_before_the_batch_ends(self):
+        for recipient in ('first@example.com', 'second@example.com', 'crash@example.com'):
+            self.queue(recipient)
+
+        with self.settings(EMAIL_BATCH_SIZE=3), self.assertRaises(SystemExit):
+            mailer.send_due_emails()
+
+        self.assertEqual(
+            dict(OutboxEmail.objects.values_list('recipient', 'status')),
+            {'first@example.com': 'SENT', 'second@example.com': 'SENT', 'crash@example.com': 'SENDING'},
+        )
+        # Once the claim expires only the unsent email goes out again
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        OutboxEmail.objects.filter(recipient='crash@example.com').update(recipient='third@example.com')
+        mail.outbox = []
+        self.assertEqual(mailer.send_due_emails()['sent'], 1)
+        self.assertEqual([message.to[0] for message in mail.outbox], ['third@example.com'])
+
+    def test_claim_holds_rows_for_claim_timeout(self):
+        email = self.queue('student@example.com')
+
+        before = timezone.now()
+        claimed = mailer._claim_batch(10)
+
+        self.assertEqual([row.pk for row in claimed], [email.pk])
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'SENDING')
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=mailer.CLAIM_TIMEOUT))
+        # A second sender finds nothing due while the claim is live
+        self.assertEqual(mailer._claim_batch(10), [])
+
+
+@override_settings(BACKGROUND_JOB_WORKERS=0)
+class QuestionImportViewTests(TestCase):
+    def setUp(self):
+        self.admin, self.client = admin_client()
+        self.exam = Exam.objects.create(title='Algebra', created_by=self.admin)
+
+    def upload(self, url, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {'file': SimpleUploadedFile('questions.csv', content.encode())})
+
+    def test_import_questions_runs_as_background_job(self):
+        response = self.upload(f'/api/exam/admin/exams/{self.exam.id}/import-questions/', csv_questions(3))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'PENDING')
+        status_response = self.client.get(f'/api/exam/admin/import-jobs/{response.data["id"]}/')
+        self.assertEqual(status_response.data['status'], 'COMPLETED')
+        self.assertEqual(status_response.data['imported'], 3)
+        self.assertEqual(Question.objects.filter(exam=self.exam).count(), 3)
+        self.assertFalse(QuestionImportJob.objects.get(pk=response.data['id']).file)
+
+    def test_failed_import_is_reported_on_the_job(self):
+        response = self.upload(f'/api/exam/admin/exams/{self.exam.id}/import-jobs/', CSV_HEADER)
+
+        status_response = self.client.get(f'/api/exam/admin/import-jobs/{response.data["id"]}/')
+        self.assertEqual(status_response.data['status'], 'FAILED')
+        self.assertTrue(status_response.data['message'])
+
+
+@override_settings(BACKGROUND_JOB_STALE_TIMEOUT=1)
+class HeartbeatTests(TransactionTestCase):
+    def test_job_survives_transient_heartbeat_failures(self):
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        exam = Exam.objects.create(title='Algebra', created_by=admin)
+        job = QuestionImportJob.objects.create(exam=exam, status='PENDING')
+        self.assertTrue(background.claim_job(job))
+
+        update = QuerySet.update
+        failures = []
+
+        def flaky_update(queryset, **kwargs):
+            # The first beats hit a database locked by the job's own write
+            if threading.current_thread().name == 'background-job-heartbeat' and len(failures) < 3:
+                failures.append(kwargs)
+                raise OperationalError('database is locked')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(background, 'HEARTBEAT_INTERVAL', 0.1), \
+                mock.patch.object(QuerySet, 'update', flaky_update):
+            with background.heartbeat(job):
+                # Run past the stale timeout
+                time.sleep(1.5)
+                failed = background.fail_stale_jobs(QuestionImportJob.objects.all())
+
+        self.assertEqual(len(failures), 3)
+        self.assertEqual(failed, [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'RUNNING')
+        self.assertGreater(job.heartbeat_at, job.started_at)
+
+
+class CsvOverwriteTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        self.exam = Exam.objects.create(title='Algebra', created_by=admin)
+        import_questions_from_csv(self.exam.id, csv_questions(5, prefix='Old'))
+
+    def question_texts(self):
+        return set(Question.objects.filter(exam=self.exam).values_list('question_text', flat=True))
+
+    def test_overwrite_replaces_questions_once_complete(self):
+        result = import_questions_from_csv(self.exam.id, csv_questions(25, prefix='New'), overwrite=True, chunk_size=10)
+
+        self.assertEqual(result['imported'], 25)
+        self.assertEqual(self.question_texts(), {f'New {idx}' for idx in range(25)})
+
+    def test_parse_error_after_first_chunk_leaves_exam_unchanged(self):
+        # Bytes that are not UTF-8, read only after the first chunk committed
+        upload = io.BytesIO(csv_questions(15, prefix='New').encode() + b'"Broken \xff\xfe",MCQ,1,a,b,c,d,2\n')
+
+        with mock.patch.object(question_import, 'CSV_READ_BLOCK_SIZE', 64):
+            with self.assertRaisesMessage(QuestionImportError, 'Error parsing CSV'):
+                import_questions_from_csv(self.exam.id, upload, overwrite=True, chunk_size=10)
+
+        self.assertEqual(self.question_texts(), {f'Old {idx}' for idx in range(5)})
+
+    def test_failed_chunk_leaves_exam_unchanged(self):
+        save = question_import.save_question_chunk
+        calls = []
+
+        def failing_save(chunk):
+            calls.append(len(chunk))
+            if len(calls) == 2:
+                raise OperationalError('disk I/O error')
+            return save(chunk)
+
+        with mock.patch.object(question_import, 'save_question_chunk', failing_save):
+            with self.assertRaises(OperationalError):
+                import_questions_from_csv(self.exam.id, csv_questions(25, prefix='New'), overwrite=True, chunk_size=10)
+
+        self.assertEqual(self.question_texts(), {f'Old {idx}' for idx in range(5)})
+
+
+class TextSignatureTests(TestCase):
+    def setUp(self):
+        self.admin, self.client = admin_client()
+        self.exam = Exam.objects.create(title='Essays', created_by=self.admin)
+        self.question = Question.objects.create(exam=self.exam, question_text='Explain recursion', question_type='SA', marks=5)
+
+    def test_frozen_migration_key_matches_live_key(self):
+        migration = importlib.import_module('exam_app.migrations.0014_answer_key')
+        for text in ('', '  ', 'Recursion: a function calling ITSELF!', 'naïve_answer\twith   spaces'):
+            self.assertEqual(migration.answer_text_key(text), text_similarity.answer_text_key(text))
+
+    def test_signature_is_stored_on_save(self):
+        attempt = completed_attempt(self.exam, 'alice')
+        answer = Answer.objects.create(attempt=attempt, question=self.question, answer_text='A function that calls itself')
+        self.assertEqual(bytes(answer.text_signature), text_similarity.pack_signature('a function that calls itself'))
+
+        answer.answer_text = 'Something else entirely'
+        answer.save(update_fields=['answer_text'])
+        answer.refresh_from_db()
+        self.assertEqual(bytes(answer.text_signature), text_similarity.pack_signature('something else entirely'))
+
+    def test_clusters_are_read_only(self):
+        text = 'Recursion is when a function solves a problem by calling itself on smaller inputs'
+        for username, answer_text in (('alice', text), ('bob', text.upper() + '!'), ('carol', 'No idea')):
+            Answer.objects.create(attempt=completed_attempt(self.exam, username), question=self.question, answer_text=answer_text)
+        # A row written around Answer.save has no signature yet
+        Answer.objects.filter(attempt__user__username='bob').update(text_signature=None)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/exam/admin/exams/{self.exam.id}/answer-clusters/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+        clusters = response.data['questions'][0]['clusters']
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['size'], 2)
+        self.assertTrue(clusters[0]['identical'])
+
+        self.assertEqual(text_similarity.fill_text_signatures(Answer.objects.all()), 1)
+        self.assertEqual(text_similarity.fill_text_signatures(Answer.objects.all()), 0)
+
+
+class ItemAnalysisTests(TestCase):
+    """Statistics checked against values worked out by hand for a 4 x 3 exam"""
+    # Correct (1) / wrong (0) / unanswered (None) per student and question
+    RESPONSES = [
+        (1, 1, 1),
+        (1, 1, 0),
+        (1, 0, 0),
+        (0, 0, None),
+    ]
+
+    def setUp(self):
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        self.exam = Exam.objects.create(title='Quiz', created_by=admin)
+        self.options = []
+        for order in range(3):
+            question = Question.objects.create(exam=self.exam, question_text=f'Q{order}', question_type='MCQ', marks=1, order=order)
+            right = Option.objects.create(question=question, option_text='right', is_correct=True, order=0)
+            wrong = Option.objects.create(question=question, option_text='wrong', is_correct=False, order=1)
+            self.options.append((question, right, wrong))
+        for idx, responses in enumerate(self.RESPONSES):
+            attempt = completed_attempt(self.exam, f'student{idx}')
+            for (question, right, wrong), response in zip(self.options, responses):
+                if response is not None:
+                    Answer.objects.create(attempt=attempt, question=question, selected_option=right if response else wrong)
+
+    def test_statistics_match_hand_computed_values(self):
+        with mock.patch.object(item_analysis, 'FETCH_SIZE', 2):
+            result = item_analysis.analyze_exam_items(self.exam)
+
+        self.assertEqual((result['candidates'], result['item_count'], result['group_size']), (4, 3, 1))
+        items = result['items']
+        self.assertEqual([item['p_value'] for item in items], [0.75, 0.5, 0.25])
+        # Upper group: student0 (all right), lower group: student3 (all wrong)
+        self.assertEqual([item['discrimination'] for item in items], [1.0, 1.0, 1.0])
+        # Corrected point-biserial: 0.75 / sqrt(0.75 * 2.75) and 1 / sqrt(2)
+        self.assertEqual([item['point_biserial'] for item in items], [0.5222, 0.7071, 0.5222])
+
+        # KR-20 = 3/2 * (1 - (0.1875 + 0.25 + 0.1875) / 1.25)
+        reliability = result['reliability']
+        self.assertEqual(reliability['kr20'], 0.75)
+        self.assertEqual(reliability['cronbach_alpha'], 0.75)
+        self.assertEqual(reliability['mean_score'], 1.5)
+        self.assertEqual(reliability['score_sd'], 1.118)
+        self.assertEqual(reliability['sem'], 0.559)
+
+    def test_distractor_counts(self):
+        result = item_analysis.analyze_exam_items(self.exam)
+
+        last = result['items'][2]['options']
+        self.assertEqual([(option['count'], option['proportion']) for option in last], [(1, 0.25), (2, 0.5)])
+        self.assertEqual((last[1]['upper_proportion'], last[1]['lower_proportion']), (0.0, 0.0))
+        # Chosen by student1 (total 2) and student2 (total 1)
+        self.assertEqual(last[1]['mean_score'], 1.5)
+
+
+class ReleaseAttemptsTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        self.admin = admin
+        self.exam = Exam.objects.create(title='Essay', created_by=admin)
+        self.question = Question.objects.create(exam=self.exam, question_text='Why?', question_type='SA', marks=5, order=0)
+        self.marked = completed_attempt(self.exam, 'marked')
+        Answer.objects.create(attempt=self.marked, question=self.question, answer_text='because', marks_awarded=4)
+        self.unmarked = completed_attempt(self.exam, 'unmarked')
+        answer = Answer.objects.create(attempt=self.unmarked, question=self.question, answer_text='no idea')
+        # Waiting for an instructor
+        Answer.objects.filter(pk=answer.pk).update(marks_awarded=None)
+
+    def test_unmarked_answers_block_the_release(self):
+        with self.assertRaises(results_release.ReleaseError) as raised:
+            results_release.release_attempts(ExamAttempt.objects.filter(exam=self.exam), self.admin)
+        self.assertEqual((raised.exception.unmarked_attempts, raised.exception.unmarked_answers), (1, 1))
+        self.assertFalse(ExamAttempt.objects.filter(results_ready=True).exists())
+
+    def test_skip_unmarked_releases_the_rest(self):
+        released, skipped = results_release.release_attempts(ExamAttempt.objects.filter(exam=self.exam), self.admin, skip_unmarked=True)
+        self.assertEqual((released, skipped), ([self.marked.id], 1))
+        self.assertEqual(list(ExamAttempt.objects.filter(results_ready=True)), [self.marked])
+
+    def test_marking_is_checked_inside_the_transaction_after_locking(self):
+        with CaptureQueriesContext(connection) as queries:
+            results_release.release_attempts(ExamAttempt.objects.filter(exam=self.exam), self.admin, skip_unmarked=True)
+        sql = [query['sql'] for query in queries.captured_queries]
+        begin = next(index for index, statement in enumerate(sql) if statement.startswith('SAVEPOINT'))
+        lock = next(index for index, statement in enumerate(sql) if statement.startswith('SELECT "exam_app_examattempt"."id"'))
+        check = next(index for index, statement in enumerate(sql) if 'FROM "exam_app_answer"' in statement and 'COUNT' in statement)
+        self.assertLess(begin, check)
+        self.assertLess(lock, check)
+
+
+class ExamStatsTests(TestCase):
+    """Incrementally refreshed stats must match a rebuild from scratch"""
+
+    def setUp(self):
+        self.admin, self.admin_api = admin_client()
+        self.exam = Exam.objects.create(title='Mixed', created_by=self.admin, total_marks=5, passing_marks=50)
+        self.mcq = Question.objects.create(exam=self.exam, question_text='Pick', question_type='MCQ', marks=2, order=0)
+        self.right = Option.objects.create(question=self.mcq, option_text='right', is_correct=True, order=0)
+        self.wrong = Option.objects.create(question=self.mcq, option_text='wrong', is_correct=False, order=1)
+        self.essay = Question.objects.create(exam=self.exam, question_text='Explain', question_type='SA', marks=3, order=1)
+
+    def submit(self, username, option, text):
+        user = User.objects.create_user(username, password='x')
+        attempt = ExamAttempt.objects.create(
+            user=user, exam=self.exam, status='IN_PROGRESS', total_questions=2,
+            start_time=timezone.now() - timedelta(minutes=len(username)),
+        )
+        Answer.objects.create(attempt=attempt, question=self.mcq, selected_option=option)
+        essay = Answer.objects.create(attempt=attempt, question=self.essay, answer_text=text)
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.post(f'/api/exam/attempts/{attempt.id}/submit/').status_code, 200)
+        return essay
+
+    def mark(self, answer, marks):
+        response = self.admin_api.post(f'/api/exam/admin/answers/{answer.id}/mark/', {'marks_awarded': marks}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def stats(self):
+        score = ExamScoreStats.objects.get(exam=self.exam)
+        self.assertFalse(score.is_stale)
+        fields = (
+            'attempt_count', 'passed_count', 'scored_count', 'score_sum', 'score_min', 'score_max',
+            'duration_count', 'duration_sum_seconds', 'grade_distribution', 'score_distribution',
+        )
+        questions = {
+            stats.question_id: (stats.answered_count, stats.correct_count, stats.marked_count, stats.marks_sum)
+            for stats in ExamQuestionStats.objects.filter(exam=self.exam)
+        }
+        return {field: getattr(score, field) for field in fields}, questions
+
+    def test_submit_and_remark_match_a_full_rebuild(self):
+        first = self.submit('ann', self.right, 'photosynthesis')
+        exam_stats.ensure_exam_stats(self.exam)
+
+        second = self.submit('bob', self.wrong, 'no idea')
+        third = self.submit('cleo', self.right, 'chlorophyll')
+        self.mark(second, 1)
+        self.mark(third, 3)
+        # Lowering the top score makes the maximum come from another attempt
+        self.mark(third, 0)
+        self.mark(first, 2)
+
+        incremental = self.stats()
+        exam_stats.rebuild_exam_stats(self.exam)
+        self.assertEqual(incremental, self.stats())
+
+        score, questions = incremental
+        self.assertEqual((score['attempt_count'], score['score_sum'], score['score_min'], score['score_max']), (3, 7.0, 1.0, 4.0))
+        self.assertEqual(questions[self.mcq.id][:2], (3, 2))
+        self.assertEqual(questions[self.essay.id][3], 3.0)
+
+
+class CollusionTests(TestCase):
+    """Blocked matrix scan checked against a plain pairwise comparison"""
+
+    def setUp(self):
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        self.exam = Exam.objects.create(title='Choices', created_by=admin)
+        self.options = []
+        for order in range(8):
+            question = Question.objects.create(exam=self.exam, question_text=f'Q{order}', question_type='MCQ', marks=1, order=order)
+            self.options.append([
+                Option.objects.create(question=question, option_text=str(idx), is_correct=idx == 0, order=idx)
+                for idx in range(4)
+            ])
+        rng = random.Random(35)
+        # Choice index per question, None when unanswered; 0 is correct
+        self.patterns = [[rng.choice([None, 0, 0, 1, 2, 3]) for _ in self.options] for _ in range(9)]
+        # Two copiers sharing one source's wrong answers
+        self.patterns[3] = [1, 2, 3, 1, 0, 2, None, 3]
+        self.patterns[7] = list(self.patterns[3])
+        self.patterns[8] = [1, 2, 3, 1, 0, 0, 0, 3]
+        self.attempts = []
+        for idx, pattern in enumerate(self.patterns):
+            attempt = completed_attempt(self.exam, f'student{idx}')
+            self.attempts.append(attempt)
+            Answer.objects.bulk_create([
+                Answer(attempt=attempt, question=options[0].question, selected_option=options[choice])
+                for options, choice in zip(self.options, pattern) if choice is not None
+            ])
+
+    def expected_pairs(self, min_shared_wrong):
+        pairs = []
+        for i in range(len(self.attempts)):
+            for j in range(i + 1, len(self.attempts)):
+                a, b = self.patterns[i], self.patterns[j]
+                answered = [(x, y) for x, y in zip(a, b) if x is not None and y is not None]
+                shared = sum(1 for x, y in answered if x == y and x != 0)
+                if shared < min_shared_wrong:
+                    continue
+                both_wrong = sum(1 for x, y in zip(a, b) if x not in (None, 0) and y not in (None, 0))
+                differences = sum(1 for x, y in answered if x != y)
+                index = shared / max(differences, 1)
+                if index >= collusion.MIN_SIMILARITY_INDEX:
+                    pairs.append({
+                        'attempt_a_id': self.attempts[i].id,
+                        'attempt_b_id': self.attempts[j].id,
+                        'shared_wrong': shared,
+                        'both_wrong': both_wrong,
+                        'differences': differences,
+                        'similarity_index': round(index, 4),
+                    })
+        return sorted(pairs, key=lambda pair: (-pair['similarity_index'], -pair['shared_wrong'], pair['differences']))
+
+    def test_blocked_scan_matches_pairwise_comparison(self):
+        expected = self.expected_pairs(2)
+        self.assertGreater(len(expected), 3)
+        with mock.patch.multiple(collusion, BLOCK_SIZE=2, PAIR_CHUNK_SIZE=3, FETCH_SIZE=5):
+            result = collusion.find_suspicious_pairs(self.exam, min_shared_wrong=2, limit=3)
+
+        self.assertEqual((result['candidates'], result['questions']), (9, 8))
+        self.assertEqual(result['flagged_count'], len(expected))
+        self.assertEqual(result['pairs'], expected[:3])
+        # Identical answer sheets rank first
+        self.assertEqual(
+            (result['pairs'][0]['attempt_a_id'], result['pairs'][0]['attempt_b_id']),
+            (self.attempts[3].id, self.attempts[7].id),
+        )
+
+    def test_incomplete_attempts_are_ignored(self):
+        ExamAttempt.objects.filter(pk=self.attempts[7].pk).update(status='IN_PROGRESS')
+        result = collusion.find_suspicious_pairs(self.exam, min_shared_wrong=2)
+        self.assertEqual(result['candidates'], 8)
+        self.assertNotIn(self.attempts[7].id, {pair['attempt_b_id'] for pair in result['pairs']})
+
+
+class MarkingQueueTests(TestCase):
+    TEXTS = ['Photosynthesis', ' photosynthesis ', 'PHOTOSYNTHESIS.', 'chlorophyll', 'Chlorophyll', 'sunlight']
+
+    def setUp(self):
+        self.admin, self.client = admin_client()
+        self.exam = Exam.objects.create(title='Biology', created_by=self.admin, total_marks=6, passing_marks=50)
+        self.mcq = Question.objects.create(exam=self.exam, question_text='Pick', question_type='MCQ', marks=2, order=0)
+        right = Option.objects.create(question=self.mcq, option_text='right', is_correct=True, order=0)
+        self.essay = Question.objects.create(exam=self.exam, question_text='Explain', question_type='SA', marks=4, order=1)
+        self.attempts = []
+        for idx, text in enumerate(self.TEXTS):
+            attempt = completed_attempt(self.exam, f'student{idx}')
+            Answer.objects.create(attempt=attempt, question=self.mcq, selected_option=right)
+            answer = Answer.objects.create(attempt=attempt, question=self.essay, answer_text=text)
+            Answer.objects.filter(pk=answer.pk).update(marks_awarded=None)
+            # Scored on submit, before any manual marking
+            scores = attempt.calculate_score()
+            ExamAttempt.objects.filter(pk=attempt.pk).update(
+                score=scores['score'], correct_answers=scores['correct_answers'], is_passed=scores['is_passed'],
+            )
+            self.attempts.append(attempt)
+
+    def queue(self, **params):
+        response = self.client.get(f'/api/exam/admin/questions/{self.essay.id}/marking-queue/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_cover_every_pending_answer_once_largest_group_first(self):
+        groups = []
+        params = {'limit': 1}
+        while True:
+            page = self.queue(**params)
+            groups.extend(page['groups'])
+            if not page['next_cursor']:
+                break
+            params = {'limit': 1, 'cursor': page['next_cursor']}
+
+        self.assertEqual([group['size'] for group in groups], [3, 2, 1])
+        self.assertEqual(groups[0]['answer_text'], 'Photosynthesis')
+        answer_ids = [answer_id for group in groups for answer_id in group['answer_ids']]
+        self.assertCountEqual(answer_ids, Answer.objects.filter(question=self.essay).values_list('id', flat=True))
+
+    def test_bad_cursor_is_a_400(self):
+        response = self.client.get(f'/api/exam/admin/questions/{self.essay.id}/marking-queue/', {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_marking_a_group_is_one_update_and_rescores_its_attempts(self):
+        key = self.queue()['groups'][0]['key']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f'/api/exam/admin/questions/{self.essay.id}/marking-queue/mark/',
+                {'key': key, 'marks_awarded': 3}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['marked'], 3)
+        answer_updates = [
+            query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "exam_app_answer"')
+        ]
+        self.assertEqual(len(answer_updates), 1)
+
+        # The set-based recompute agrees with scoring each attempt on its own
+        for attempt in ExamAttempt.objects.filter(pk__in=[attempt.pk for attempt in self.attempts]):
+            expected = attempt.calculate_score()
+            self.assertEqual(
+                (attempt.score, attempt.correct_answers, attempt.is_passed),
+                (expected['score'], expected['correct_answers'], expected['is_passed']),
+            )
+        self.assertEqual(
+            sorted(ExamAttempt.objects.filter(exam=self.exam).values_list('score', flat=True)),
+            [2.0, 2.0, 2.0, 5.0, 5.0, 5.0],
+        )
+        # Marked answers leave the queue
+        self.assertEqual([group['size'] for group in self.queue()['groups']], [2, 1])
+
+
+class ResultExportTests(TestCase):
+    def setUp(self):
+        self.admin, self.client = admin_client()
+        self.exam = Exam.objects.create(title='Final: part 1', created_by=self.admin, total_marks=6, passing_marks=50)
+        self.questions = [
+            Question.objects.create(exam=self.exam, question_text=f'Question {order}', question_type='SA', marks=2, order=order)
+            for order in range(3)
+        ]
+        for idx in range(5):
+            attempt = completed_attempt(self.exam, f'student{idx}', score=idx, percentage_score=idx * 100 / 6, is_passed=idx >= 3)
+            for question in self.questions[:idx % 3 + 1]:
+                Answer.objects.create(attempt=attempt, question=question, answer_text='text', marks_awarded=1)
+        # Waiting for a marker: exported as an empty cell
+        Answer.objects.filter(attempt__user__username='student4', question=self.questions[1]).update(marks_awarded=None)
+        running = completed_attempt(self.exam, 'running', status='IN_PROGRESS')
+        User.objects.filter(pk=running.user_id).update(first_name='=HYPERLINK("x")')
+
+    def expected_rows(self, statuses):
+        rows = []
+        for attempt in ExamAttempt.objects.filter(exam=self.exam, status__in=statuses).select_related('user').order_by('id'):
+            marks = {answer.question_id: answer.marks_awarded for answer in attempt.answers.all()}
+            rows.append([
+                str(attempt.id), attempt.user.username, attempt.status,
+                '' if attempt.score is None else str(attempt.score),
+                *['' if marks.get(question.id) is None else str(marks[question.id]) for question in self.questions],
+            ])
+        return rows
+
+    def download(self, file_format, **params):
+        with mock.patch.multiple(exports, CHUNK_SIZE=2, STREAM_BUFFER_SIZE=64):
+            response = self.client.get(f'/api/exam/admin/exams/{self.exam.id}/export/{file_format}/', params)
+            self.assertEqual(response.status_code, 200)
+            return b''.join(response.streaming_content)
+
+    def test_csv_rows_match_the_database(self):
+        rows = list(csv.reader(io.StringIO(self.download('csv').decode('utf-8'))))
+        header, rows = rows[0], rows[1:]
+        self.assertEqual(header[11:], ['Q0 (2) Question 0', 'Q1 (2) Question 1', 'Q2 (2) Question 2'])
+        self.assertEqual(
+            [[row[0], row[1], row[4], row[7], *row[11:]] for row in rows],
+            self.expected_rows(['COMPLETED', 'IN_PROGRESS']),
+        )
+        # Names are defused so spreadsheets don't evaluate them
+        self.assertEqual(rows[-1][3], '\'=HYPERLINK("x")')
+
+    def test_status_filter(self):
+        rows = list(csv.reader(io.StringIO(self.download('csv', status='COMPLETED').decode('utf-8'))))[1:]
+        self.assertEqual([row[0] for row in rows], [expected[0] for expected in self.expected_rows(['COMPLETED'])])
+
+    @skipUnless(exports.OPENPYXL_AVAILABLE, 'openpyxl is not installed')
+    def test_xlsx_rows_match_the_database(self):
+        from openpyxl import load_workbook
+        sheet = load_workbook(io.BytesIO(self.download('xlsx'))).active
+        self.assertEqual(sheet.title, 'Final  part 1')
+        # Numbers come back as int or float depending on their value
+        rows = [
+            [float(value) if isinstance(value, (int, float)) else (value or '') for value in row]
+            for row in sheet.iter_rows(min_row=2, values_only=True)
+        ]
+        expected = [
+            [int(row[0]), *row[1:3], *[float(value) if value else '' for value in row[3:]]]
+            for row in self.expected_rows(['COMPLETED', 'IN_PROGRESS'])
+        ]
+        self.assertEqual([[row[0], row[1], row[4], row[7], *row[11:]] for row in rows], expected)
+
+    def test_unknown_format_is_a_400(self):
+        response = self.client.get(f'/api/exam/admin/exams/{self.exam.id}/export/pdf/')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PDF_RENDER_WORKERS=0, BACKGROUND_JOB_WORKERS=0)
+class ResultPdfTests(TestCase):
+    def setUp(self):
+        self.storage = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=f'{self.storage}/media', PDF_CACHE_DIR=f'{self.storage}/pdf_cache'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        use_temporary_storage(self, f'{self.storage}/pdf_cache', ResultPdfBundle, 'file')
+
+        self.admin, self.admin_api = admin_client()
+        self.exam = Exam.objects.create(title='Physics', created_by=self.admin, total_marks=4, passing_marks=50)
+        self.question = Question.objects.create(exam=self.exam, question_text='Define work', question_type='SA', marks=4, order=0)
+        self.attempts = []
+        for idx in range(3):
+            attempt = completed_attempt(self.exam, f'student{idx}', score=idx, results_ready=idx > 0)
+            Answer.objects.create(attempt=attempt, question=self.question, answer_text='force times distance', marks_awarded=idx)
+            self.attempts.append(attempt)
+
+    def student_api(self, attempt):
+        client = APIClient()
+        client.force_authenticate(attempt.user)
+        return client
+
+    def cached_sheets(self):
+        return sorted(
+            name for name in os.listdir(f'{self.storage}/pdf_cache/sheets/{self.exam.id}') if name.endswith('.pdf')
+        )
+
+    def test_students_get_their_own_sheet_once_released(self):
+        held, released = self.attempts[0], self.attempts[1]
+        self.assertEqual(self.student_api(held).get(f'/api/exam/attempts/{held.id}/export-pdf/').status_code, 403)
+        self.assertEqual(self.student_api(held).get(f'/api/exam/attempts/{released.id}/export-pdf/').status_code, 403)
+
+        response = self.student_api(released).get(f'/api/exam/attempts/{released.id}/export-pdf/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF-'))
+        self.assertTrue(response.content.rstrip().endswith(b'%%EOF'))
+
+    def test_sheets_are_cached_until_their_contents_change(self):
+        attempt = self.attempts[1]
+        with mock.patch.object(result_pdfs, 'render_result_sheet', wraps=result_pdfs.render_result_sheet) as render:
+            first = result_pdfs.result_sheet_pdf(attempt)
+            self.assertEqual(result_pdfs.result_sheet_pdf(attempt), first)
+            self.assertEqual(render.call_count, 1)
+            old_files = self.cached_sheets()
+
+            # A re-mark is a new version: rendered again, old file removed
+            Answer.objects.filter(attempt=attempt).update(marks_awarded=3)
+            ExamAttempt.objects.filter(pk=attempt.pk).update(score=3)
+            attempt.refresh_from_db()
+            self.assertNotEqual(result_pdfs.result_sheet_pdf(attempt), first)
+            self.assertEqual(render.call_count, 2)
+        self.assertEqual(len(self.cached_sheets()), 1)
+        self.assertNotEqual(self.cached_sheets(), old_files)
+
+    def test_bundle_zips_released_sheets(self):
+        with mock.patch.object(result_pdfs, 'BUNDLE_BATCH_SIZE', 1), self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_api.post(f'/api/exam/admin/exams/{self.exam.id}/result-pdfs/')
+        self.assertEqual(response.status_code, 202)
+
+        detail = self.admin_api.get(f'/api/exam/admin/result-pdfs/{response.data["id"]}/').data
+        self.assertEqual((detail['status'], detail['total'], detail['processed']), ('COMPLETED', 2, 2))
+        download = self.admin_api.get(detail['download_url'])
+        self.assertEqual(download.status_code, 200)
+        content = b''.join(download.streaming_content) if download.streaming else download.content
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                sorted(f'{attempt.user.username}_{attempt.id}.pdf' for attempt in self.attempts[1:]),
+            )
+            sheet = archive.read(archive.namelist()[0])
+        self.assertTrue(sheet.startswith(b'%PDF-'))
+
+
+    def test_pool_renders_the_same_bytes_as_inline(self):
+        sheets = result_pdfs.result_sheets_data(self.exam, self.attempts)
+        inline = result_pdfs.render_sheets(sheets)
+        self.addCleanup(result_pdfs._reset_pool)
+        with self.settings(PDF_RENDER_WORKERS=1):
+            self.assertEqual(result_pdfs.render_sheets(sheets), inline)
+
+
+@override_settings(
+    BACKGROUND_JOB_WORKERS=0, PASSWORD_HASH_WORKERS=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class BulkStudentImportTests(TestCase):
+    def setUp(self):
+        self.admin, self.client = admin_client()
+        self.storage = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage, ignore_errors=True)
+        use_temporary_storage(self, self.storage, StudentImportJob, 'file', 'results_file')
+        User.objects.create_user('taken', 'taken@example.com', 'x')
+
+    def import_json(self, students):
+        with mock.patch.object(student_import, 'IMPORT_BATCH_SIZE', 2), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/exam/admin/bulk-import-students/', {'students': students}, format='json')
+        self.assertEqual(response.status_code, 202)
+        return StudentImportJob.objects.get(pk=response.data['job']['id'])
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        job = self.import_json([
+            {'username': 'ann', 'email': 'ann@example.com', 'password': 'ann-secret', 'student_id': 'S1', 'year_of_study': '2'},
+            {'username': 'bob', 'email': 'bob@example.com', 'first_name': 'Bob'},
+            {'username': 'ann', 'email': 'ann2@example.com'},
+            {'username': 'taken', 'email': 'new@example.com'},
+            {'username': 'cleo', 'email': 'taken@example.com'},
+            {'username': 'dan', 'email': 'dan@example.com', 'year_of_study': 'second'},
+            {'email': 'nobody@example.com'},
+        ])
+
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual((job.total, job.processed, job.imported, job.error_count), (7, 7, 2, 5))
+        self.assertEqual(
+            [(error['row'], error['error']) for error in job.errors],
+            [
+                # A repeat in a later batch counts as existing
+                (3, 'Username already exists'),
+                (4, 'Username already exists'),
+                (5, 'Email already exists'),
+                (6, 'year_of_study must be a number'),
+                (7, 'Missing username or email'),
+            ],
+        )
+        ann = User.objects.get(username='ann')
+        self.assertTrue(ann.check_password('ann-secret'))
+        self.assertTrue(User.objects.get(username='bob').check_password(student_import.DEFAULT_PASSWORD))
+        self.assertEqual((ann.profile.student_id, ann.profile.year_of_study), ('S1', 2))
+        self.assertTrue(ann.is_student)
+
+    def test_duplicate_inside_a_batch_is_reported(self):
+        job = self.import_json([
+            {'username': 'ann', 'email': 'ann@example.com'},
+            {'username': 'ann', 'email': 'other@example.com'},
+        ])
+        self.assertEqual((job.imported, job.error_count), (1, 1))
+        self.assertEqual(job.errors[0]['error'], 'Duplicate username in import')
+
+    def test_lookups_are_per_batch_not_per_row(self):
+        students = [{'username': f'student{idx}', 'email': f'student{idx}@example.com'} for idx in range(6)]
+        with CaptureQueriesContext(connection) as queries:
+            self.import_json(students)
+        user_queries = [query['sql'] for query in queries.captured_queries if 'FROM "authentication_customuser"' in query['sql']]
+        self.assertFalse([sql for sql in user_queries if '"username" =' in sql])
+        # Three batches: one username and one email IN query each
+        self.assertEqual(len([sql for sql in user_queries if '"username" IN' in sql]), 3)
+        self.assertEqual(len([sql for sql in user_queries if '"email" IN' in sql]), 3)
+        self.assertEqual(User.objects.filter(username__startswith='student', profile__isnull=False).count(), 6)
+
+    def test_passwords_are_not_stored_on_the_job(self):
+        job = self.import_json([{'username': 'ann', 'email': 'ann@example.com', 'password': 'ann-secret'}])
+        self.assertNotIn('ann-secret', str(StudentImportJob.objects.filter(pk=job.pk).values().get()))
+
+    def test_hashing_pool_matches_in_process_hashing(self):
+        passwords = [f'password-{idx}' for idx in range(5)]
+        self.addCleanup(password_hashing._reset_pool)
+        with self.settings(PASSWORD_HASH_WORKERS=2), mock.patch.object(password_hashing, 'HASH_CHUNK_SIZE', 2):
+            encoded = password_hashing.hash_passwords(passwords)
+        self.assertEqual(len(encoded), 5)
+        for password, value in zip(passwords, encoded):
+            self.assertTrue(check_password(password, value))
+
+
+@override_settings(
+    BACKGROUND_JOB_WORKERS=0, PASSWORD_HASH_WORKERS=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class RosterImportTests(TestCase):
+    ROSTER = [
+        ['Username', 'Email', 'First Name', 'Password', 'Student ID'],
+        ['ann', 'ann@example.com', 'Ann', 'ann-secret', 'S1'],
+        ['bob', 'bob@example.com', 'Bob', '', 'S2'],
+        ['', '', '', '', ''],
+        ['carl', 'carl@example.com', 'Carl', 'new-secret', 'S3'],
+        ['admin', 'admin@example.com', 'Mallory', 'owned', ''],
+        ['dora', 'dora@example.com', 'Dora', '', ''],
+    ]
+
+    def setUp(self):
+        self.admin, self.client = admin_client()
+        self.storage = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage, ignore_errors=True)
+        use_temporary_storage(self, self.storage, StudentImportJob, 'file', 'results_file')
+        self.exam = Exam.objects.create(title='Enrolled', created_by=self.admin, enrollment_required=True)
+        self.carl = User.objects.create_user('carl', 'carl@example.com', 'old-secret', first_name='C')
+        issue_token(self.carl, device_name='laptop')
+
+    def roster_csv(self, rows):
+        content = io.StringIO()
+        csv.writer(content).writerows(rows)
+        return SimpleUploadedFile('roster.csv', content.getvalue().encode('utf-8'), content_type='text/csv')
+
+    def upload(self, roster, **fields):
+        with mock.patch.object(student_import, 'IMPORT_BATCH_SIZE', 2), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/exam/admin/student-import-jobs/', {'file': roster, **fields}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 202)
+        return StudentImportJob.objects.get(pk=response.data['id'])
+
+    def report(self, job):
+        response = self.client.get(f'/api/exam/admin/student-import-jobs/{job.id}/results/')
+        self.assertEqual(response.status_code, 200)
+        return [row for row in csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8')))][1:]
+
+    def test_csv_roster_creates_updates_and_enrols(self):
+        job = self.upload(self.roster_csv(self.ROSTER), update_existing='true', exam_ids=str(self.exam.id))
+
+        self.assertEqual(job.status, 'COMPLETED', job.message)
+        self.assertEqual(
+            self.report(job),
+            [
+                ['2', 'ann', 'created', ''],
+                ['3', 'bob', 'created', ''],
+                ['5', 'carl', 'updated', ''],
+                ['6', 'admin', 'skipped', 'Existing account is not a student account, not updated'],
+                ['7', 'dora', 'created', ''],
+            ],
+        )
+        self.assertTrue(User.objects.get(username='ann').check_password('ann-secret'))
+        self.carl.refresh_from_db()
+        self.assertEqual(self.carl.first_name, 'Carl')
+        self.assertTrue(self.carl.check_password('new-secret'))
+        # A new password signs the student out
+        self.assertFalse(self.carl.auth_tokens.exists())
+        # Staff accounts are never touched by a roster
+        self.admin.refresh_from_db()
+        self.assertTrue(self.admin.check_password('x'))
+        self.assertEqual(
+            set(self.exam.enrollments.values_list('user__username', flat=True)), {'ann', 'bob', 'carl', 'dora'}
+        )
+        # The roster held passwords: it is gone once imported
+        job.refresh_from_db()
+        self.assertFalse(job.file)
+
+    def test_existing_usernames_are_errors_without_update_existing(self):
+        job = self.upload(self.roster_csv(self.ROSTER[:2] + [self.ROSTER[4]]))
+        self.assertEqual([row[2:] for row in self.report(job)], [['created', ''], ['error', 'Username already exists']])
+        self.carl.refresh_from_db()
+        self.assertTrue(self.carl.check_password('old-secret'))
+
+    def test_missing_column_fails_the_job(self):
+        job = self.upload(self.roster_csv([['username', 'name'], ['ann', 'Ann']]))
+        self.assertEqual(job.status, 'FAILED')
+        self.assertIn('email', job.message)
+
+    @skipUnless(student_import.OPENPYXL_AVAILABLE, 'openpyxl is not installed')
+    def test_xlsx_roster(self):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        for row in self.ROSTER[:3]:
+            workbook.active.append(row)
+        content = io.BytesIO()
+        workbook.save(content)
+        job = self.upload(SimpleUploadedFile('roster.xlsx', content.getvalue()))
+        self.assertEqual(job.status, 'COMPLETED', job.message)
+        self.assertEqual([row[1:3] for row in self.report(job)], [['ann', 'created'], ['bob', 'created']])
+
+    def test_rows_are_read_one_batch_at_a_time(self):
+        read = []
+
+        def rows():
+            for number in range(6):
+                read.append(number)
+                yield number + 2, {'username': f'student{number}', 'email': f'student{number}@example.com'}
+
+        progress = []
+        with mock.patch.object(student_import, 'IMPORT_BATCH_SIZE', 2):
+            student_import.import_students(rows(), progress_callback=lambda result: progress.append(len(read)))
+        self.assertEqual(progress, [2, 4, 6])
+
+
+class EnrollmentTests(TestCase):
+    def setUp(self):
+        self.admin, self.admin_client = admin_client()
+        window = {'start_time': timezone.now() - timedelta(hours=1), 'end_time': timezone.now() + timedelta(hours=1)}
+        self.open_exam = Exam.objects.create(title='Open', created_by=self.admin, **window)
+        self.closed_exam = Exam.objects.create(title='Closed', created_by=self.admin, enrollment_required=True, **window)
+        Question.objects.create(exam=self.closed_exam, question_text='Why?', question_type='TEXT', marks=1)
+        self.enrolled = User.objects.create_user('enrolled', 'enrolled@example.com', 'pw')
+        self.outsider = User.objects.create_user('outsider', 'outsider@example.com', 'pw')
+        response = self.admin_client.post(
+            f'/api/exam/admin/exams/{self.closed_exam.id}/enrollments/',
+            {'usernames': ['enrolled', 'enrolled', 'nobody']}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['enrolled'], response.data['unknown']), (1, ['nobody']))
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def exam_titles(self, user):
+        response = self.client_for(user).get('/api/exam/exams/')
+        self.assertEqual(response.status_code, 200)
+        return sorted(exam['title'] for exam in response.data)
+
+    def test_only_enrolled_students_see_and_start_restricted_exams(self):
+        self.assertEqual(self.exam_titles(self.enrolled), ['Closed', 'Open'])
+        self.assertEqual(self.exam_titles(self.outsider), ['Open'])
+        self.assertEqual(self.client_for(self.outsider).get(f'/api/exam/exams/{self.closed_exam.id}/').status_code, 404)
+
+        response = self.client_for(self.outsider).post(f'/api/exam/exams/{self.closed_exam.id}/start/')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ExamAttempt.objects.filter(user=self.outsider).exists())
+
+        response = self.client_for(self.enrolled).post(f'/api/exam/exams/{self.closed_exam.id}/start/')
+        self.assertIn(response.status_code, (200, 201), response.data)
+        self.assertTrue(ExamAttempt.objects.filter(user=self.enrolled, exam=self.closed_exam).exists())
+
+    def test_exam_list_is_one_query_however_many_enrolments(self):
+        for index in range(5):
+            exam = Exam.objects.create(
+                title=f'Other {index}', created_by=self.admin, enrollment_required=True, end_time=self.open_exam.end_time
+            )
+            self.admin_client.post(
+                f'/api/exam/admin/exams/{exam.id}/enrollments/', {'user_ids': [self.outsider.id]}, format='json'
+            )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.exam_titles(self.enrolled)), 2)
+        exam_queries = [query for query in queries.captured_queries if 'FROM "exam_app_exam"' in query['sql']]
+        self.assertEqual(len(exam_queries), 1)
+
+    def test_bulk_enrol_is_idempotent_and_reversible(self):
+        url = f'/api/exam/admin/exams/{self.closed_exam.id}/enrollments/'
+        response = self.admin_client.post(url, {'user_ids': [self.enrolled.id, self.outsider.id]}, format='json')
+        self.assertEqual((response.data['enrolled'], response.data['already_enrolled']), (1, 1))
+        self.assertEqual(response.data['total_enrolled'], 2)
+
+        response = self.admin_client.delete(url, {'usernames': ['enrolled']}, format='json')
+        self.assertEqual(response.data['removed'], 1)
+        self.assertEqual(self.exam_titles(self.enrolled), ['Open'])
+
+        response = self.admin_client.patch(url, {'enrollment_required': False}, format='json')
+        self.assertFalse(response.data['enrollment_required'])
+        self.assertEqual(self.exam_titles(self.enrolled), ['Closed', 'Open'])
@@ -0,0 +1,287 @@
+# backend/exam_app/text_similarity.py
+"""
+Near-duplicate detection for short and long text answers
+Every SA/TEXT answer gets a MinHash signature over character 5-gram
+shingles of its normalized text, computed when the answer is saved (see
+Answer.save) and stored on the answer itself, so finding clusters only
+reads. Locality-sensitive hashing buckets the signatures by band, so only
+answers that share a band are ever compared and finding clusters stays
+close to linear in the number of answers.
+"""
+import hashlib
+import random
+import re
+import struct
+import zlib
+from .models import Answer
+
+# Optional imports for faster signatures
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+TEXT_TYPES = ('SA', 'TEXT')
+
+SHINGLE_SIZE = 5
+
+# 16 bands of 4 rows: pairs around 0.5 Jaccard similarity start to collide,
+# so the verification step below decides what counts as a near-duplicate
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+# Estimated Jaccard similarity needed to join a cluster
+SIMILARITY_THRESHOLD = 0.8
+
+# Clusters of answers at least this long (normalized characters) are
+# flagged as possible copy-paste; short answers legitimately coincide
+COPY_MIN_LENGTH = 40
+
+# Universal hash family h(x) = (a * x + b) mod p over 32-bit shingle hashes
+_PRIME = 4294967311
+_rng = random.Random(20240601)
+_HASH_A = [_rng.randrange(1, 1 << 31) for _ in range(NUM_PERMUTATIONS)]
+_HASH_B = [_rng.randrange(0, _PRIME) for _ in range(NUM_PERMUTATIONS)]
+if NUMPY_AVAILABLE:
+    _HASH_A_ARRAY = np.array(_HASH_A, dtype=np.int64)
+    _HASH_B_ARRAY = np.array(_HASH_B, dtype=np.int64)
+
+# Stored signature: 8-byte digest of the normalized text + uint32 minima
+_DIGEST_SIZE = 8
+_SIGNATURE_FORMAT = f'<{NUM_PERMUTATIONS}I'
+
+SIGNATURE_BATCH_SIZE = 500
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_answer_text(text):
+    """Casefold and collapse punctuation and whitespace to single spaces"""
+    return _NON_WORD.sub(' ', (text or '').casefold()).strip()
+
+
+def _digest(normalized):
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=_DIGEST_SIZE).digest()
+
+
+def answer_text_key(text):
+    """Hex digest of the normalized text; '' for blank answers"""
+    normalized = normalize_answer_text(text)
+    return _digest(normalized).hex() if normalized else ''
+
+
+def _shingle_hashes(normalized):
+    if len(normalized) <= SHINGLE_SIZE:
+        return {zlib.crc32(normalized.encode('utf-8'))}
+    return {
+        zlib.crc32(normalized[i:i + SHINGLE_SIZE].encode('utf-8'))
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(normalized):
+    """MinHash signature (tuple of NUM_PERMUTATIONS ints) of normalized text"""
+    shingles = _shingle_hashes(normalized)
+    if NUMPY_AVAILABLE:
+        x = np.fromiter(shingles, dtype=np.int64, count=len(shingles))
+        # a < 2**31 and x < 2**32, so a * x + b stays inside int64
+        hashed = (_HASH_A_ARRAY[:, None] * x[None, :] + _HASH_B_ARRAY[:, None]) % _PRIME
+        return tuple(int(value) & 0xFFFFFFFF for value in hashed.min(axis=1))
+    return tuple(
+        min((a * x + b) % _PRIME for x in shingles) & 0xFFFFFFFF
+        for a, b in zip(_HASH_A, _HASH_B)
+    )
+
+
+def pack_signature(normalized):
+    """Signature bytes as stored in Answer.text_signature"""
+    return _digest(normalized) + struct.pack(_SIGNATURE_FORMAT, *minhash_signature(normalized))
+
+
+def answer_text_signature(text, question_type):
+    """Value of Answer.text_signature for an answer; None unless SA/TEXT with text"""
+    if question_type not in TEXT_TYPES:
+        return None
+    normalized = normalize_answer_text(text)
+    return pack_signature(normalized) if normalized else None
+
+
+def _unpack_signature(stored, normalized):
+    """Return the stored signature, or None if it is missing or stale"""
+    if not stored:
+        return None
+    stored = bytes(stored)
+    if len(stored) != _DIGEST_SIZE + NUM_PERMUTATIONS * 4 or stored[:_DIGEST_SIZE] != _digest(normalized):
+        return None
+    return struct.unpack(_SIGNATURE_FORMAT, stored[_DIGEST_SIZE:])
+
+
+def estimated_similarity(signature_a, signature_b):
+    """Share of matching MinHash values, an estimate of Jaccard similarity"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERMUTATIONS
+
+
+def load_signatures(answers):
+    """
+    Map answer id -> (normalized text, signature) for answers with text
+
+    `answers` yields (answer_id, answer_text, text_signature). Missing or
+    stale signatures (rows written around Answer.save, or saved before
+    signatures existed; `manage.py fill_text_signatures` stores them) are
+    computed in memory only: reading clusters never writes.
+    """
+    signatures = {}
+    for answer_id, answer_text, stored in answers:
+        normalized = normalize_answer_text(answer_text)
+        if not normalized:
+            continue
+        signature = _unpack_signature(stored, normalized)
+        if signature is None:
+            signature = minhash_signature(normalized)
+        signatures[answer_id] = (normalized, signature)
+    return signatures
+
+
+def fill_text_signatures(answers, batch_size=SIGNATURE_BATCH_SIZE):
+    """
+    Store missing or stale signatures of an Answer queryset in batches;
+    returns the number of answers updated
+    """
+    updated = 0
+    pending = []
+    rows = answers.filter(question__question_type__in=TEXT_TYPES).exclude(answer_text='').values_list(
+        'id', 'answer_text', 'text_signature'
+    )
+    for answer_id, answer_text, stored in rows.iterator(chunk_size=2000):
+        normalized = normalize_answer_text(answer_text)
+        if not normalized or _unpack_signature(stored, normalized) is not None:
+            continue
+        pending.append(Answer(id=answer_id, text_signature=pack_signature(normalized)))
+        if len(pending) >= batch_size:
+            Answer.objects.bulk_update(pending, ['text_signature'])
+            updated += len(pending)
+            pending = []
+    if pending:
+        Answer.objects.bulk_update(pending, ['text_signature'])
+        updated += len(pending)
+    return updated
+
+
+def _find(parent, item):
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+def cluster_signatures(signatures, threshold=SIMILARITY_THRESHOLD):
+    """
+    Group answer ids into near-duplicate clusters
+
+    Identical texts are merged up front. The remaining texts are bucketed
+    per LSH band and each bucket member is verified against the bucket's
+    first member, so a large bucket costs linear rather than quadratic work.
+    Returns a list of (answer ids, minimum estimated similarity) for every
+    cluster with more than one answer.
+    """
+    by_text = {}
+    for answer_id, (normalized, signature) in signatures.items():
+        by_text.setdefault(normalized, []).append(answer_id)
+
+    representatives = {ids[0]: signatures[ids[0]][1] for ids in by_text.values()}
+    parent = {answer_id: answer_id for answer_id in representatives}
+    similarity = {}
+
+    for band in range(BANDS):
+        start = band * ROWS_PER_BAND
+        buckets = {}
+        for answer_id, signature in representatives.items():
+            buckets.setdefault(signature[start:start + ROWS_PER_BAND], []).append(answer_id)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            head = members[0]
+            for answer_id in members[1:]:
+                root_a, root_b = _find(parent, head), _find(parent, answer_id)
+                if root_a == root_b:
+                    continue
+                score = estimated_similarity(representatives[head], representatives[answer_id])
+                if score >= threshold:
+                    parent[root_b] = root_a
+                    similarity[root_a] = min(similarity.get(root_a, 1.0), similarity.get(root_b, 1.0), score)
+
+    clusters = {}
+    for ids in by_text.values():
+        clusters.setdefault(_find(parent, ids[0]), []).extend(ids)
+    return [
+        (sorted(ids), similarity.get(root, 1.0))
+        for root, ids in clusters.items() if len(ids) > 1
+    ]
+
+
+def answer_clusters(exam, question_id=None, min_size=2):
+    """
+    Near-duplicate clusters of SA/TEXT answers in an exam's completed attempts
+
+    Clusters are grouped per question and sorted largest first; each one
+    lists its answer ids so markers can pass them to bulk marking.
+    """
+    questions = exam.questions.filter(question_type__in=TEXT_TYPES)
+    if question_id is not None:
+        questions = questions.filter(id=question_id)
+    questions = list(questions.order_by('order', 'id').values_list('id', 'question_text', 'question_type', 'marks'))
+
+    answers = Answer.objects.filter(
+        attempt__exam=exam,
+        attempt__status='COMPLETED',
+        question_id__in=[question[0] for question in questions],
+    ).exclude(answer_text='').values_list(
+        'id', 'question_id', 'attempt_id', 'attempt__user__username',
+        'answer_text', 'marks_awarded', 'is_manually_marked', 'text_signature'
+    )
+
+    rows_by_question = {}
+    details = {}
+    for answer_id, answer_question_id, attempt_id, username, answer_text, marks_awarded, is_marked, stored in answers:
+        rows_by_question.setdefault(answer_question_id, []).append((answer_id, answer_text, stored))
+        details[answer_id] = {
+            'answer_id': answer_id,
+            'attempt_id': attempt_id,
+            'student_name': username,
+            'answer_text': answer_text[:200],
+            'marks_awarded': marks_awarded,
+            'is_manually_marked': is_marked,
+        }
+
+    result = []
+    for question_id, question_text, question_type, marks in questions:
+        signatures = load_signatures(rows_by_question.get(question_id, ()))
+        clusters = []
+        for answer_ids, score in cluster_signatures(signatures):
+            if len(answer_ids) < min_size:
+                continue
+            normalized = {signatures[answer_id][0] for answer_id in answer_ids}
+            marks_given = {details[answer_id]['marks_awarded'] for answer_id in answer_ids}
+            average_length = sum(len(signatures[answer_id][0]) for answer_id in answer_ids) / len(answer_ids)
+            clusters.append({
+                'size': len(answer_ids),
+                'identical': len(normalized) == 1,
+                'min_similarity': round(score, 4),
+                'suspected_copy': average_length >= COPY_MIN_LENGTH,
+                'inconsistent_marks': len(marks_given - {None}) > 1,
+                'answer_ids': answer_ids,
+                'answers': [details[answer_id] for answer_id in answer_ids],
+            })
+        clusters.sort(key=lambda cluster: (-cluster['size'], cluster['answer_ids'][0]))
+        result.append({
+            'question_id': question_id,
+            'question_text': question_text[:50],
+            'question_type': question_type,
+            'max_marks': float(marks),
+            'answer_count': len(signatures),
+            'clusters': clusters,
+        })
+    return result
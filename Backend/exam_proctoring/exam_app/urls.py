@@ -30,9 +30,14 @@ urlpatterns = [
     # Add these missing URLs
     path('admin/attempts/<int:attempt_id>/', admin_views.attempt_details, name='admin-attempt-details'),
     path('admin/attempts/<int:attempt_id>/release-results/', admin_views.release_results, name='admin-release-results'),
+    path('admin/exams/<int:exam_id>/release-results/', admin_views.release_exam_results, name='admin-release-exam-results'),
+    path('admin/exams/<int:exam_id>/unrelease-results/', admin_views.unrelease_exam_results, name='admin-unrelease-exam-results'),
+    path('admin/exams/<int:exam_id>/enrollments/', admin_views.exam_enrollments, name='admin-exam-enrollments'),
     path('admin/exams/<int:exam_id>/live-attempts/', admin_views.live_attempts, name='admin-live-attempts'),
     path('admin/exams/<int:exam_id>/all-attempts/', admin_views.exam_all_attempts, name='admin-exam-all-attempts'),
     path('admin/exams/<int:exam_id>/import-questions/', admin_views.import_questions, name='admin-import-questions'),
+    path('admin/exams/<int:exam_id>/import-jobs/', admin_views.question_import_jobs, name='admin-question-import-jobs'),
+    path('admin/import-jobs/<int:job_id>/', admin_views.question_import_job_status, name='admin-question-import-job-status'),
     path('admin/attempts/<int:attempt_id>/activities/', admin_views.attempt_activities, name='admin-attempt-activities'),
     path('admin/attempts/<int:attempt_id>/restart/', admin_views.restart_exam_attempt, name='admin-restart-attempt'),
     path('admin/delete-all-data/', admin_views.delete_all_data, name='admin-delete-all-data'),
@@ -40,6 +45,9 @@ urlpatterns = [
     path('admin/attempts/<int:attempt_id>/delete-solutions/', admin_views.delete_attempt_solutions, name='admin-delete-attempt-solutions'),
     path('admin/answers/<int:answer_id>/mark/', admin_views.mark_answer, name='admin-mark-answer'),
     path('admin/answers/bulk-mark/', admin_views.bulk_mark_answers, name='admin-bulk-mark-answers'),
+    path('admin/exams/<int:exam_id>/answer-clusters/', admin_views.exam_answer_clusters, name='admin-exam-answer-clusters'),
+    path('admin/questions/<int:question_id>/marking-queue/', admin_views.question_marking_queue, name='admin-question-marking-queue'),
+    path('admin/questions/<int:question_id>/marking-queue/mark/', admin_views.mark_answer_cluster, name='admin-mark-answer-cluster'),
     path('admin/answers/<int:answer_id>/solution/', admin_views.edit_solution_text, name='admin-edit-solution-text'),
     path('admin/answers/<int:answer_id>/solutions/', admin_views.add_solution_attachments, name='admin-add-solution-attachments'),
     path('admin/answers/solutions/<int:attachment_id>/', admin_views.delete_solution_attachment, name='admin-delete-solution-attachment'),
@@ -48,17 +56,28 @@ urlpatterns = [
     
     # New Features (15 features)
     path('attempts/<int:attempt_id>/export-pdf/', feature_views.export_results_pdf, name='export-results-pdf'),
+    path('admin/exams/<int:exam_id>/result-pdfs/', feature_views.exam_result_pdfs, name='exam-result-pdfs'),
+    path('admin/result-pdfs/<int:bundle_id>/', feature_views.result_pdf_bundle_detail, name='result-pdf-bundle-detail'),
+    path('admin/result-pdfs/<int:bundle_id>/download/', feature_views.download_result_pdf_bundle, name='download-result-pdf-bundle'),
     path('attempts/<int:attempt_id>/send-email/', feature_views.send_results_email, name='send-results-email'),
+    path('admin/exams/<int:exam_id>/result-emails/', feature_views.exam_result_emails, name='exam-result-emails'),
     path('calendar/', feature_views.exam_calendar, name='exam-calendar'),
     path('question-bank/', feature_views.question_bank, name='question-bank'),
     path('admin/exams/<int:exam_id>/clone/', feature_views.clone_exam, name='clone-exam'),
     path('analytics/student/', feature_views.student_performance_analytics, name='student-performance-analytics'),
     path('analytics/student/<int:user_id>/', feature_views.student_performance_analytics, name='student-performance-analytics-user'),
     path('admin/exams/<int:exam_id>/difficulty-analysis/', feature_views.question_difficulty_analysis, name='question-difficulty-analysis'),
+    path('admin/exams/<int:exam_id>/item-analysis/', feature_views.exam_item_analysis, name='exam-item-analysis'),
+    path('admin/exams/<int:exam_id>/collusion-scans/', feature_views.exam_collusion_scans, name='exam-collusion-scans'),
+    path('admin/collusion-scans/<int:scan_id>/', feature_views.collusion_scan_detail, name='collusion-scan-detail'),
     path('attempts/<int:attempt_id>/time-analysis/', feature_views.question_time_analysis, name='question-time-analysis'),
     path('attempts/<int:attempt_id>/review/', feature_views.exam_review_mode, name='exam-review-mode'),
     path('admin/bulk-import-students/', feature_views.bulk_import_students, name='bulk-import-students'),
+    path('admin/student-import-jobs/', feature_views.student_import_jobs, name='student-import-jobs'),
+    path('admin/student-import-jobs/<int:job_id>/', feature_views.student_import_job_status, name='student-import-job-status'),
+    path('admin/student-import-jobs/<int:job_id>/results/', feature_views.download_student_import_results, name='student-import-results'),
     path('admin/exams/<int:exam_id>/report/', feature_views.generate_exam_report, name='generate-exam-report'),
+    path('admin/exams/<int:exam_id>/export/<str:file_format>/', feature_views.export_exam_results_file, name='export-exam-results'),
     path('admin/questions/<int:question_id>/tags/', feature_views.manage_question_tags, name='manage-question-tags'),
     path('admin/questions/tags/', feature_views.manage_question_tags, name='get-all-tags'),
     path('admin/exams/<int:exam_id>/preview/', feature_views.preview_exam, name='preview-exam'),
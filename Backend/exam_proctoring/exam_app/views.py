@@ -8,6 +8,8 @@ from django.utils import timezone
 from django.db import transaction
 from .models import Exam, ExamAttempt, Question, Option, Answer, AnswerImage, ExamActivityLog
 from .admin_views import is_admin_user
+from .enrollment import can_take_exam, exams_for_student
+from .exam_stats import refresh_attempt_stats
 from .serializers import (
     ExamSerializer, ShuffledExamSerializer, ExamAttemptSerializer,
     SubmitAnswerSerializer, AnswerSerializer
@@ -29,22 +31,12 @@ class ExamListView(generics.ListAPIView):
             exams = Exam.objects.filter(
                 is_active=True,
                 end_time__gte=now  # Only check that exam hasn't ended
-            ).select_related('subject').prefetch_related('questions__options')
-            
-            print(f"Current time: {now}")
-            print(f"Total exams in DB: {Exam.objects.count()}")
-            print(f"Active exams (not ended): {exams.count()}")
-            
-            for exam in exams:
-                print(f"Exam: {exam.title}")
-                print(f"  - Created by: {exam.created_by}")
-                print(f"  - Start: {exam.start_time}")
-                print(f"  - End: {exam.end_time}")
-                print(f"  - Is Active: {exam.is_active}")
-                print(f"  - Questions: {exam.questions.count()}")
-                print(f"  - Available: {exam.start_time <= now <= exam.end_time}")
+            )
+            # Students only see open exams and the ones they are enrolled in
+            if not is_admin_user(self.request.user):
+                exams = exams_for_student(exams, self.request.user)
             
-            return exams
+            return exams.select_related('subject').prefetch_related('questions__options')
         except Exception as e:
             print(f"Error in ExamListView: {e}")
             import traceback
@@ -56,10 +48,6 @@ class ExamListView(generics.ListAPIView):
             queryset = self.get_queryset()
             serializer = self.get_serializer(queryset, many=True)
             
-            print(f"Serialized {len(serializer.data)} exams")
-            for exam_data in serializer.data:
-                print(f"Returning exam: {exam_data['title']} - Questions: {len(exam_data.get('questions', []))}")
-            
             return Response(serializer.data)
         except Exception as e:
             print(f"Error in ExamListView.list: {e}")
@@ -74,7 +62,10 @@ class ExamDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Exam.objects.filter(is_active=True)
+        exams = Exam.objects.filter(is_active=True)
+        if not is_admin_user(self.request.user):
+            exams = exams_for_student(exams, self.request.user)
+        return exams
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -86,6 +77,11 @@ class ExamDetailView(generics.RetrieveAPIView):
 def start_exam(request, exam_id):
     exam = get_object_or_404(Exam, id=exam_id, is_active=True)
     
+    if not is_admin_user(request.user) and not can_take_exam(exam, request.user):
+        return Response({
+            'error': 'You are not enrolled in this exam'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
     # Check exam timing
     now = timezone.now()
     if exam.start_time and now < exam.start_time:
@@ -437,6 +433,7 @@ def submit_exam(request, attempt_id):
         # Admin will release results manually after marking
         attempt.results_ready = False
         attempt.save()
+        refresh_attempt_stats(attempt)
         
         # Log activity
         ExamActivityLog.objects.create(
@@ -9,6 +9,7 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from proctoring.urls import websocket_urlpatterns
 from proctoring.middleware import TokenAuthMiddlewareStack
+from exam_proctoring.channel_layer import report_in_background
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
@@ -18,3 +19,6 @@ application = ProtocolTypeRouter({
         )
     ),
 })
+
+# Report which channel layer this process uses, without delaying startup
+report_in_background()
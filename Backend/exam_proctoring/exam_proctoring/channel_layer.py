@@ -0,0 +1,101 @@
+# backend/exam_proctoring/channel_layer.py
+"""
+Channel layer selection and health check
+CHANNEL_LAYER_BACKEND picks the layer explicitly: 'redis' (REDIS_URL,
+needed as soon as more than one ASGI process serves WebSockets, or admin
+updates only reach sockets on the process that produced them) or 'memory'
+(single process, development). Nothing is contacted while settings load.
+The layer is checked lazily, by check_channel_layer(), which the ASGI
+application runs once in the background at startup to report what it is
+using; `manage.py check_channel_layer` runs the same check on demand.
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    'redis': 'channels_redis.core.RedisChannelLayer',
+    'memory': 'channels.layers.InMemoryChannelLayer',
+}
+DEFAULT_REDIS_URL = 'redis://127.0.0.1:6379/0'
+
+
+def channel_layer_config(backend, redis_url=''):
+    """CHANNEL_LAYERS['default'] for `backend`"""
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown CHANNEL_LAYER_BACKEND '{backend}' (use {' or '.join(BACKENDS)})"
+        )
+    config = {'BACKEND': BACKENDS[backend]}
+    if backend == 'redis':
+        config['CONFIG'] = {'hosts': [redis_url or DEFAULT_REDIS_URL]}
+    return config
+
+
+def _describe(layer_config):
+    """Backend name and location, without credentials"""
+    name = next((key for key, path in BACKENDS.items() if path == layer_config['BACKEND']), layer_config['BACKEND'])
+    hosts = layer_config.get('CONFIG', {}).get('hosts') or []
+    if not hosts or not isinstance(hosts[0], str):
+        return name, str(hosts[0]) if hosts else ''
+    url = urlsplit(hosts[0])
+    netloc = url.hostname or ''
+    if url.port:
+        netloc = f'{netloc}:{url.port}'
+    return name, urlunsplit((url.scheme, netloc, url.path, '', ''))
+
+
+async def _round_trip(layer, timeout):
+    channel = await layer.new_channel()
+    await layer.send(channel, {'type': 'health.check'})
+    await asyncio.wait_for(layer.receive(channel), timeout)
+
+
+def check_channel_layer(timeout=2):
+    """
+    Send a message to a fresh channel and read it back through the
+    configured layer; returns a dict with backend, location, ok, latency_ms
+    and error. Call it from synchronous code (not from an event loop).
+    """
+    from django.conf import settings
+    from channels.layers import get_channel_layer
+
+    name, location = _describe(settings.CHANNEL_LAYERS['default'])
+    result = {'backend': name, 'location': location, 'ok': False, 'latency_ms': None, 'error': None}
+    started = time.perf_counter()
+    try:
+        layer = get_channel_layer()
+        asyncio.run(_round_trip(layer, timeout))
+        result['ok'] = True
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    except asyncio.TimeoutError:
+        result['error'] = f'no reply within {timeout}s'
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    return result
+
+
+def report_line(result):
+    where = f" at {result['location']}" if result['location'] else ''
+    if not result['ok']:
+        return (
+            f"Channel layer {result['backend']}{where} is NOT reachable ({result['error']}); "
+            f"live admin monitoring updates will fail until it is"
+        )
+    line = f"Channel layer {result['backend']}{where} OK ({result['latency_ms']}ms)"
+    if result['backend'] == 'memory':
+        line += "; updates only reach WebSockets served by this process"
+    return line
+
+
+def report_in_background():
+    """Check the layer once without holding up startup, and print the result"""
+    def run():
+        try:
+            print(report_line(check_channel_layer()))
+        except Exception as e:
+            print(f"Error checking channel layer: {e}")
+
+    threading.Thread(target=run, name='channel-layer-check', daemon=True).start()
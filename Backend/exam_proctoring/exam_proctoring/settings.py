@@ -2,6 +2,8 @@
 import os
 from pathlib import Path
 from decouple import config
+from .channel_layer import channel_layer_config
+from .database import database_config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -65,37 +67,37 @@ WSGI_APPLICATION = 'exam_proctoring.wsgi.application'
 ASGI_APPLICATION = 'exam_proctoring.asgi.application'
 AUTH_USER_MODEL = 'authentication.CustomUser'
 
+# Database: SQLite in BASE_DIR unless DATABASE_URL points elsewhere
+# (see exam_proctoring/database.py for the URL forms and pooling options)
+DATABASE_URL = config('DATABASE_URL', default='sqlite:///db.sqlite3')
+DB_SQLITE_PRODUCTION = config('DB_SQLITE_PRODUCTION', default=False, cast=bool)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(
+        DATABASE_URL,
+        BASE_DIR,
+        conn_max_age=config('DB_CONN_MAX_AGE', default=60, cast=int),
+        health_checks=config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        connect_timeout=config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        pool=config('DB_POOL', default=False, cast=bool),
+        pool_min_size=config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        pool_max_size=config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        pool_timeout=config('DB_POOL_TIMEOUT', default=10, cast=int),
+        pgbouncer=config('DB_PGBOUNCER', default=False, cast=bool),
+        sqlite_production=DB_SQLITE_PRODUCTION,
+        sqlite_busy_timeout=config('DB_SQLITE_BUSY_TIMEOUT', default=20, cast=int),
+        sqlite_mmap_size=config('DB_SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    )
 }
 
-# Channels Configuration
-# Use in-memory channel layer for development (no Redis required)
-# For production, use Redis: 'BACKEND': 'channels_redis.core.RedisChannelLayer'
-try:
-    import redis
-    r = redis.Redis(host='127.0.0.1', port=6379, socket_connect_timeout=1)
-    r.ping()
-    r.close()
-    # Redis is available, use it
-    CHANNEL_LAYERS = {
-        'default': {
-            'BACKEND': 'channels_redis.core.RedisChannelLayer',
-            'CONFIG': {
-                "hosts": [('127.0.0.1', 6379)],
-            },
-        },
-    }
-except (redis.ConnectionError, redis.TimeoutError, ImportError, Exception):
-    # Redis not available, use in-memory channel layer
-    CHANNEL_LAYERS = {
-        'default': {
-            'BACKEND': 'channels.layers.InMemoryChannelLayer',
-        },
-    }
+# Channels: chosen from configuration, never by probing the network while
+# settings load. Use redis whenever more than one ASGI process serves
+# WebSockets; the ASGI app reports on the layer in the background at startup
+# (see exam_proctoring/channel_layer.py)
+REDIS_URL = config('REDIS_URL', default='')
+CHANNEL_LAYER_BACKEND = config('CHANNEL_LAYER_BACKEND', default='redis' if REDIS_URL else 'memory')
+CHANNEL_LAYERS = {
+    'default': channel_layer_config(CHANNEL_LAYER_BACKEND, REDIS_URL),
+}
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
@@ -116,11 +118,13 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+# Keyset-paginated admin listings return the next page in these headers
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'Link']
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.token_cache.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -141,6 +145,72 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+# Cache: per-process memory by default; point CACHE_REDIS_URL at Redis so
+# invalidations reach every worker process
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# API tokens: seconds a token stays valid after its last use, and how often
+# (seconds) that use is written back to extend it
+AUTH_TOKEN_TTL = config('AUTH_TOKEN_TTL', default=7 * 24 * 60 * 60, cast=int)
+AUTH_TOKEN_REFRESH_INTERVAL = config('AUTH_TOKEN_REFRESH_INTERVAL', default=60 * 60, cast=int)
+
+# Token -> user cache for REST and WebSocket authentication: seconds an entry
+# lives (0 disables it), entries per process, and whether entries are also
+# kept in the cache above so all workers share them
+TOKEN_CACHE_TIMEOUT = config('TOKEN_CACHE_TIMEOUT', default=60, cast=int)
+TOKEN_CACHE_SIZE = config('TOKEN_CACHE_SIZE', default=10000, cast=int)
+TOKEN_CACHE_SHARED = config('TOKEN_CACHE_SHARED', default=False, cast=bool)
+
+# Background jobs such as question imports (run in-process; 0 runs them inline in the request)
+BACKGROUND_JOB_WORKERS = config('BACKGROUND_JOB_WORKERS', default=2, cast=int)
+# Seconds without a heartbeat after which a queued or running job is taken to
+# have died with its worker process and is marked failed
+BACKGROUND_JOB_STALE_TIMEOUT = config('BACKGROUND_JOB_STALE_TIMEOUT', default=10 * 60, cast=int)
+
+# Result sheet PDFs: renderer processes (0 renders in the request thread) and
+# the private directory for rendered sheets and ZIP bundles
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=2, cast=int)
+PDF_CACHE_DIR = config('PDF_CACHE_DIR', default=os.path.join(BASE_DIR, 'pdf_cache'))
+
+# Private directory for uploaded import files and import reports (never
+# served from MEDIA_ROOT)
+IMPORT_FILES_DIR = config('IMPORT_FILES_DIR', default=os.path.join(BASE_DIR, 'private_imports'))
+
+# Seconds between batched writes of proctoring telemetry (face detection and
+# audio samples) by a single writer thread; 0 saves each sample as it arrives.
+# Batching is on by default in SQLite production mode.
+TELEMETRY_BATCH_INTERVAL = config('TELEMETRY_BATCH_INTERVAL', default=1.0 if DB_SQLITE_PRODUCTION else 0, cast=float)
+# Samples waiting for the writer; more are dropped until it catches up
+TELEMETRY_QUEUE_SIZE = config('TELEMETRY_QUEUE_SIZE', default=10000, cast=int)
+
+# Processes hashing passwords for bulk student imports (0 hashes in the job thread)
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=min(os.cpu_count() or 1, 4), cast=int)
+
+# Email: printed to the console unless an SMTP server is configured
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@localhost')
+# Outbox emails sent per batch over one connection
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=100, cast=int)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -8,6 +8,7 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from exam_app.models import ExamAttempt, ExamActivityLog
+from exam_app.pagination import PaginationError, filter_queryset, paginate
 
 User = get_user_model()
 
@@ -69,7 +70,10 @@ class AdminMonitoringConsumer(AsyncWebsocketConsumer):
             elif message_type == 'get_activities':
                 attempt_id = data.get('attempt_id')
                 if attempt_id:
-                    await self.send_activities(attempt_id)
+                    # Optional cursor/limit/activity_type/since/until/search,
+                    # as in the REST endpoint
+                    params = {key: value for key, value in data.items() if key not in ('type', 'attempt_id')}
+                    await self.send_activities(attempt_id, params)
             elif message_type == 'ping':
                 await self.send(text_data=json.dumps({'type': 'pong'}))
                 
@@ -107,13 +111,23 @@ class AdminMonitoringConsumer(AsyncWebsocketConsumer):
             'data': details
         }))
     
-    async def send_activities(self, attempt_id):
-        """Send activity logs for an attempt"""
-        activities = await self.get_activities_data(attempt_id)
+    async def send_activities(self, attempt_id, params=None):
+        """Send one page of activity logs for an attempt"""
+        try:
+            activities, next_cursor = await self.get_activities_data(attempt_id, params or {})
+        except PaginationError as e:
+            # Bad cursor, limit or filter from the client
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'request': 'get_activities',
+                'message': str(e)
+            }))
+            return
         
         await self.send(text_data=json.dumps({
             'type': 'activities',
-            'data': activities
+            'data': activities,
+            'next_cursor': next_cursor
         }))
     
     # Activity update handler (called when activity is logged)
@@ -132,6 +146,38 @@ class AdminMonitoringConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
     
+    # Question import progress handler
+    async def import_progress(self, event):
+        """Handle question import job progress from channel layer"""
+        await self.send(text_data=json.dumps({
+            'type': 'import_progress',
+            'data': event['data']
+        }))
+    
+    # Exam-wide results release/un-release handler
+    async def results_release(self, event):
+        """Handle bulk results release summaries from channel layer"""
+        await self.send(text_data=json.dumps({
+            'type': 'results_release',
+            'data': event['data']
+        }))
+    
+    # Result PDF bundle progress handler
+    async def result_pdf_progress(self, event):
+        """Handle result PDF bundle progress from channel layer"""
+        await self.send(text_data=json.dumps({
+            'type': 'result_pdf_progress',
+            'data': event['data']
+        }))
+    
+    # Bulk student import progress handler
+    async def student_import_progress(self, event):
+        """Handle bulk student import progress from channel layer"""
+        await self.send(text_data=json.dumps({
+            'type': 'student_import_progress',
+            'data': event['data']
+        }))
+    
     @database_sync_to_async
     def check_admin_permissions(self):
         """Check if user has admin permissions"""
@@ -255,9 +301,15 @@ class AdminMonitoringConsumer(AsyncWebsocketConsumer):
         }
     
     @database_sync_to_async
-    def get_activities_data(self, attempt_id):
-        """Get activities data"""
-        activities = ExamActivityLog.objects.filter(attempt_id=attempt_id).order_by('-timestamp')
+    def get_activities_data(self, attempt_id, params):
+        """Get one page of activities data and the cursor of the next page"""
+        activities = filter_queryset(
+            ExamActivityLog.objects.filter(attempt_id=attempt_id), params,
+            choices={'activity_type': 'activity_type'},
+            date_field='timestamp',
+            search_fields=('description',),
+        )
+        activities, next_cursor = paginate(activities, params, ('-timestamp', '-id'))
         
         return [{
             'id': log.id,
@@ -266,5 +318,5 @@ class AdminMonitoringConsumer(AsyncWebsocketConsumer):
             'metadata': log.metadata,
             'timestamp': log.timestamp.isoformat(),
             'ip_address': str(log.ip_address) if log.ip_address else None
-        } for log in activities]
+        } for log in activities], next_cursor
 
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from exam_app.pagination import PaginationError, filter_queryset, paginate, page_response
 import traceback
 
 try:
@@ -16,7 +17,12 @@ except ImportError:
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def recent_violations(request):
-    """Get recent violations for admin"""
+    """
+    Get recent violations for admin, newest first
+    Keyset paginated (?cursor=, ?limit=; 50 per page by default) and
+    filterable by ?severity=, ?type=, ?exam=, ?since=/?until= and ?search=
+    (description, student or exam title).
+    """
     try:
         if not (request.user.is_staff or getattr(request.user, 'is_instructor', False)):
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
@@ -27,7 +33,18 @@ def recent_violations(request):
         violations = ViolationLog.objects.select_related(
             'session__attempt__user', 
             'session__attempt__exam'
-        ).order_by('-timestamp')[:50]
+        )
+        violations = filter_queryset(
+            violations, request.GET,
+            choices={
+                'severity': 'severity',
+                'type': 'violation_type',
+                'exam': 'session__attempt__exam',
+            },
+            date_field='timestamp',
+            search_fields=('description', 'session__attempt__user__username', 'session__attempt__exam__title'),
+        )
+        violations, next_cursor = paginate(violations, request.GET, ('-timestamp', '-id'), default_limit=50)
         
         violations_data = []
         for violation in violations:
@@ -41,7 +58,9 @@ def recent_violations(request):
                 'exam_title': violation.session.attempt.exam.title
             })
         
-        return Response(violations_data)
+        return page_response(request, violations_data, next_cursor)
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Error in recent_violations: {e}")
         print(traceback.format_exc())
@@ -3,7 +3,8 @@ import json
 import base64
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import ProctoringSession, ViolationLog, FaceDetectionLog
+from .models import ProctoringSession, ViolationLog, FaceDetectionLog, AudioMonitoringLog
+from . import telemetry
 from exam_app.models import ExamAttempt
 
 # Optional imports for face detection
@@ -175,22 +176,26 @@ class ProctoringConsumer(AsyncWebsocketConsumer):
         except ExamAttempt.DoesNotExist:
             raise Exception("Invalid exam attempt")
 
-    @database_sync_to_async
-    def log_face_detection(self, faces_count, confidence):
-        FaceDetectionLog.objects.create(
+    async def log_telemetry(self, row):
+        # High-volume samples go to the batching writer thread when enabled
+        if telemetry.batching_enabled():
+            telemetry.enqueue(row)
+        else:
+            await database_sync_to_async(row.save)()
+
+    async def log_face_detection(self, faces_count, confidence):
+        await self.log_telemetry(FaceDetectionLog(
             session=self.session,
             faces_detected=faces_count,
             confidence_score=confidence
-        )
+        ))
 
-    @database_sync_to_async
-    def log_audio_monitoring(self, noise_level, threshold_exceeded):
-        from .models import AudioMonitoringLog
-        AudioMonitoringLog.objects.create(
+    async def log_audio_monitoring(self, noise_level, threshold_exceeded):
+        await self.log_telemetry(AudioMonitoringLog(
             session=self.session,
             noise_level=noise_level,
             threshold_exceeded=threshold_exceeded
-        )
+        ))
 
     @database_sync_to_async
     def log_violation(self, violation_type, description):
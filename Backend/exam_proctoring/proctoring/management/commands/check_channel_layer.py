@@ -0,0 +1,16 @@
+# backend/proctoring/management/commands/check_channel_layer.py
+from django.core.management.base import BaseCommand, CommandError
+from exam_proctoring.channel_layer import check_channel_layer, report_line
+
+
+class Command(BaseCommand):
+    help = "Check that the configured channel layer can deliver a message"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=2, help="Seconds to wait for the message (default: 2)")
+
+    def handle(self, *args, **options):
+        result = check_channel_layer(timeout=options['timeout'])
+        if not result['ok']:
+            raise CommandError(report_line(result))
+        self.stdout.write(self.style.SUCCESS(report_line(result)))
@@ -2,18 +2,15 @@
 from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
+from authentication.token_cache import get_token_user
 
 
 @database_sync_to_async
 def get_user_from_token(token_key):
-    """Get user from token key"""
-    try:
-        token = Token.objects.select_related('user').get(key=token_key)
-        if token.user.is_active:
-            return token.user
-    except Token.DoesNotExist:
-        pass
+    """Get user from token key (through the token cache)"""
+    user = get_token_user(token_key)
+    if user is not None and user.is_active:
+        return user
     return AnonymousUser()
 
 
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='violationlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='proctoring__timesta_759c11_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='violationlog',
+            index=models.Index(fields=['session', '-timestamp'], name='proctoring__session_482417_idx'),
+        ),
+    ]
@@ -34,6 +34,13 @@ class ViolationLog(models.Model):
         ('HIGH', 'High'),
         ('CRITICAL', 'Critical')
     ], default='MEDIUM')
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination of recent violations, newest first
+            models.Index(fields=['-timestamp', '-id']),
+            models.Index(fields=['session', '-timestamp']),
+        ]
 
 class FaceDetectionLog(models.Model):
     session = models.ForeignKey(ProctoringSession, on_delete=models.CASCADE)
@@ -0,0 +1,117 @@
+# backend/proctoring/telemetry.py
+"""
+Batched proctoring telemetry writes
+Every candidate streams face detection and audio samples several times a
+second. With TELEMETRY_BATCH_INTERVAL set, the consumers queue the unsaved
+rows and a single writer thread inserts everything queued so far in one
+transaction per tick. The consumers never wait for the database lock and
+SQLite sees one writer instead of one per open socket. With 0, each row is
+saved as it arrives.
+
+Rows are timestamped when they are written, at most one tick late. While
+TELEMETRY_QUEUE_SIZE rows are waiting, new samples are dropped rather than
+slowing the exam down.
+"""
+import atexit
+import queue
+import threading
+import traceback
+from collections import defaultdict
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+_queue = None
+_writer = None
+_stopping = threading.Event()
+_lock = threading.Lock()
+_dropped = 0
+
+
+def batching_enabled():
+    return settings.TELEMETRY_BATCH_INTERVAL > 0
+
+
+def _get_queue():
+    global _queue, _writer
+    with _lock:
+        if _queue is None:
+            _queue = queue.Queue(maxsize=settings.TELEMETRY_QUEUE_SIZE)
+            atexit.register(stop_writer)
+        if _writer is None or not _writer.is_alive():
+            _stopping.clear()
+            _writer = threading.Thread(target=_run, name='telemetry-writer', daemon=True)
+            _writer.start()
+        return _queue
+
+
+def enqueue(row):
+    """Queue an unsaved telemetry row for the writer thread"""
+    global _dropped
+    try:
+        _get_queue().put_nowait(row)
+    except queue.Full:
+        _dropped += 1
+        if _dropped % 1000 == 1:
+            print(f"Telemetry queue full, {_dropped} sample(s) dropped so far")
+
+
+def _write(rows):
+    by_model = defaultdict(list)
+    for row in rows:
+        by_model[type(row)].append(row)
+    try:
+        with transaction.atomic():
+            for model, objs in by_model.items():
+                model.objects.bulk_create(objs, batch_size=500)
+    except IntegrityError:
+        # A session was deleted while its samples were queued; keep the rest
+        for row in rows:
+            row.pk = None
+            try:
+                with transaction.atomic():
+                    row.save()
+            except IntegrityError:
+                pass
+
+
+def flush():
+    """Write everything queued so far; returns how many rows were written"""
+    if _queue is None:
+        return 0
+    rows = []
+    while True:
+        try:
+            rows.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    if rows:
+        _write(rows)
+    return len(rows)
+
+
+def _run():
+    """Writer thread: one transaction per tick, on its own DB connection"""
+    while not _stopping.wait(settings.TELEMETRY_BATCH_INTERVAL):
+        close_old_connections()
+        try:
+            flush()
+        except Exception as e:
+            print(f"Error writing telemetry: {e}")
+            traceback.print_exc()
+        finally:
+            close_old_connections()
+    # Stopped: write what is left before exiting
+    try:
+        flush()
+    except Exception as e:
+        print(f"Error writing telemetry: {e}")
+        traceback.print_exc()
+    finally:
+        close_old_connections()
+
+
+def stop_writer(timeout=10):
+    """Stop the writer thread once it has written everything queued"""
+    _stopping.set()
+    if _writer is not None:
+        _writer.join(timeout)
@@ -1,3 +1,146 @@
-from django.test import TestCase
+import json
+import time
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from exam_app.models import Exam, ExamActivityLog, ExamAttempt
+from . import telemetry
+from .admin_consumer import AdminMonitoringConsumer
+from .consumers import ProctoringConsumer
+from .models import AudioMonitoringLog, FaceDetectionLog, ProctoringSession
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class AdminMonitoringConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        student = User.objects.create_user('student', password='x')
+        exam = Exam.objects.create(title='Algebra', created_by=self.admin)
+        self.attempt = ExamAttempt.objects.create(user=student, exam=exam, total_questions=0)
+        ExamActivityLog.objects.bulk_create([
+            ExamActivityLog(attempt=self.attempt, activity_type='TAB_SWITCH', description=f'switch {idx}')
+            for idx in range(3)
+        ])
+
+    async def connect(self):
+        communicator = ApplicationCommunicator(AdminMonitoringConsumer.as_asgi(), {
+            'type': 'websocket',
+            'path': f'/ws/admin/attempt/{self.attempt.id}/',
+            'user': self.admin,
+            'url_route': {'kwargs': {'attempt_id': self.attempt.id}},
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await communicator.receive_output(5))['type'], 'websocket.accept')
+        initial = json.loads((await communicator.receive_output(5))['text'])
+        self.assertEqual(initial['type'], 'attempt_details')
+        return communicator
+
+    async def request(self, communicator, message):
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps(message)})
+        return json.loads((await communicator.receive_output(5))['text'])
+
+    async def test_bad_cursor_gets_error_frame_and_socket_stays_usable(self):
+        communicator = await self.connect()
+
+        error = await self.request(communicator, {'type': 'get_activities', 'attempt_id': self.attempt.id, 'cursor': 'not-a-cursor'})
+        self.assertEqual(error, {'type': 'error', 'request': 'get_activities', 'message': 'Invalid cursor'})
+        error = await self.request(communicator, {'type': 'get_activities', 'attempt_id': self.attempt.id, 'limit': 'many'})
+        self.assertEqual(error['message'], 'limit must be an integer')
+
+        page = await self.request(communicator, {'type': 'get_activities', 'attempt_id': self.attempt.id, 'limit': 2})
+        self.assertEqual(page['type'], 'activities')
+        self.assertEqual(len(page['data']), 2)
+        rest = await self.request(communicator, {'type': 'get_activities', 'attempt_id': self.attempt.id, 'cursor': page['next_cursor']})
+        self.assertEqual([activity['description'] for activity in rest['data']], ['switch 0'])
+        self.assertIsNone(rest['next_cursor'])
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(5)
+
+
+def reset_telemetry():
+    """Stop the writer thread and forget its queue"""
+    telemetry.stop_writer()
+    telemetry._queue = None
+    telemetry._writer = None
+    telemetry._dropped = 0
+
+
+# A long tick keeps the writer thread out of the way until flush() is called
+@override_settings(TELEMETRY_BATCH_INTERVAL=3600, TELEMETRY_QUEUE_SIZE=100)
+class TelemetryBatchingTests(TransactionTestCase):
+    def setUp(self):
+        reset_telemetry()
+        self.addCleanup(reset_telemetry)
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        exam = Exam.objects.create(title='Algebra', created_by=admin)
+        self.sessions = [
+            ProctoringSession.objects.create(
+                attempt=ExamAttempt.objects.create(user=User.objects.create_user(name, password='x'), exam=exam, total_questions=0)
+            )
+            for name in ('ann', 'bob')
+        ]
+
+    def consumer(self, session):
+        consumer = ProctoringConsumer()
+        consumer.session = session
+        return consumer
+
+    def test_consumer_samples_are_queued_and_written_in_one_transaction(self):
+        for session in self.sessions:
+            consumer = self.consumer(session)
+            for index in range(5):
+                async_to_sync(consumer.log_face_detection)(1, 0.9)
+                async_to_sync(consumer.log_audio_monitoring)(float(index), False)
+        # Nothing touches the database until the writer's tick
+        self.assertEqual(FaceDetectionLog.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(telemetry.flush(), 20)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        for session in self.sessions:
+            self.assertEqual(FaceDetectionLog.objects.filter(session=session).count(), 5)
+            self.assertEqual(AudioMonitoringLog.objects.filter(session=session).count(), 5)
+
+    @override_settings(TELEMETRY_BATCH_INTERVAL=0)
+    def test_unbatched_samples_are_saved_right_away(self):
+        async_to_sync(self.consumer(self.sessions[0]).log_face_detection)(2, 0.5)
+        self.assertEqual(FaceDetectionLog.objects.get().faces_detected, 2)
+        self.assertIsNone(telemetry._queue)
+
+    @override_settings(TELEMETRY_QUEUE_SIZE=3)
+    def test_full_queue_drops_new_samples(self):
+        for index in range(5):
+            telemetry.enqueue(FaceDetectionLog(session=self.sessions[0], faces_detected=index, confidence_score=1))
+        self.assertEqual(telemetry._dropped, 2)
+        self.assertEqual(telemetry.flush(), 3)
+        self.assertEqual(sorted(FaceDetectionLog.objects.values_list('faces_detected', flat=True)), [0, 1, 2])
+
+    def test_samples_of_a_deleted_session_do_not_lose_the_rest(self):
+        kept, deleted = self.sessions
+        for session in self.sessions:
+            telemetry.enqueue(FaceDetectionLog(session=session, faces_detected=1, confidence_score=1))
+        ProctoringSession.objects.filter(pk=deleted.pk).delete()
+        telemetry.flush()
+        self.assertEqual(list(FaceDetectionLog.objects.values_list('session_id', flat=True)), [kept.pk])
+
+    @override_settings(TELEMETRY_BATCH_INTERVAL=0.05)
+    def test_writer_thread_writes_each_tick_and_on_stop(self):
+        telemetry.enqueue(FaceDetectionLog(session=self.sessions[0], faces_detected=1, confidence_score=1))
+        deadline = time.monotonic() + 5
+        while not FaceDetectionLog.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(FaceDetectionLog.objects.count(), 1)
+
+        # Stopping writes whatever is still queued
+        with override_settings(TELEMETRY_BATCH_INTERVAL=3600):
+            reset_telemetry()
+            telemetry.enqueue(FaceDetectionLog(session=self.sessions[1], faces_detected=1, confidence_score=1))
+            telemetry.stop_writer()
+        self.assertEqual(FaceDetectionLog.objects.count(), 2)
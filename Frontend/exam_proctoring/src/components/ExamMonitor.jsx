@@ -1,7 +1,7 @@
 // frontend/src/components/ExamMonitor.jsx
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect, useMemo, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
-import api from '../services/api';
+import api, { getPage } from '../services/api';
 import Icon from './Icon';
 import './ExamMonitor.css';
 
@@ -11,6 +11,9 @@ const ExamMonitor = () => {
   const [selectedExam, setSelectedExam] = useState(null);
   const [liveAttempts, setLiveAttempts] = useState([]);
   const [allAttempts, setAllAttempts] = useState([]);
+  const [attemptsCursor, setAttemptsCursor] = useState(null);
+  const [loadingMoreAttempts, setLoadingMoreAttempts] = useState(false);
+  const attemptsPagesLoaded = useRef(false);
   const [violations, setViolations] = useState([]);
   const [loading, setLoading] = useState(false);
   // Load activeTab from localStorage, default to 'live'
@@ -45,7 +48,8 @@ const ExamMonitor = () => {
       fetchViolations();
       const interval = setInterval(() => {
         fetchLiveAttempts();
-        if (activeTab === 'all') {
+        // Only refresh the first page; pages loaded on demand stay put
+        if (activeTab === 'all' && !attemptsPagesLoaded.current) {
           fetchAllAttempts();
         }
         fetchViolations();
@@ -77,60 +81,60 @@ const ExamMonitor = () => {
     }
   };
 
-  const fetchAllAttempts = async () => {
+  const sortAttempts = (attempts) => {
+    return [...attempts].sort((a, b) => {
+      let comparison = 0;
+      
+      if (sortBy === 'time') {
+        const timeA = new Date(a.start_time || 0).getTime();
+        const timeB = new Date(b.start_time || 0).getTime();
+        comparison = timeB - timeA;
+      } else if (sortBy === 'score') {
+        const scoreA = a.score !== null && a.score !== undefined ? a.score : -1;
+        const scoreB = b.score !== null && b.score !== undefined ? b.score : -1;
+        comparison = scoreB - scoreA;
+      } else if (sortBy === 'name') {
+        comparison = (a.user_name || '').localeCompare(b.user_name || '');
+      }
+      
+      return sortOrder === 'asc' ? -comparison : comparison;
+    });
+  };
+
+  // Status and search filters run on the server; each call loads one page
+  // and "Load more" follows the X-Next-Cursor header
+  const fetchAllAttempts = async (cursor = null) => {
     if (!selectedExam) return;
     
     try {
-      const response = await api.get(`/exam/admin/exams/${selectedExam.id}/all-attempts/`);
-      const attempts = response.data || [];
+      const params = {};
+      if (statusFilter !== 'all') params.status = statusFilter;
+      if (searchQuery.trim()) params.search = searchQuery.trim();
       
-      // Apply filters and sorting
-      let filtered = [...attempts];
+      if (cursor) setLoadingMoreAttempts(true);
+      const page = await getPage(`/exam/admin/exams/${selectedExam.id}/all-attempts/`, params, cursor);
       
-      // Status filter
-      if (statusFilter !== 'all') {
-        filtered = filtered.filter(a => a.status === statusFilter);
-      }
-      
-      // Search filter
-      if (searchQuery.trim()) {
-        const query = searchQuery.toLowerCase();
-        filtered = filtered.filter(a => 
-          a.user_name?.toLowerCase().includes(query) ||
-          a.user_email?.toLowerCase().includes(query)
-        );
-      }
-      
-      // Sorting
-      filtered.sort((a, b) => {
-        let comparison = 0;
-        
-        if (sortBy === 'time') {
-          const timeA = new Date(a.start_time || 0).getTime();
-          const timeB = new Date(b.start_time || 0).getTime();
-          comparison = timeB - timeA;
-        } else if (sortBy === 'score') {
-          const scoreA = a.score !== null && a.score !== undefined ? a.score : -1;
-          const scoreB = b.score !== null && b.score !== undefined ? b.score : -1;
-          comparison = scoreB - scoreA;
-        } else if (sortBy === 'name') {
-          comparison = (a.user_name || '').localeCompare(b.user_name || '');
-        }
-        
-        return sortOrder === 'asc' ? -comparison : comparison;
-      });
-      
-      setAllAttempts(filtered);
+      attemptsPagesLoaded.current = Boolean(cursor);
+      setAllAttempts(previous => sortAttempts(cursor ? [...previous, ...page.rows] : page.rows));
+      setAttemptsCursor(page.nextCursor);
     } catch (error) {
       // Silently handle errors
+    } finally {
+      setLoadingMoreAttempts(false);
     }
   };
 
   useEffect(() => {
     if (selectedExam && activeTab === 'all') {
-      fetchAllAttempts();
+      const timer = setTimeout(() => fetchAllAttempts(), searchQuery ? 300 : 0);
+      return () => clearTimeout(timer);
     }
-  }, [statusFilter, searchQuery, sortBy, sortOrder, selectedExam, activeTab]);
+  }, [statusFilter, searchQuery, selectedExam, activeTab]);
+
+  // Sorting only reorders the pages already loaded
+  useEffect(() => {
+    setAllAttempts(previous => sortAttempts(previous));
+  }, [sortBy, sortOrder]);
 
   const fetchAttemptAnswers = async (attemptId) => {
     try {
@@ -789,6 +793,18 @@ const ExamMonitor = () => {
                       ))}
                     </div>
                   )}
+
+                  {attemptsCursor && (
+                    <div className="load-more">
+                      <button
+                        onClick={() => fetchAllAttempts(attemptsCursor)}
+                        className="btn btn-outline btn-sm"
+                        disabled={loadingMoreAttempts}
+                      >
+                        {loadingMoreAttempts ? 'Loading...' : 'Load more attempts'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
 
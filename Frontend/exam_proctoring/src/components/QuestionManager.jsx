@@ -3,7 +3,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useSearchParams } from 'react-router-dom';
 import toast from 'react-hot-toast';
-import api from '../services/api';
+import api, { importQuestionsFile } from '../services/api';
 import Icon from './Icon';
 import ConfirmationModal from './ConfirmationModal';
 import Breadcrumbs from './Breadcrumbs';
@@ -639,22 +639,19 @@ const saveQuestion = async () => {
                           onChange={async (e) => {
                             const file = e.target.files[0];
                             if (file) {
+                              const toastId = toast.loading(`Importing ${file.name}...`);
+                              e.target.value = ''; // Reset file input
                               try {
-                                const formData = new FormData();
-                                formData.append('file', file);
-                                formData.append('overwrite', false);
-                                
-                                const response = await api.post(`/exam/admin/exams/${selectedExam.id}/import-questions/`, formData, {
-                                  headers: { 'Content-Type': 'multipart/form-data' }
+                                const job = await importQuestionsFile(selectedExam.id, file, {
+                                  onProgress: (progress) => toast.loading(
+                                    `Importing ${file.name}: ${progress.processed} questions processed`, { id: toastId }
+                                  ),
                                 });
-                                
-                                toast.success(`Imported ${response.data.imported} questions successfully`);
+                                toast.success(`Imported ${job.imported} questions successfully`, { id: toastId });
                                 fetchQuestions(selectedExam.id);
-                                e.target.value = ''; // Reset file input
                               } catch (error) {
                                 console.error('Error importing questions:', error);
-                                toast.error(error.response?.data?.error || 'Failed to import questions');
-                                e.target.value = ''; // Reset file input
+                                toast.error(error.response?.data?.error || error.message || 'Failed to import questions', { id: toastId });
                               }
                             }
                           }}
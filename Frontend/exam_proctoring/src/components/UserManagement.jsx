@@ -1,65 +1,53 @@
 // frontend/src/components/UserManagement.jsx
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import api from '../services/api';
+import api, { getPage } from '../services/api';
 import './UserManagement.css';
 
 const UserManagement = () => {
   const navigate = useNavigate();
   const [users, setUsers] = useState([]);
-  const [filteredUsers, setFilteredUsers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterType, setFilterType] = useState('all');
 
+  // Search and type filters run on the server, one page at a time
   useEffect(() => {
-    fetchUsers();
-  }, []);
-
-  useEffect(() => {
-    filterUsers();
-  }, [users, searchTerm, filterType]);
+    const timer = setTimeout(() => fetchUsers(), searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm, filterType]);
+
+  const userFilters = () => {
+    const params = {};
+    if (searchTerm) params.search = searchTerm;
+    if (filterType === 'students') params.is_student = true;
+    if (filterType === 'instructors') params.is_instructor = true;
+    if (filterType === 'admins') params.is_staff = true;
+    return params;
+  };
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (cursor = null) => {
     try {
-      const response = await api.get('/auth/admin/users/');
-      setUsers(response.data);
+      if (cursor) setLoadingMore(true);
+      const page = await getPage('/auth/admin/users/', userFilters(), cursor);
+      setUsers(previous => (cursor ? [...previous, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Error fetching users:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
-  const filterUsers = () => {
-    let filtered = users;
-
-    // Filter by search term
-    if (searchTerm) {
-      filtered = filtered.filter(user =>
-        user.username.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        user.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        `${user.first_name} ${user.last_name}`.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-
-    // Filter by user type
-    if (filterType !== 'all') {
-      filtered = filtered.filter(user => {
-        if (filterType === 'students') return user.is_student;
-        if (filterType === 'instructors') return user.is_instructor;
-        if (filterType === 'admins') return user.is_staff;
-        return true;
-      });
-    }
-
-    setFilteredUsers(filtered);
-  };
-
   const toggleUserStatus = async (userId, isActive) => {
     try {
       await api.patch(`/auth/admin/users/${userId}/`, { is_active: !isActive });
-      fetchUsers();
+      setUsers(previous => previous.map(user => (
+        user.id === userId ? { ...user, is_active: !isActive } : user
+      )));
     } catch (error) {
       console.error('Error updating user status:', error);
     }
@@ -70,7 +58,7 @@ const UserManagement = () => {
 
     try {
       await api.delete(`/auth/admin/users/${userId}/`);
-      fetchUsers();
+      setUsers(previous => previous.filter(user => user.id !== userId));
     } catch (error) {
       console.error('Error deleting user:', error);
     }
@@ -114,25 +102,25 @@ const UserManagement = () => {
               onClick={() => setFilterType('all')}
               className={`filter-btn ${filterType === 'all' ? 'active' : ''}`}
             >
-              All Users ({users.length})
+              All Users
             </button>
             <button
               onClick={() => setFilterType('students')}
               className={`filter-btn ${filterType === 'students' ? 'active' : ''}`}
             >
-              Students ({users.filter(u => u.is_student).length})
+              Students
             </button>
             <button
               onClick={() => setFilterType('instructors')}
               className={`filter-btn ${filterType === 'instructors' ? 'active' : ''}`}
             >
-              Instructors ({users.filter(u => u.is_instructor).length})
+              Instructors
             </button>
             <button
               onClick={() => setFilterType('admins')}
               className={`filter-btn ${filterType === 'admins' ? 'active' : ''}`}
             >
-              Admins ({users.filter(u => u.is_staff).length})
+              Admins
             </button>
           </div>
         </div>
@@ -151,7 +139,7 @@ const UserManagement = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredUsers.map(user => (
+              {users.map(user => (
                 <tr key={user.id}>
                   <td>
                     <div className="user-info">
@@ -208,11 +196,23 @@ const UserManagement = () => {
           </table>
         </div>
 
-        {filteredUsers.length === 0 && (
+        {users.length === 0 && (
           <div className="no-users">
             <p>No users found matching your criteria.</p>
           </div>
         )}
+
+        {nextCursor && (
+          <div className="load-more">
+            <button
+              onClick={() => fetchUsers(nextCursor)}
+              className="btn btn-secondary"
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more users'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -40,4 +40,40 @@ api.interceptors.response.use(
   }
 );
 
+// Fetch one page of a keyset paginated list endpoint
+// List endpoints return a JSON array per page and the next page's cursor in
+// the X-Next-Cursor header (absent on the last page); pass it back as
+// `cursor` to load the following page when the user asks for more
+export const getPage = async (url, params = {}, cursor = null) => {
+  const response = await api.get(url, {
+    params: { ...params, ...(cursor ? { cursor } : {}) },
+  });
+  return {
+    rows: response.data || [],
+    nextCursor: response.headers['x-next-cursor'] || null,
+  };
+};
+
+// Import a question file as a background job and wait for it to finish
+// The upload returns the queued job straight away; its status is polled
+// until the worker reports COMPLETED (resolves with the job) or FAILED
+export const importQuestionsFile = async (examId, file, { overwrite = false, pollInterval = 1000, onProgress } = {}) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  formData.append('overwrite', overwrite);
+
+  let { data: job } = await api.post(`/exam/admin/exams/${examId}/import-jobs/`, formData, {
+    headers: { 'Content-Type': 'multipart/form-data' }
+  });
+  while (job.status === 'PENDING' || job.status === 'RUNNING') {
+    if (onProgress) onProgress(job);
+    await new Promise((resolve) => setTimeout(resolve, pollInterval));
+    ({ data: job } = await api.get(`/exam/admin/import-jobs/${job.id}/`));
+  }
+  if (job.status === 'FAILED') {
+    throw new Error(job.message || 'Failed to import questions');
+  }
+  return job;
+};
+
 export default api;